@@ -0,0 +1,357 @@
+"""Checkpoint/restore engines driven by the benchmark orchestrator (bench.py)."""
+
+import asyncio
+import glob
+import os
+import shutil
+import signal
+
+import local_checkpoint
+
+# Environment variable naming the job a locally launched workload belongs to.
+JOB_ENV = "BENCH_JOB"
+
+
+class CommandError(RuntimeError):
+    """Raised when a backend subprocess exits non-zero or times out."""
+
+
+def job_pids(job: str) -> list[int]:
+    """Processes whose environment has JOB_ENV set to `job`."""
+    tag = f"{JOB_ENV}={job}".encode()
+    pids = []
+    for environ in glob.glob("/proc/[0-9]*/environ"):
+        try:
+            with open(environ, "rb") as f:
+                if tag in f.read().split(b"\0"):
+                    pids.append(int(environ.split("/")[2]))
+        except OSError:
+            continue  # exited, or not ours to read
+    return pids
+
+
+def dump_sizes(directory: str | os.PathLike, streams: int) -> dict:
+    """Bytes stored in a local dump directory and in its per-stream files.
+
+    Streamer writes one image file per stream and these dominate the dump,
+    so the `streams` largest files are taken as the stream files.
+    """
+    sizes = sorted(
+        (
+            os.path.getsize(os.path.join(root, name))
+            for root, _, files in os.walk(directory)
+            for name in files
+        ),
+        reverse=True,
+    )
+    return {
+        "stored_bytes": sum(sizes),
+        "stream_bytes": sizes[:streams] if streams > 0 else [sum(sizes)],
+    }
+
+
+async def run_cmd(*args: str, timeout: float | None = None, check: bool = True) -> str:
+    """Run a command, returning combined stdout/stderr as text."""
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise CommandError(f"Timed out after {timeout}s: {' '.join(args)}")
+
+    output = out.decode(errors="replace")
+    if check and proc.returncode != 0:
+        raise CommandError(
+            f"Command failed ({proc.returncode}): {' '.join(args)}\n{output}"
+        )
+    return output
+
+
+class Backend:
+    """Interface every checkpoint engine implements.
+
+    A job goes through launch -> dump -> restore -> cleanup. The orchestrator
+    times dump and restore; everything else is setup/teardown. launch, dump
+    and restore return the engine's output, which is kept in the sweep log.
+    """
+
+    name = ""
+
+    async def setup(self) -> None:
+        """Check the engine is usable before the sweep starts."""
+
+    async def launch(self, job: str, workload: dict) -> str:
+        raise NotImplementedError
+
+    async def dump(
+        self, job: str, compression: str, streams: int, directory: str | None
+    ) -> str:
+        raise NotImplementedError
+
+    async def restore(self, job: str) -> str:
+        raise NotImplementedError
+
+    async def cleanup(self, job: str) -> None:
+        raise NotImplementedError
+
+    async def reap(self, job: str, directory: str | None) -> None:
+        """Kill and remove what `job` left behind in a sweep that was cut
+        short, when this backend instance never launched it."""
+        raise NotImplementedError
+
+    async def noop(self) -> None:
+        """The cheapest call into the engine, timed for the CLI baseline that
+        is subtracted from phase times. In-process engines have none."""
+
+    def monitored(self, job: str) -> dict[str, str | int]:
+        """Processes the resource sampler should watch during dump/restore.
+
+        Maps a role name to a pid or a command-line substring.
+        """
+        return {}
+
+    def artifacts(self, job: str) -> dict:
+        """Size of the last dump of `job`, measured before restore.
+
+        Keys (all optional): raw_bytes (uncompressed image), stored_bytes
+        (on disk after compression) and stream_bytes (list, one per stream).
+        Remote targets (s3://, cedana://) can't be measured and return {},
+        except the local engine's dumps to an s3:// stand-in.
+        """
+        return {}
+
+    async def checkpointer_pids(self) -> list[int]:
+        """Processes doing the dump/restore I/O, to be placed in a limited cgroup.
+
+        Processes they fork later inherit the cgroup.
+        """
+        return []
+
+    def dump_location(self, job: str) -> str | None:
+        """Local directory of the last dump of `job`, None for remote targets."""
+        return None
+
+
+class CedanaBackend(Backend):
+    """Drives the `cedana` CLI, mirroring run_benchmarks.sh."""
+
+    name = "cedana"
+
+    def __init__(self, binary: str = "cedana", timeout: float = 1800):
+        self.binary = binary
+        self.timeout = timeout
+        self.dumps: dict[str, tuple] = {}
+
+    def monitored(self, job: str) -> dict[str, str | int]:
+        return {
+            "streamer": "cedana-image-streamer",
+            "criu": "criu",
+            "daemon": "cedana daemon",
+        }
+
+    async def setup(self) -> None:
+        if shutil.which(self.binary) is None:
+            raise CommandError(f"'{self.binary}' not found in PATH")
+        out = await run_cmd("pgrep", "-f", "cedana daemon", check=False)
+        if not out.strip():
+            raise CommandError("cedana daemon is not running")
+
+    async def noop(self) -> None:
+        # Client startup, a gRPC round trip and printing, like every dump.
+        await run_cmd(self.binary, "job", "list", timeout=self.timeout)
+
+    async def checkpointer_pids(self) -> list[int]:
+        # CRIU and the streamer are spawned by the daemon per dump.
+        out = await run_cmd("pgrep", "-f", "cedana daemon", check=False)
+        return [int(pid) for pid in out.split()]
+
+    async def launch(self, job: str, workload: dict) -> str:
+        args = [self.binary, "run", "process"]
+        if workload.get("gpu"):
+            args.append("--gpu-enabled")
+        args += ["--jid", job, "--", *workload["cmd"]]
+        output = await run_cmd(*args, timeout=self.timeout)
+        await asyncio.sleep(workload.get("warmup", 2))
+
+        jobs = await run_cmd(self.binary, "job", "list", timeout=self.timeout)
+        if job not in jobs:
+            raise CommandError(f"Failed to start job {job}")
+        return output
+
+    async def dump(
+        self, job: str, compression: str, streams: int, directory: str | None
+    ) -> str:
+        args = [
+            self.binary, "dump", "job", job,
+            "--compression", compression,
+            "--streams", str(streams),
+        ]  # fmt: skip
+        if directory:
+            args += ["--dir", directory]
+        output = await run_cmd(*args, timeout=self.timeout)
+
+        if directory is None:  # daemon default, cleaned up as /tmp/dump-process-*
+            dirs = glob.glob("/tmp/dump-process-*")
+            directory = max(dirs, key=os.path.getmtime) if dirs else None
+        elif "://" in directory:
+            directory = None
+        self.dumps[job] = (directory, compression, streams)
+        return output
+
+    def artifacts(self, job: str) -> dict:
+        directory, compression, streams = self.dumps.get(job, (None, None, 0))
+        if directory is None or not os.path.isdir(directory):
+            return {}
+        sizes = dump_sizes(directory, streams)
+        if compression == "none":
+            sizes["raw_bytes"] = sizes["stored_bytes"]
+        return sizes
+
+    def dump_location(self, job: str) -> str | None:
+        return self.dumps.get(job, (None,))[0]
+
+    async def restore(self, job: str) -> str:
+        return await run_cmd(self.binary, "restore", "job", job, timeout=self.timeout)
+
+    async def cleanup(self, job: str) -> None:
+        await run_cmd(self.binary, "job", "kill", job, check=False)
+        await asyncio.sleep(0.5)
+        await run_cmd(self.binary, "job", "delete", job, check=False)
+        self.dumps.pop(job, None)
+        for path in glob.glob("/tmp/dump-process-*"):
+            shutil.rmtree(path, ignore_errors=True)
+
+    async def reap(self, job: str, directory: str | None) -> None:
+        # The daemon knows its jobs by name; dumps to a --dir stay, like cleanup.
+        await self.cleanup(job)
+
+
+class LocalBackend(Backend):
+    """In-process stand-in engine (local_checkpoint.py); no daemon or root needed.
+
+    Workloads are launched as children of the orchestrator so /proc/<pid>/mem
+    stays readable under the default Yama ptrace scope.
+    """
+
+    name = "local"
+
+    def __init__(self, dump_root: str = "/tmp"):
+        self.dump_root = dump_root
+        self.procs: dict[str, asyncio.subprocess.Process] = {}
+        self.dirs: dict[str, str] = {}
+        self.manifests: dict[str, dict] = {}
+
+    def monitored(self, job: str) -> dict[str, str | int]:
+        # The engine runs on threads inside the orchestrator process, so its
+        # numbers include the sampler thread itself.
+        return {"checkpointer": os.getpid()}
+
+    def artifacts(self, job: str) -> dict:
+        manifest = self.manifests.get(job)
+        if manifest is None:
+            return {}
+        sizes = local_checkpoint.object_sizes(self.dirs[job])
+        return {
+            "raw_bytes": manifest["raw_bytes"],
+            "stored_bytes": sum(sizes.values()),
+            "stream_bytes": [sizes[name] for name in manifest["files"]],
+        }
+
+    async def checkpointer_pids(self) -> list[int]:
+        # Workloads launched afterwards land in the group too; they do no
+        # dump I/O of their own.
+        return [os.getpid()]
+
+    def dump_location(self, job: str) -> str | None:
+        directory = self.dirs.get(job)
+        return None if local_checkpoint.is_s3(directory) else directory
+
+    async def launch(self, job: str, workload: dict) -> str:
+        proc = await asyncio.create_subprocess_exec(
+            *workload["cmd"],
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            env={**os.environ, JOB_ENV: job},
+        )
+        self.procs[job] = proc
+        await asyncio.sleep(workload.get("warmup", 2))
+        if proc.returncode is not None:
+            raise CommandError(f"Failed to start job {job} (exit {proc.returncode})")
+        return f"Running local process PID {proc.pid}"
+
+    async def dump(
+        self, job: str, compression: str, streams: int, directory: str | None
+    ) -> str:
+        directory = directory or f"{self.dump_root}/dump-process-{job}"
+        self.dirs[job] = directory
+        self.manifests.pop(job, None)
+        try:
+            manifest = await asyncio.to_thread(
+                local_checkpoint.dump,
+                self.procs[job].pid,
+                directory,
+                compression,
+                streams,
+            )
+        except (OSError, RuntimeError) as e:
+            raise CommandError(f"Local dump of {job} failed: {e}")
+        self.manifests[job] = manifest
+        return f"dumped {manifest['raw_bytes']} bytes"
+
+    async def restore(self, job: str) -> str:
+        try:
+            manifest = await asyncio.to_thread(local_checkpoint.restore, self.dirs[job])
+        except (OSError, RuntimeError) as e:
+            raise CommandError(f"Local restore of {job} failed: {e}")
+        return f"restored {manifest['raw_bytes']} bytes"
+
+    async def cleanup(self, job: str) -> None:
+        proc = self.procs.pop(job, None)
+        if proc is not None and proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        self.manifests.pop(job, None)
+        directory = self.dirs.pop(job, None)
+        if directory:
+            try:
+                await asyncio.to_thread(local_checkpoint.remove, directory)
+            except (OSError, RuntimeError):
+                pass  # a failed dump may have left nothing behind
+
+    async def reap(self, job: str, directory: str | None) -> None:
+        # Workloads outlive the orchestrator (stopped, if it died mid-dump);
+        # they carry their job name in the environment.
+        for pid in job_pids(job):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        try:
+            await asyncio.to_thread(
+                local_checkpoint.remove,
+                directory or f"{self.dump_root}/dump-process-{job}",
+            )
+        except (OSError, RuntimeError):
+            pass
+
+
+BACKENDS = {
+    CedanaBackend.name: CedanaBackend,
+    LocalBackend.name: LocalBackend,
+}
+
+
+def get_backend(name: str, **options) -> Backend:
+    """Instantiate a registered backend by name."""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown backend '{name}' (available: {', '.join(sorted(BACKENDS))})"
+        )
+    return cls(**options)
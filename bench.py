@@ -0,0 +1,1496 @@
+#!/usr/bin/env python3
+"""
+Cedana Benchmark Orchestrator
+Runs a checkpoint/restore sweep described by a JSON spec against a pluggable
+backend and writes timing CSVs in the schema plot_timings.py reads.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import os
+import random
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+
+import cgroups
+import local_checkpoint
+from backends import Backend, CommandError, get_backend
+from common import timestamp
+from compare_stats import median_ci
+from journal import Journal, case_key
+from sampler import SAMPLE_FIELDS, Sampler
+
+CSV_FIELDS = [
+    "compression",
+    "streams",
+    "checkpoint_time",
+    "restore_time",
+    "total_time",
+    "timestamp",
+    "run_number",
+]
+
+# Per-phase resource summaries from sampler.Sampler, appended to each row.
+SAMPLE_SUMMARY = {
+    "checkpoint": [
+        "peak_rss_mb",
+        "role_peak_rss_mb",
+        "cpu_pct",
+        "io_write_mb",
+        "disk_write_mb",
+        "net_tx_mb",
+    ],
+    "restore": [
+        "peak_rss_mb",
+        "role_peak_rss_mb",
+        "cpu_pct",
+        "io_read_mb",
+        "disk_read_mb",
+        "net_rx_mb",
+    ],
+}
+CSV_FIELDS += [
+    f"{phase}_{key}" for phase, keys in SAMPLE_SUMMARY.items() for key in keys
+]
+
+# Dump artifact sizes (Backend.artifacts) and the throughput derived from them.
+# stream_mb lists the per-stream file sizes joined with ";".
+ARTIFACT_FIELDS = [
+    "raw_mb",
+    "stored_mb",
+    "stream_mb",
+    "compression_ratio",
+    "checkpoint_mbps",
+    "restore_mbps",
+    "per_stream_mbps",
+]
+CSV_FIELDS += ARTIFACT_FIELDS
+# Stored MB/s of the dump relative to storage_bench.py's aggregate write
+# throughput for the same number of parallel writers.
+CSV_FIELDS += ["storage_ceiling_mbps", "ceiling_fraction"]
+# Storage speed tier (a key of the spec's io_limits) and the seconds it took
+# to write the dump back and drop it from the page cache before restore.
+CSV_FIELDS += ["io_limit", "flush_time"]
+# memory.max of the dump/restore cgroup, whether the checkpointer stayed
+# within it (ok/throttled/killed) and its cgroup's peak and memory.events.
+MEMORY_FIELDS = ["memory_peak_mb"] + [f"memory_{e}" for e in cgroups.MEMORY_EVENTS]
+CSV_FIELDS += ["mem_limit_mb", "memory_status"]
+CSV_FIELDS += [
+    f"{phase}_{key}" for phase in ("checkpoint", "restore") for key in MEMORY_FIELDS
+]
+# Jobs checkpointed/restored at once and this job's index among them.
+CSV_FIELDS += ["concurrency", "job_index"]
+# Memory the workload was asked to allocate (--size-gb), if sizes were swept.
+CSV_FIELDS += ["size_gb"]
+# Page cache state restore started from (warm/cold) and how the dump was
+# dropped from it (fadvise of the dump files and/or a global drop_caches).
+CSV_FIELDS += ["cache", "cache_drop"]
+# Run hygiene settings of the sweep (SweepSpec.settings()).
+SETTINGS_FIELDS = [
+    "order",
+    "seed",
+    "warmup_runs",
+    "workload_cpus",
+    "checkpointer_cpus",
+]
+CSV_FIELDS += SETTINGS_FIELDS
+# The session's no-op CLI round trip (Backend.noop) and the phase times less
+# it, which leaves the engine's own work: client startup, the daemon
+# connection and output printing are in every timed command.
+NET_FIELDS = ["checkpoint_net_time", "restore_net_time", "total_net_time"]
+CSV_FIELDS += ["cli_baseline", *NET_FIELDS]
+
+# One row per concurrent batch in <storage>_<workload>_batches.csv: makespans,
+# per-job latency percentiles and aggregate GB/s of raw image moved.
+BATCH_FIELDS = [
+    "compression",
+    "streams",
+    "concurrency",
+    "run_number",
+    "timestamp",
+    "io_limit",
+    "mem_limit_mb",
+    "size_gb",
+    "cache",
+    "jobs_completed",
+    "checkpoint_makespan",
+    "restore_makespan",
+    "total_makespan",
+    *[
+        f"{phase}_{stat}"
+        for phase in ("checkpoint", "restore")
+        for stat in ("p50", "p90", "max")
+    ],
+    "raw_gb",
+    "checkpoint_gbps",
+    "restore_gbps",
+]
+MB = 1024**2
+# Share of MemAvailable the workloads of a sized sweep may take together.
+HOST_MEMORY_SHARE = 0.8
+# Orders the cells of a round can run in (SweepSpec.order).
+ORDERS = ["nested", "shuffled"]
+# Spec options bench.py --resume lets differ from the journaled sweep's.
+RESUME_OPTIONS = {"retries", "pause", "output_dir", "baseline_rounds"}
+
+# Shell snippets mirroring capture_system_info in run_benchmarks.sh.
+SYSTEM_INFO_SECTIONS = [
+    ("CPU", "lscpu | grep -E '(Model name|CPU\\(s\\)|Thread|Core|Socket|MHz)'"),
+    ("Memory", "free -h"),
+    ("Storage", "df -h . && lsblk"),
+    ("OS", "grep -E '(NAME|VERSION)' /etc/os-release || uname -a"),
+    ("Kernel", "uname -r"),
+    ("CRIU", "criu --version | head -1"),
+    ("Cedana", "cedana --version"),
+    ("System Load", "uptime"),
+    ("Power Settings", "cpupower frequency-info | grep -E '(governor|min|max)'"),
+]
+
+
+# What distinguishes one configuration from another; runs repeat a cell.
+CELL_FIELDS = [
+    "workload",
+    "storage",
+    "compression",
+    "streams",
+    "io_limit",
+    "mem_limit_mb",
+    "concurrency",
+    "size_gb",
+    "cache",
+]
+
+
+@dataclass
+class Case:
+    """One checkpoint/restore measurement."""
+
+    workload: str
+    storage: str
+    compression: str
+    streams: int
+    run: int
+    io_limit: str = ""
+    mem_limit_mb: int | None = None
+    concurrency: int = 1
+    size_gb: float | None = None
+    cache: str = ""
+
+    @property
+    def cell(self) -> tuple:
+        return tuple(getattr(self, key) for key in CELL_FIELDS)
+
+    @classmethod
+    def from_cell(cls, cell: tuple, run: int) -> "Case":
+        return cls(**dict(zip(CELL_FIELDS, cell)), run=run)
+
+    def job_name(self, base: str) -> str:
+        name = f"{base}-{self.workload}-{self.storage}-{self.compression}-{self.streams}-run{self.run}"
+        if self.io_limit:
+            name += f"-{self.io_limit}"
+        if self.mem_limit_mb:
+            name += f"-{self.mem_limit_mb}MB"
+        if self.concurrency > 1:
+            name += f"-x{self.concurrency}"
+        if self.size_gb is not None:
+            name += f"-{self.size_gb:g}GB"
+        if self.cache:
+            name += f"-{self.cache}"
+        return name
+
+    @property
+    def warmup(self) -> bool:
+        """Warmup runs are numbered from 0 down and not recorded."""
+        return self.run < 1
+
+
+@dataclass
+class Adaptive:
+    """Adaptive sampling: repeat a cell until the CI of its median is tight.
+
+    `ci_width` is the target width of the bootstrap CI relative to the median
+    (0.05 = +-2.5%), checked for both checkpoint and restore time.
+    """
+
+    ci_width: float = 0.05
+    confidence: float = 0.95
+    min_runs: int = 2
+    max_runs: int = 10
+    budget: int | None = None
+
+
+@dataclass
+class SweepSpec:
+    """Sweep description loaded from a JSON file (see sweeps/default.json)."""
+
+    workloads: dict
+    storage: dict
+    compressions: list = field(
+        default_factory=lambda: ["none", "tar", "gzip", "lz4", "zlib"]
+    )
+    streams: list = field(default_factory=lambda: [0, 2, 4, 8])
+    runs: int = 1
+    backend: str = "cedana"
+    backend_options: dict = field(default_factory=dict)
+    output_dir: str = "results/sweep"
+    pause: float = 1.0
+    sample_interval: float = 0.02
+    adaptive: Adaptive | None = None
+    storage_bench_mb: int = 0  # >0: measure each local target's ceiling first
+    # Local S3 stand-in for s3:// targets: s3_server.py link profile/options,
+    # plus optional host, port and root.
+    s3_server: dict | None = None
+    # Storage speed tiers: name -> {rbps_mb, wbps_mb, riops, wiops} applied as
+    # cgroup io.max on the dump targets' devices ({} = unlimited). Devices are
+    # found from the local targets unless listed as "MAJ:MIN" in io_devices.
+    io_limits: dict | None = None
+    io_devices: list | None = None
+    # Memory budgets in MB, set as memory.max of the dump/restore cgroup
+    # (null = no limit).
+    mem_limits_mb: list | None = None
+    # Jobs checkpointed and restored at once, e.g. [1, 2, 4, 8, 16]; each
+    # gets a row and each batch a summary in *_batches.csv.
+    concurrency: list | None = None
+    # Workload sizes in GiB, passed as the workloads' size_arg (--size-gb).
+    sizes_gb: list | None = None
+    # Times a failed case is run again before the sweep moves on.
+    retries: int = 2
+    # "nested" runs the compression x streams cells of a round in
+    # run_benchmarks.sh's order, "shuffled" in an order drawn from `seed`.
+    order: str = "nested"
+    seed: int = 0
+    # Unrecorded runs before the first of each workload/storage/conditions.
+    warmup_runs: int = 0
+    # Page cache state of restore: "warm", "cold" or both as a dimension
+    # (null = warm, or cold under io_limits).
+    caches: list | None = None
+    # CPU lists (taskset syntax, e.g. "0-3") to pin "workload" and
+    # "checkpointer" to.
+    cpus: dict | None = None
+    # No-op engine calls timed at the start of the sweep for the CLI
+    # baseline (0 = no baseline, no net times).
+    baseline_rounds: int = 20
+
+    def __post_init__(self):
+        if isinstance(self.adaptive, dict):
+            self.adaptive = Adaptive(**self.adaptive)
+        if self.order not in ORDERS:
+            raise ValueError(f"order must be one of {', '.join(ORDERS)}")
+        unknown = set(self.caches or []) - {"warm", "cold"}
+        if unknown:
+            raise ValueError(f"Unknown cache state(s): {', '.join(sorted(unknown))}")
+        if self.io_limits and "warm" in (self.caches or []):
+            raise ValueError("io_limits always restore cold; caches can't be warm")
+        unknown = set(self.cpus or {}) - {"workload", "checkpointer"}
+        if unknown:
+            raise ValueError(f"Unknown cpus role(s): {', '.join(sorted(unknown))}")
+        if self.sizes_gb:
+            fixed = [name for name, w in self.workloads.items() if w.get("gpu")]
+            if fixed:
+                raise ValueError(
+                    f"sizes_gb needs resizable CPU workloads, not {', '.join(fixed)}"
+                )
+
+    @classmethod
+    def from_file(cls, path: Path) -> "SweepSpec":
+        with open(path) as f:
+            return cls(**json.load(f))
+
+    def cases(self):
+        """Yield cases per set of conditions, workload and storage target:
+        the warmup runs, then every run's round of cells in `order`."""
+        for conditions, workload, storage in product(
+            self.conditions(), self.workloads, self.storage
+        ):
+            yield from self.warmups(conditions, workload, storage)
+            for run in range(1, self.runs + 1):
+                for compression, streams in self.ordered(
+                    list(product(self.compressions, self.streams)),
+                    conditions,
+                    workload,
+                    storage,
+                    run,
+                ):
+                    yield Case(
+                        workload, storage, compression, streams, run, *conditions
+                    )
+
+    def warmups(self, conditions: tuple, workload: str, storage: str):
+        """Warmup cases of a block, cycling through its configurations."""
+        configs = self.ordered(
+            list(product(self.compressions, self.streams)),
+            conditions,
+            workload,
+            storage,
+            "warmup",
+        )
+        for i in range(self.warmup_runs):
+            compression, streams = configs[i % len(configs)]
+            yield Case(workload, storage, compression, streams, -i, *conditions)
+
+    def ordered(self, items: list, *round_key) -> list:
+        """`items` in the sweep's order for one round.
+
+        Shuffles are seeded by `seed` and the round, so a resumed sweep draws
+        the same order.
+        """
+        if self.order == "nested":
+            return items
+        shuffled = list(items)
+        random.Random(json.dumps([self.seed, *round_key])).shuffle(shuffled)
+        return shuffled
+
+    def cells(self) -> list[tuple]:
+        return [
+            (workload, storage, compression, streams, *conditions)
+            for conditions in self.conditions()
+            for workload in self.workloads
+            for storage in self.storage
+            for compression in self.compressions
+            for streams in self.streams
+        ]
+
+    def conditions(self) -> list[tuple]:
+        """Every (io_limit, mem_limit_mb, concurrency, size_gb, cache) the sweep
+        runs under."""
+        return list(
+            product(
+                self.io_limits or [""],
+                self.mem_limits_mb or [None],
+                self.concurrency or [1],
+                self.sizes_gb or [None],
+                self.caches or [""],
+            )
+        )
+
+    @property
+    def limited(self) -> bool:
+        return bool(self.io_limits or self.mem_limits_mb)
+
+    @property
+    def max_runs(self) -> int:
+        return self.adaptive.max_runs if self.adaptive else self.runs
+
+    @property
+    def warmup_cases(self) -> int:
+        blocks = len(self.conditions()) * len(self.workloads) * len(self.storage)
+        return blocks * self.warmup_runs
+
+    @property
+    def planned(self) -> int:
+        """Upper bound on the number of cases the sweep will run."""
+        total = len(self.cells()) * self.max_runs
+        if self.adaptive and self.adaptive.budget:
+            total = min(total, self.adaptive.budget)
+        return total + self.warmup_cases
+
+    def run_label(self, case: Case) -> str:
+        """Run number for progress and logs; span_timings.py skips warmups."""
+        if case.warmup:
+            return f"warmup {1 - case.run}/{self.warmup_runs}"
+        return f"run {case.run}/{self.max_runs}"
+
+    def settings(self) -> dict:
+        """The sweep's hygiene settings, as recorded in every row."""
+        cpus = self.cpus or {}
+        return {
+            "order": self.order,
+            "seed": self.seed if self.order == "shuffled" else "",
+            "warmup_runs": self.warmup_runs,
+            "workload_cpus": cpus.get("workload", ""),
+            "checkpointer_cpus": cpus.get("checkpointer", ""),
+        }
+
+    def workload(self, case: Case) -> dict:
+        """The workload entry of a case, with its size appended to the command
+        and run under taskset if the workload is pinned.
+
+        Allocating takes longer the larger the workload, so `warmup_per_gb`
+        seconds per GiB are added to its warmup.
+        """
+        workload = self.workloads[case.workload]
+        if case.size_gb is not None:
+            workload = {
+                **workload,
+                "cmd": [
+                    *workload["cmd"],
+                    workload.get("size_arg", "--size-gb"),
+                    f"{case.size_gb:g}",
+                ],
+                "warmup": workload.get("warmup", 2)
+                + workload.get("warmup_per_gb", 0) * case.size_gb,
+            }
+        if cpus := (self.cpus or {}).get("workload"):
+            workload = {**workload, "cmd": ["taskset", "-c", cpus, *workload["cmd"]]}
+        return workload
+
+    def jobs(self, case: Case, base: str) -> list[str]:
+        """Engine job names of a case; concurrent sweeps number their copies."""
+        name = case.job_name(base)
+        if self.concurrency:
+            return [f"{name}-j{i}" for i in range(case.concurrency)]
+        return [name]
+
+    def storage_dir(self, storage: str, job: str) -> str | None:
+        """Resolve the --dir argument for a storage target ({job} is substituted)."""
+        template = self.storage[storage]
+        return template.format(job=job) if template else None
+
+
+class ResultWriter:
+    """Appends rows to one CSV per (storage, workload), e.g. local_stress_py.csv.
+
+    Engine output goes to a matching .log file in the same marker format as
+    run_benchmarks.sh logs, so span_timings.py can parse both.
+    """
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = output_dir
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, case: Case) -> Path:
+        return self.output_dir / f"{case.storage}_{case.workload}.csv"
+
+    def write(self, case: Case, row: dict) -> None:
+        path = self.path(case)
+        new = not path.exists()
+        with open(path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            if new:
+                writer.writeheader()
+            writer.writerow(row)
+
+    def samples(self, case: Case, rows: list[dict]) -> None:
+        """Append resource samples to <storage>_<workload>_samples.csv."""
+        path = self.output_dir / f"{case.storage}_{case.workload}_samples.csv"
+        new = not path.exists()
+        with open(path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+            if new:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    def batch(self, case: Case, row: dict) -> None:
+        """Append a concurrent batch summary to <storage>_<workload>_batches.csv."""
+        path = self.output_dir / f"{case.storage}_{case.workload}_batches.csv"
+        new = not path.exists()
+        with open(path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=BATCH_FIELDS)
+            if new:
+                writer.writeheader()
+            writer.writerow(row)
+
+    def log(self, case: Case, *lines: str) -> None:
+        with open(self.path(case).with_suffix(".log"), "a") as f:
+            for line in lines:
+                f.write(line.rstrip("\n") + "\n")
+
+
+def capture_system_info(path: Path) -> None:
+    """Write a system_info.txt equivalent to the one run_benchmarks.sh produces."""
+    lines = ["=== System Information ===", f"Timestamp: {timestamp()}", ""]
+    for title, cmd in SYSTEM_INFO_SECTIONS:
+        result = subprocess.run(
+            cmd, shell=True, capture_output=True, text=True, check=False
+        )
+        lines += [f"{title}:", result.stdout.rstrip() or "Not available", ""]
+    path.write_text("\n".join(lines))
+
+
+def elapsed(start_ns: int) -> float:
+    """Seconds since a time.monotonic_ns() reading."""
+    return (time.monotonic_ns() - start_ns) / 1e9
+
+
+def fmt_seconds(seconds: float) -> str:
+    """Times in the CSVs, to 0.1 ms."""
+    return f"{seconds:.4f}"
+
+
+def sample(backend: Backend, spec: SweepSpec, job: str, phase: str):
+    """Resource sampler for one phase, or a no-op if sampling is disabled."""
+    if not spec.sample_interval:
+        return contextlib.nullcontext()
+    return Sampler(backend.monitored(job), spec.sample_interval, job, phase)
+
+
+def sample_summary(samplers: dict) -> dict:
+    """Flatten per-phase sampler summaries into the CSV summary columns."""
+    row = {}
+    for phase, keys in SAMPLE_SUMMARY.items():
+        summary = samplers[phase].summary() if samplers.get(phase) else {}
+        row.update({f"{phase}_{key}": summary.get(key, "") for key in keys})
+    return row
+
+
+class Killed(CommandError):
+    """A run the OOM killer ended. It is recorded and not retried, since the
+    same budget would kill it again."""
+
+
+def memory_columns(case: Case, memory: dict) -> dict:
+    """Memory limit, status and per-phase cgroup memory columns for one run.
+
+    A run is `killed` if the OOM killer fired in either phase and `throttled`
+    if it hit memory.high or memory.max, which means reclaim slowed it down.
+    """
+    row = {
+        f"{phase}_{key}": memory.get(phase, {}).get(key, "")
+        for phase in ("checkpoint", "restore")
+        for key in MEMORY_FIELDS
+    }
+    events = [stats for stats in memory.values() if stats]
+    if not events:
+        status = ""
+    elif any(stats["memory_oom_kill"] for stats in events):
+        status = "killed"
+    elif any(stats["memory_high"] or stats["memory_max"] for stats in events):
+        status = "throttled"
+    else:
+        status = "ok"
+    return {
+        "mem_limit_mb": case.mem_limit_mb or "",
+        "memory_status": status,
+        **row,
+    }
+
+
+def artifact_columns(
+    artifacts: dict, checkpoint_time: float, restore_time: float
+) -> dict:
+    """Sizes in MB, compression ratio and MB/s columns for one run.
+
+    Throughput is measured on the raw image, so codecs compare on the work
+    they save the application; per-stream MB/s is what each stream wrote.
+    """
+    row = dict.fromkeys(ARTIFACT_FIELDS, "")
+    raw = artifacts.get("raw_bytes")
+    stored = artifacts.get("stored_bytes")
+    streams = artifacts.get("stream_bytes") or []
+
+    if raw is not None:
+        row["raw_mb"] = f"{raw / MB:.1f}"
+        if checkpoint_time > 0:
+            row["checkpoint_mbps"] = f"{raw / MB / checkpoint_time:.1f}"
+        if restore_time > 0:
+            row["restore_mbps"] = f"{raw / MB / restore_time:.1f}"
+    if stored is not None:
+        row["stored_mb"] = f"{stored / MB:.1f}"
+        if raw is not None and stored > 0:
+            row["compression_ratio"] = f"{raw / stored:.3f}"
+    if streams:
+        row["stream_mb"] = ";".join(f"{size / MB:.1f}" for size in streams)
+        if checkpoint_time > 0:
+            mean = sum(streams) / len(streams)
+            row["per_stream_mbps"] = f"{mean / MB / checkpoint_time:.1f}"
+    return row
+
+
+async def settle_cache(
+    spec: SweepSpec, case: Case, backend: Backend, jobs: list[str]
+) -> dict:
+    """Put the page cache in the case's state for restore; return the cache
+    columns of the run.
+
+    Cold restores write the jobs' local dumps back and drop them from the
+    page cache, then drop the whole page cache if allowed (root). Under
+    io_limits only the dumps are dropped, so restore reads the throttled
+    device. Without a dump to drop or the rights to drop_caches, the restore
+    is recorded as warm.
+    """
+    import storage_bench
+
+    if not (case.cache == "cold" or spec.io_limits):
+        return {"cache": "warm", "cache_drop": "", "flush_time": ""}
+    start = time.monotonic_ns()
+    methods = []
+    locations = [location for job in jobs if (location := backend.dump_location(job))]
+    for location in locations:
+        await asyncio.to_thread(storage_bench.evict, location)
+    if locations:
+        methods.append("fadvise")
+    if case.cache == "cold" and await asyncio.to_thread(storage_bench.drop_caches):
+        methods.append("drop_caches")
+    return {
+        "cache": "cold" if methods else "warm",
+        "cache_drop": "+".join(methods),
+        "flush_time": fmt_seconds(elapsed(start)),
+    }
+
+
+async def run_case(
+    backend: Backend,
+    spec: SweepSpec,
+    case: Case,
+    job_base: str,
+    writer: ResultWriter,
+    limiter: "Limiter | None" = None,
+) -> dict:
+    """Launch, checkpoint, restore and clean up one job; return its CSV row.
+
+    With a limiter, dump and restore run in cgroups with the case's limits.
+    Runs that fail after an OOM kill are still written, with no times.
+    """
+    job = case.job_name(job_base)
+    writer.log(
+        case,
+        f"Testing: {case.compression} compression with {case.streams} streams "
+        f"({spec.run_label(case)})",
+        f"  Starting job: {job}",
+    )
+    samplers: dict[str, Sampler | None] = {}
+    memory: dict[str, dict] = {}
+    try:
+        output = await backend.launch(job, spec.workload(case))
+        writer.log(case, output)
+
+        writer.log(case, "STARTING CHECKPOINT")
+        with (
+            limited(limiter, case, job, "checkpoint") as memory["checkpoint"],
+            sample(backend, spec, job, "checkpoint") as samplers["checkpoint"],
+        ):
+            start = time.monotonic_ns()
+            output = await backend.dump(
+                job, case.compression, case.streams, spec.storage_dir(case.storage, job)
+            )
+            checkpoint_time = elapsed(start)
+        writer.log(case, output, "FINISHED CHECKPOINT")
+        artifacts = backend.artifacts(job)
+        cache = await settle_cache(spec, case, backend, [job])
+
+        writer.log(case, "STARTING RESTORE")
+        with (
+            limited(limiter, case, job, "restore") as memory["restore"],
+            sample(backend, spec, job, "restore") as samplers["restore"],
+        ):
+            start = time.monotonic_ns()
+            output = await backend.restore(job)
+            restore_time = elapsed(start)
+        writer.log(case, output, "FINISHED RESTORE")
+    except CommandError as e:
+        writer.log(case, f"ERROR: {e}")
+        columns = memory_columns(case, memory)
+        if columns["memory_status"] == "killed":
+            if not case.warmup:
+                writer.write(
+                    case,
+                    {
+                        "compression": case.compression,
+                        "streams": case.streams,
+                        "timestamp": timestamp(),
+                        "run_number": case.run,
+                        "io_limit": case.io_limit,
+                        "size_gb": case.size_gb,
+                        **columns,
+                        **spec.settings(),
+                    },
+                )
+            raise Killed(str(e)) from e
+        raise
+    finally:
+        await backend.cleanup(job)
+        for sampler in samplers.values():
+            if sampler is not None and not case.warmup:
+                writer.samples(case, sampler.rows)
+
+    return {
+        "compression": case.compression,
+        "streams": case.streams,
+        "checkpoint_time": fmt_seconds(checkpoint_time),
+        "restore_time": fmt_seconds(restore_time),
+        "total_time": fmt_seconds(checkpoint_time + restore_time),
+        "timestamp": timestamp(),
+        "run_number": case.run,
+        **sample_summary(samplers),
+        **artifact_columns(artifacts, checkpoint_time, restore_time),
+        "io_limit": case.io_limit,
+        **memory_columns(case, memory),
+        "size_gb": case.size_gb,
+        **cache,
+    }
+
+
+async def _timed(times: dict, job: str, operation) -> str:
+    start = time.monotonic_ns()
+    output = await operation
+    times[job] = elapsed(start)
+    return output
+
+
+async def _phase(
+    case: Case, writer: ResultWriter, name: str, jobs: list[str], operation, times
+) -> tuple[list[str], float]:
+    """Run `operation(job)` for every job at once; return the jobs that
+    succeeded and the makespan."""
+    writer.log(case, f"STARTING {name}")
+    start = time.monotonic_ns()
+    results = await asyncio.gather(
+        *(_timed(times, job, operation(job)) for job in jobs), return_exceptions=True
+    )
+    makespan = elapsed(start)
+    done = []
+    for job, result in zip(jobs, results):
+        if isinstance(result, CommandError):
+            writer.log(case, f"ERROR: {job}: {result}")
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            writer.log(case, result)
+            done.append(job)
+    writer.log(case, f"FINISHED {name}")
+    return done, makespan
+
+
+async def run_batch(
+    backend: Backend,
+    spec: SweepSpec,
+    case: Case,
+    job_base: str,
+    writer: ResultWriter,
+    limiter: "Limiter | None" = None,
+) -> tuple[list[dict], dict]:
+    """Checkpoint and restore `case.concurrency` copies of a workload at once.
+
+    All jobs are launched first, then dumped together and restored together,
+    each job timed on its own. Returns a row per job that completed and the
+    batch summary. Jobs that fail are logged; the batch fails only if none
+    completes. A batch that fails after an OOM kill is still written, a row
+    per job with no times, and raises Killed so it isn't retried.
+    """
+    base = case.job_name(job_base)
+    jobs = spec.jobs(case, job_base)
+    writer.log(
+        case,
+        f"Testing: {case.compression} compression with {case.streams} streams, "
+        f"{case.concurrency} concurrent jobs ({spec.run_label(case)})",
+        *(f"  Starting job: {job}" for job in jobs),
+    )
+    samplers: dict[str, Sampler | None] = {}
+    memory: dict[str, dict] = {}
+    checkpoint: dict[str, float] = {}
+    restore: dict[str, float] = {}
+    try:
+        outputs = await asyncio.gather(
+            *(backend.launch(job, spec.workload(case)) for job in jobs)
+        )
+        writer.log(case, *outputs)
+
+        with (
+            limited(limiter, case, base, "checkpoint") as memory["checkpoint"],
+            sample(backend, spec, jobs[0], "checkpoint") as samplers["checkpoint"],
+        ):
+            dumped, checkpoint_makespan = await _phase(
+                case,
+                writer,
+                "CHECKPOINT",
+                jobs,
+                lambda job: backend.dump(
+                    job,
+                    case.compression,
+                    case.streams,
+                    spec.storage_dir(case.storage, job),
+                ),
+                checkpoint,
+            )
+        artifacts = {job: backend.artifacts(job) for job in dumped}
+        cache = await settle_cache(spec, case, backend, dumped)
+
+        with (
+            limited(limiter, case, base, "restore") as memory["restore"],
+            sample(backend, spec, jobs[0], "restore") as samplers["restore"],
+        ):
+            restored, restore_makespan = await _phase(
+                case, writer, "RESTORE", dumped, backend.restore, restore
+            )
+        if not restored:
+            raise CommandError(f"All {case.concurrency} jobs of {base} failed")
+    except CommandError as e:
+        writer.log(case, f"ERROR: {e}")
+        columns = memory_columns(case, memory)
+        if columns["memory_status"] == "killed":
+            if not case.warmup:
+                stamp = timestamp()
+                for index in range(len(jobs)):
+                    writer.write(
+                        case,
+                        {
+                            "compression": case.compression,
+                            "streams": case.streams,
+                            "timestamp": stamp,
+                            "run_number": case.run,
+                            "io_limit": case.io_limit,
+                            "concurrency": case.concurrency,
+                            "size_gb": case.size_gb,
+                            "job_index": index,
+                            **columns,
+                            **spec.settings(),
+                        },
+                    )
+            raise Killed(str(e)) from e
+        raise
+    finally:
+        await asyncio.gather(*(backend.cleanup(job) for job in jobs))
+        for sampler in samplers.values():
+            if sampler is not None and not case.warmup:
+                writer.samples(case, sampler.rows)
+
+    stamp = timestamp()
+    conditions = {
+        "compression": case.compression,
+        "streams": case.streams,
+        "timestamp": stamp,
+        "run_number": case.run,
+        "io_limit": case.io_limit,
+        "concurrency": case.concurrency,
+        "size_gb": case.size_gb,
+    }
+    rows = [
+        {
+            **conditions,
+            "job_index": jobs.index(job),
+            "checkpoint_time": fmt_seconds(checkpoint[job]),
+            "restore_time": fmt_seconds(restore[job]),
+            "total_time": fmt_seconds(checkpoint[job] + restore[job]),
+            **sample_summary(samplers),
+            **artifact_columns(artifacts[job], checkpoint[job], restore[job]),
+            **memory_columns(case, memory),
+            **cache,
+        }
+        for job in restored
+    ]
+
+    raw = [artifacts[job].get("raw_bytes") for job in restored]
+    raw_gb = sum(raw) / 1024**3 if None not in raw else None
+    summary = {
+        **conditions,
+        "mem_limit_mb": case.mem_limit_mb or "",
+        "cache": cache["cache"],
+        "jobs_completed": len(restored),
+        "checkpoint_makespan": fmt_seconds(checkpoint_makespan),
+        "restore_makespan": fmt_seconds(restore_makespan),
+        "total_makespan": fmt_seconds(checkpoint_makespan + restore_makespan),
+        "raw_gb": "" if raw_gb is None else f"{raw_gb:.3f}",
+        "checkpoint_gbps": (
+            "" if raw_gb is None else f"{raw_gb / checkpoint_makespan:.3f}"
+        ),
+        "restore_gbps": "" if raw_gb is None else f"{raw_gb / restore_makespan:.3f}",
+    }
+    for phase, times in (("checkpoint", checkpoint), ("restore", restore)):
+        values = [times[job] for job in restored]
+        p50, p90 = np.percentile(values, [50, 90])
+        summary.update(
+            {
+                f"{phase}_p50": fmt_seconds(p50),
+                f"{phase}_p90": fmt_seconds(p90),
+                f"{phase}_max": fmt_seconds(max(values)),
+            }
+        )
+    return rows, summary
+
+
+def relative_ci_width(samples: list[tuple[float, float]], confidence: float) -> float:
+    """Widest bootstrap CI of the median, relative to the median, over metrics."""
+    values = np.array(samples).T  # (metrics, runs)
+    low, high = median_ci(values, alpha=1 - confidence)
+    return float(np.max((high - low) / np.median(values, axis=1)))
+
+
+def adaptive_cases(spec: SweepSpec, samples: dict[tuple, list]):
+    """Yield cases until every cell's CI is tight enough or its budget is spent.
+
+    After the warmup runs, every cell gets `min_runs` runs, a round at a time
+    in the sweep's order; after that the cell with the widest relative CI is
+    always sampled next, so noisy cells get the budget first. `samples` is
+    filled in by the caller after each case.
+    """
+    adaptive = spec.adaptive
+    attempts = {cell: 0 for cell in spec.cells()}
+    budget = adaptive.budget or spec.planned - spec.warmup_cases
+
+    def case(cell: tuple) -> Case:
+        attempts[cell] += 1
+        return Case.from_cell(cell, attempts[cell])
+
+    for conditions, workload, storage in product(
+        spec.conditions(), spec.workloads, spec.storage
+    ):
+        yield from spec.warmups(conditions, workload, storage)
+    for run in range(1, adaptive.min_runs + 1):
+        for cell in spec.ordered(list(attempts), run):
+            if sum(attempts.values()) >= budget:
+                return
+            yield case(cell)
+
+    while sum(attempts.values()) < budget:
+        widths = {
+            cell: (
+                relative_ci_width(samples[cell], adaptive.confidence)
+                if len(samples.get(cell, [])) >= 2
+                else float("inf")
+            )
+            for cell, n in attempts.items()
+            if n < adaptive.max_runs
+        }
+        open_cells = {c: w for c, w in widths.items() if w > adaptive.ci_width}
+        if not open_cells:
+            return
+        yield case(max(open_cells, key=open_cells.get))
+
+
+async def storage_ceilings(
+    spec: SweepSpec, output_dir: Path
+) -> dict[str, dict[int, float]]:
+    """Aggregate write MB/s per writer count for every local storage target.
+
+    Targets without a directory dump to /tmp, the backends' default; remote
+    targets (s3://, cedana://) are skipped.
+    """
+    import storage_bench
+
+    ceilings = {}
+    path = output_dir / "storage_bench.csv"
+    new_file = not path.exists()
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=storage_bench.FIELDS)
+        if new_file:
+            writer.writeheader()
+        for storage in spec.storage:
+            directory = spec.storage_dir(storage, "ceiling")
+            if directory and "://" in directory:
+                continue
+            target = Path(directory).parent if directory else Path("/tmp")
+            ceilings[storage] = {}
+            for writers in sorted({max(1, s) for s in spec.streams}):
+                rows = await asyncio.to_thread(
+                    storage_bench.measure,
+                    target,
+                    writers,
+                    spec.storage_bench_mb * MB,
+                    local_checkpoint.CHUNK_SIZE,
+                )
+                writer.writerows(rows)
+                ceilings[storage][writers] = float(rows[0]["aggregate_mbps"])
+                print(
+                    f"Storage ceiling of {storage} ({target}) with {writers} "
+                    f"writer(s): {rows[0]['aggregate_mbps']} MB/s"
+                )
+    return ceilings
+
+
+def net_columns(row: dict, baseline: float | None) -> dict:
+    """Phase times less the session's CLI round-trip baseline."""
+    if baseline is None:
+        return {"cli_baseline": "", **{field: "" for field in NET_FIELDS}}
+    checkpoint = float(row["checkpoint_time"]) - baseline
+    restore = float(row["restore_time"]) - baseline
+    return {
+        "cli_baseline": fmt_seconds(baseline),
+        "checkpoint_net_time": fmt_seconds(checkpoint),
+        "restore_net_time": fmt_seconds(restore),
+        "total_net_time": fmt_seconds(checkpoint + restore),
+    }
+
+
+async def cli_baseline(backend: Backend, rounds: int) -> float:
+    """Median seconds of the engine's no-op round trip (Backend.noop)."""
+    times = []
+    for _ in range(rounds):
+        start = time.monotonic_ns()
+        await backend.noop()
+        times.append(elapsed(start))
+    return float(np.median(times))
+
+
+def ceiling_columns(row: dict, ceiling: float | None) -> dict:
+    """Stored MB/s of the dump as a fraction of the measured ceiling."""
+    if not ceiling or not row.get("stored_mb") or not float(row["checkpoint_time"]):
+        return {"storage_ceiling_mbps": "", "ceiling_fraction": ""}
+    stored_mbps = float(row["stored_mb"]) / float(row["checkpoint_time"])
+    return {
+        "storage_ceiling_mbps": f"{ceiling:.1f}",
+        "ceiling_fraction": f"{stored_mbps / ceiling:.3f}",
+    }
+
+
+@contextlib.contextmanager
+def s3_standin(spec: SweepSpec, output_dir: Path):
+    """Serve the spec's S3 stand-in and point AWS_ENDPOINT_URL at it.
+
+    The link settings are saved to s3_link.json next to the results.
+    """
+    if spec.s3_server is None:
+        yield None
+        return
+    import s3_server
+
+    options = dict(spec.s3_server)
+    root = options.pop("root", None)
+    host = options.pop("host", "127.0.0.1")
+    port = options.pop("port", 0)
+    server = s3_server.S3Server(root, s3_server.link_from_options(options), host, port)
+    endpoint = server.start_thread()
+    previous = os.environ.get("AWS_ENDPOINT_URL")
+    os.environ["AWS_ENDPOINT_URL"] = endpoint
+    with open(output_dir / "s3_link.json", "w") as f:
+        json.dump({"endpoint": endpoint, **asdict(server.link)}, f, indent=2)
+    print(f"S3 stand-in at {endpoint}: {server.link}")
+    try:
+        yield server
+    finally:
+        if previous is None:
+            os.environ.pop("AWS_ENDPOINT_URL")
+        else:
+            os.environ["AWS_ENDPOINT_URL"] = previous
+        server.stop_thread()
+
+
+def io_devices(spec: SweepSpec) -> list[str]:
+    """Block devices behind the spec's local storage targets (MAJ:MIN)."""
+    if spec.io_devices:
+        return spec.io_devices
+    devices = []
+    for storage in spec.storage:
+        directory = spec.storage_dir(storage, "probe")
+        if directory and "://" in directory:
+            continue
+        target = Path(directory) if directory else Path("/tmp")
+        while not target.exists():  # job directories are created by the dump
+            target = target.parent
+        device = cgroups.block_device(target)
+        if device not in devices:
+            devices.append(device)
+    if not devices:
+        raise ValueError("io_limits need a local storage target or io_devices")
+    return devices
+
+
+class Limiter:
+    """Runs each dump and restore in a fresh cgroup with the case's limits."""
+
+    def __init__(self, subtree: cgroups.Subtree, pids: list[int], io_lines: dict):
+        self.subtree = subtree
+        self.pids = pids
+        self.io_lines = io_lines
+
+    def settings(self, case: Case) -> dict:
+        settings = {}
+        if case.io_limit:
+            settings["io.max"] = self.io_lines[case.io_limit]
+        if case.mem_limit_mb:
+            settings["memory.max"] = case.mem_limit_mb * MB
+        return settings
+
+    def phase(self, case: Case, job: str, phase: str):
+        """Context yielding a dict filled with the phase's memory stats."""
+        return self.subtree.limited(f"{job}-{phase}", self.pids, self.settings(case))
+
+
+def limited(limiter: Limiter | None, case: Case, job: str, phase: str):
+    """The phase's cgroup, or a no-op if the sweep sets no limits."""
+    if limiter is None:
+        return contextlib.nullcontext({})
+    return limiter.phase(case, job, phase)
+
+
+@contextlib.asynccontextmanager
+async def limits(spec: SweepSpec, backend: Backend, output_dir: Path):
+    """Yield a Limiter for the spec's io/memory limits, or None without any.
+
+    io tiers and their devices are saved to io_limits.json.
+    """
+    if not spec.limited:
+        yield None
+        return
+
+    io_lines = {}
+    if spec.io_limits:
+        devices = io_devices(spec)
+        io_lines = {
+            tier: [cgroups.io_max(device, limits) for device in devices]
+            for tier, limits in spec.io_limits.items()
+        }
+        with open(output_dir / "io_limits.json", "w") as f:
+            json.dump({"devices": devices, "tiers": spec.io_limits}, f, indent=2)
+        print(f"I/O limits on {', '.join(devices)}")
+    pids = await backend.checkpointer_pids()
+    if not pids:
+        raise CommandError(f"No {backend.name} checkpointer process to limit")
+
+    # The memory controller also charges buffered writeback to the cgroup.
+    with cgroups.Subtree(["io", "memory"] if spec.io_limits else ["memory"]) as tree:
+        yield Limiter(tree, pids, io_lines)
+
+
+def check_host_memory(spec: SweepSpec) -> None:
+    """Refuse workload sizes whose concurrent copies wouldn't fit in memory."""
+    with open("/proc/meminfo") as f:
+        meminfo = dict(line.split(":", 1) for line in f)
+    available_gb = int(meminfo["MemAvailable"].split()[0]) / 1024**2
+    jobs = max(spec.concurrency or [1])
+    too_large = [
+        size for size in spec.sizes_gb if size * jobs > available_gb * HOST_MEMORY_SHARE
+    ]
+    if too_large:
+        raise ValueError(
+            f"sizes_gb {', '.join(f'{size:g}' for size in too_large)} x {jobs} "
+            f"job(s) exceed {HOST_MEMORY_SHARE:.0%} of the "
+            f"{available_gb:.1f} GB available"
+        )
+
+
+async def reap_interrupted(backend: Backend, spec: SweepSpec, journal: Journal):
+    """Kill the jobs and remove the dumps of attempts the journaled sweep
+    never finished."""
+    for record in journal.interrupted():
+        case = Case(**record["case"])
+        print(f"Cleaning up after interrupted run: {', '.join(record['jobs'])}")
+        for job in record["jobs"]:
+            if "dirs" in record:
+                directory = record["dirs"][job]
+            elif case.storage in spec.storage:  # journaled before dirs were
+                directory = spec.storage_dir(case.storage, job)
+            else:
+                directory = None
+            await backend.reap(job, directory)
+
+
+async def open_journal(
+    spec: SweepSpec, backend: Backend, output_dir: Path, resume: bool
+) -> Journal:
+    """The output directory's journal, starting a new sweep unless `resume`.
+
+    Whatever a crashed sweep left running is reaped first, so a new sweep in
+    the same directory cleans up after it too. A resumed sweep must have the
+    spec it started with; only the options in RESUME_OPTIONS may change.
+    """
+    path = output_dir / "journal.jsonl"
+    if resume and not path.exists():
+        raise ValueError(f"No sweep to resume in {path}")
+    journal = Journal(path)
+    described = json.loads(json.dumps(asdict(spec)))
+    # Options added since the journal was written have their default there.
+    defaults = json.loads(json.dumps(asdict(SweepSpec(workloads={}, storage={}))))
+    try:
+        if resume and journal.spec is None:
+            raise ValueError(f"No sweep to resume in {journal.path}")
+        if resume:
+            changed = [
+                key
+                for key, value in described.items()
+                if key not in RESUME_OPTIONS
+                and journal.spec.get(key, defaults[key]) != value
+            ]
+            if changed:
+                raise ValueError(
+                    f"Can't resume: {', '.join(changed)} changed since the "
+                    "sweep started"
+                )
+        await reap_interrupted(backend, spec, journal)
+    except BaseException:
+        journal.close()
+        raise
+
+    if resume:
+        journal.record("resumed")
+    else:
+        job_base = f"test-job-{int(time.time())}"
+        journal.record("sweep", spec=described, job_base=job_base)
+    return journal
+
+
+def record_results(
+    spec: SweepSpec,
+    writer: ResultWriter,
+    case: Case,
+    rows: list[dict],
+    batch: dict | None,
+    ceiling: dict | None,
+    baseline: float | None = None,
+) -> tuple[float, float]:
+    """Write a completed case's rows, unless it was a warmup, and print them;
+    return the checkpoint and restore times adaptive sampling goes by."""
+    if not case.warmup:
+        for row in rows:
+            row.update(ceiling_columns(row, ceiling))
+            row.update(net_columns(row, baseline))
+            row.update(spec.settings())
+            writer.write(case, row)
+        if batch is not None:
+            writer.batch(case, batch)
+    suffix = " (warmup, not recorded)" if case.warmup else ""
+
+    if batch is not None:
+        gbps = batch["checkpoint_gbps"] or "?"
+        print(
+            f"  {batch['jobs_completed']}/{case.concurrency} jobs, "
+            f"makespan: checkpoint {batch['checkpoint_makespan']} s, "
+            f"restore {batch['restore_makespan']} s; per-job p90: "
+            f"{batch['checkpoint_p90']} s / {batch['restore_p90']} s; "
+            f"{gbps} GB/s dumped{suffix}"
+        )
+        return float(batch["checkpoint_makespan"]), float(batch["restore_makespan"])
+
+    row = rows[0]
+    print(
+        f"  Checkpoint: {row['checkpoint_time']} s, "
+        f"Restore: {row['restore_time']} s, "
+        f"Total: {row['total_time']} s{suffix}"
+    )
+    return float(row["checkpoint_time"]), float(row["restore_time"])
+
+
+def parse_cpus(cpus: str) -> set[int]:
+    """CPU numbers of a taskset-style list, e.g. "0-3,8" -> {0, 1, 2, 3, 8}."""
+    numbers = set()
+    for part in str(cpus).split(","):
+        first, _, last = part.partition("-")
+        numbers.update(range(int(first), int(last or first) + 1))
+    return numbers
+
+
+async def pin_checkpointer(spec: SweepSpec, backend: Backend) -> None:
+    """Pin every thread of the checkpointer's processes to its CPUs; the
+    processes they start later (CRIU, the streamer) inherit the mask."""
+    cpus = parse_cpus(spec.cpus["checkpointer"])
+    for pid in await backend.checkpointer_pids():
+        try:
+            tasks = list(Path(f"/proc/{pid}/task").iterdir())
+        except FileNotFoundError:
+            continue  # the process exited
+        for task in tasks:
+            try:
+                os.sched_setaffinity(int(task.name), cpus)
+            except ProcessLookupError:
+                pass  # the thread exited since the listing
+
+
+async def run_sweep(spec: SweepSpec, output_dir: Path, resume: bool = False) -> int:
+    """Run every case in the spec, returning the number of failed cases.
+
+    Progress is journaled (journal.py) in the output directory. A failed case
+    is retried up to `spec.retries` times. With `resume`, the journaled sweep
+    continues where it stopped: jobs of the attempt that was cut short are
+    reaped, completed cases are skipped and, for adaptive sampling, replayed
+    so the same cases follow.
+    """
+    if spec.sizes_gb:
+        check_host_memory(spec)
+    backend = get_backend(spec.backend, **spec.backend_options)
+    await backend.setup()
+    if (spec.cpus or {}).get("checkpointer"):
+        await pin_checkpointer(spec, backend)
+    baseline = None
+    if spec.baseline_rounds:
+        baseline = await cli_baseline(backend, spec.baseline_rounds)
+        print(
+            f"CLI round-trip baseline: {baseline * 1000:.3f} ms "
+            f"(median of {spec.baseline_rounds})"
+        )
+
+    writer = ResultWriter(output_dir)
+    journal = await open_journal(spec, backend, output_dir, resume)
+    job_base = journal.job_base
+    samples: dict[tuple, list[tuple[float, float]]] = {}
+    cases = adaptive_cases(spec, samples) if spec.adaptive else spec.cases()
+    failures = 0
+    i = 0
+
+    try:
+        if resume:
+            print(
+                f"Resuming: {len(journal.completed)} cases done, "
+                f"{len(journal.failed)} failed"
+            )
+        elif not spec.adaptive:
+            for case in spec.cases():
+                journal.record("planned", asdict(case))
+
+        ceilings = (
+            await storage_ceilings(spec, output_dir) if spec.storage_bench_mb else {}
+        )
+        if spec.concurrency:
+            # asyncio.to_thread work (local dumps, cleanup) must not queue up
+            # behind the default pool's min(32, CPUs + 4) workers.
+            workers = 2 * max(spec.concurrency) + 4
+            asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(workers))
+
+        async with limits(spec, backend, output_dir) as limiter:
+            for i, case in enumerate(cases, 1):
+                key = case_key(asdict(case))
+                if key not in journal.planned:
+                    journal.record("planned", asdict(case))
+                if key in journal.completed:
+                    if not case.warmup:
+                        samples.setdefault(case.cell, []).append(
+                            tuple(journal.completed[key]["times"])
+                        )
+                    continue
+                if (
+                    journal.failed.get(key, {}).get("killed")
+                    or journal.attempts[key] > spec.retries
+                ):
+                    failures += 1
+                    continue
+
+                tier = ", ".join(
+                    filter(
+                        None,
+                        [
+                            case.io_limit,
+                            case.mem_limit_mb and f"{case.mem_limit_mb}MB",
+                            spec.concurrency and f"{case.concurrency} jobs",
+                            case.size_gb is not None and f"{case.size_gb:g} GB",
+                            case.cache and f"{case.cache} cache",
+                        ],
+                    )
+                )
+                tier = f" ({tier})" if tier else ""
+                print(
+                    f"[{i}/{spec.planned}] {case.workload} on {case.storage}{tier}: "
+                    f"{case.compression} compression with {case.streams} streams "
+                    f"({spec.run_label(case)})"
+                )
+                ceiling = ceilings.get(case.storage, {}).get(max(1, case.streams))
+                while True:
+                    attempt = journal.attempts[key] + 1
+                    jobs = spec.jobs(case, job_base)
+                    journal.record(
+                        "started",
+                        asdict(case),
+                        attempt=attempt,
+                        jobs=jobs,
+                        dirs={job: spec.storage_dir(case.storage, job) for job in jobs},
+                    )
+                    try:
+                        if spec.concurrency:
+                            rows, batch = await run_batch(
+                                backend, spec, case, job_base, writer, limiter
+                            )
+                        else:
+                            batch = None
+                            rows = [
+                                await run_case(
+                                    backend, spec, case, job_base, writer, limiter
+                                )
+                            ]
+                    except CommandError as e:
+                        killed = isinstance(e, Killed)
+                        journal.record(
+                            "failed",
+                            asdict(case),
+                            attempt=attempt,
+                            error=str(e),
+                            killed=killed,
+                        )
+                        print(f"  ERROR: {e}")
+                        if killed or attempt > spec.retries:
+                            failures += 1
+                            break
+                        print(f"  Retrying (attempt {attempt + 1}/{spec.retries + 1})")
+                        await asyncio.sleep(spec.pause)
+                    else:
+                        times = record_results(
+                            spec, writer, case, rows, batch, ceiling, baseline
+                        )
+                        if not case.warmup:
+                            samples.setdefault(case.cell, []).append(times)
+                        journal.record(
+                            "completed", asdict(case), attempt=attempt, times=times
+                        )
+                        break
+                await asyncio.sleep(spec.pause)
+    finally:
+        journal.close()
+
+    if spec.adaptive:
+        print(f"\nAdaptive sampling used {i} of {spec.planned} possible runs")
+        for cell, values in samples.items():
+            width = relative_ci_width(values, spec.adaptive.confidence)
+            name = "/".join(str(key) for key in cell if key not in ("", None))
+            print(f"  {name}: {len(values)} runs, CI width {width:.1%}")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a Cedana C/R benchmark sweep")
+    parser.add_argument("spec", type=Path, help="Sweep spec JSON file")
+    parser.add_argument(
+        "--output-dir", "-o", type=Path, help="Override the spec's output_dir"
+    )
+    parser.add_argument("--runs", type=int, help="Override the spec's run count")
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Repeat each configuration until its median CI is tight (see --ci-width)",
+    )
+    parser.add_argument(
+        "--ci-width",
+        type=float,
+        help="Target CI width relative to the median for --adaptive (default: 0.05)",
+    )
+    parser.add_argument(
+        "--max-runs", type=int, help="Per-configuration run cap for --adaptive"
+    )
+    parser.add_argument(
+        "--budget", type=int, help="Total run budget across the sweep for --adaptive"
+    )
+    parser.add_argument(
+        "--retries", type=int, help="Override the spec's retries per failed case"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the sweep journaled in the output directory",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="List the planned cases and exit"
+    )
+
+    args = parser.parse_args()
+
+    spec = SweepSpec.from_file(args.spec)
+    if args.runs is not None:
+        spec.runs = args.runs
+    if args.retries is not None:
+        spec.retries = args.retries
+    if args.adaptive and spec.adaptive is None:
+        spec.adaptive = Adaptive()
+    if spec.adaptive:
+        for option in ("ci_width", "max_runs", "budget"):
+            if getattr(args, option) is not None:
+                setattr(spec.adaptive, option, getattr(args, option))
+    output_dir = args.output_dir or Path(spec.output_dir)
+
+    if args.dry_run:
+        if spec.adaptive:
+            print(f"{len(spec.cells())} cells, {spec.adaptive}")
+        for case in spec.cases():
+            print(case)
+        return 0
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    capture_system_info(output_dir / "system_info.txt")
+
+    try:
+        with s3_standin(spec, output_dir):
+            failures = asyncio.run(run_sweep(spec, output_dir, args.resume))
+    except (CommandError, cgroups.CgroupError, ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(f"\nSweep complete, results in {output_dir} ({failures} failed cases)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,180 @@
+"""
+cgroup v2 Resource Limits
+Runs the checkpointer's processes in a fresh child cgroup of the
+orchestrator's own cgroup for each dump and restore. The child carries the
+limits, e.g. io.max on the block device behind the dump target or
+memory.max, and its memory.peak and memory.events are read when the phase
+ends. This needs a writable cgroup v2 hierarchy with the controllers
+available: run as root, or in a delegated scope such as
+`systemd-run --scope -p Delegate=yes python3 bench.py ...`.
+"""
+
+import contextlib
+import os
+from pathlib import Path
+
+MB = 1024**2
+# io.max keys of a sweep's io_limits tiers: spec key -> (io.max key, unit).
+IO_KEYS = {
+    "rbps_mb": ("rbps", MB),
+    "wbps_mb": ("wbps", MB),
+    "riops": ("riops", 1),
+    "wiops": ("wiops", 1),
+}
+# memory.events counters recorded per phase: reclaim throttling above
+# memory.high, hitting memory.max, OOM and OOM kills.
+MEMORY_EVENTS = ["high", "max", "oom", "oom_kill"]
+# Leaf the orchestrator's cgroup peers move to, since cgroup v2 allows no
+# processes in a non-root cgroup that hands controllers to its children.
+HOME = "bench-home"
+
+
+class CgroupError(RuntimeError):
+    """Raised when the cgroup hierarchy can't be set up or written."""
+
+
+def mount_point() -> Path:
+    """Where the cgroup v2 hierarchy is mounted (/sys/fs/cgroup normally)."""
+    with open("/proc/self/mountinfo") as f:
+        for line in f:
+            fields = line.split()
+            separator = fields.index("-")
+            if fields[separator + 1] == "cgroup2":
+                return Path(fields[4])
+    raise CgroupError("no cgroup v2 hierarchy is mounted")
+
+
+def current(pid: int | str = "self") -> Path:
+    """The cgroup v2 directory a process belongs to."""
+    with open(f"/proc/{pid}/cgroup") as f:
+        for line in f:
+            if line.startswith("0::"):
+                return mount_point() / line[3:].strip().lstrip("/")
+    raise CgroupError(f"process {pid} is not in a cgroup v2 hierarchy")
+
+
+def block_device(path: str | os.PathLike) -> str:
+    """MAJ:MIN of the whole disk behind `path`, as io.max expects.
+
+    Partitions resolve to their disk. tmpfs, overlay and network filesystems
+    have no block device; name the device explicitly for those.
+    """
+    st = os.stat(path)
+    device = f"{os.major(st.st_dev)}:{os.minor(st.st_dev)}"
+    sysfs = Path("/sys/dev/block") / device
+    if not sysfs.exists():
+        raise CgroupError(f"{path} is not on a block device ({device})")
+    if (sysfs / "partition").exists():
+        device = (sysfs.resolve().parent / "dev").read_text().strip()
+    return device
+
+
+def io_max(device: str, limits: dict) -> str:
+    """io.max line for one device; keys missing from `limits` are unlimited."""
+    unknown = set(limits) - set(IO_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown io limit(s): {', '.join(sorted(unknown))}")
+    values = [
+        f"{key}={int(limits[name] * unit) if limits.get(name) else 'max'}"
+        for name, (key, unit) in IO_KEYS.items()
+    ]
+    return " ".join([device, *values])
+
+
+def memory_stats(path: Path) -> dict:
+    """Peak usage and memory.events counters of a cgroup.
+
+    memory.peak needs Linux 5.19; older kernels leave memory_peak_mb empty.
+    """
+    events = dict(line.split() for line in _read(path / "memory.events").splitlines())
+    peak = path / "memory.peak"
+    return {
+        "memory_peak_mb": f"{int(_read(peak)) / MB:.1f}" if peak.exists() else "",
+        **{f"memory_{key}": int(events.get(key, 0)) for key in MEMORY_EVENTS},
+    }
+
+
+class Subtree:
+    """The orchestrator's cgroup, set up to give limited child cgroups.
+
+    Use as a context manager: entering moves the processes of the
+    orchestrator's cgroup to a leaf and enables the controllers for its
+    children. limited() then runs a block with processes in a fresh child.
+    """
+
+    def __init__(self, controllers=("io", "memory")):
+        self.controllers = controllers
+        self.parent = current()
+        self.home = self.parent
+
+    def __enter__(self) -> "Subtree":
+        available = _read(self.parent / "cgroup.controllers").split()
+        missing = [c for c in self.controllers if c not in available]
+        if missing:
+            raise CgroupError(
+                f"{', '.join(missing)} controller(s) not available in {self.parent}"
+            )
+        if self.parent != mount_point():
+            self.home = self.parent / HOME
+            self.home.mkdir(exist_ok=True)
+            for pid in procs(self.parent):
+                _write(self.home / "cgroup.procs", pid)
+        _write(
+            self.parent / "cgroup.subtree_control",
+            " ".join(f"+{c}" for c in self.controllers),
+        )
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass  # the home leaf stays; the orchestrator is still in it
+
+    @contextlib.contextmanager
+    def limited(self, name: str, pids: list[int], settings: dict):
+        """Run the block with `pids` in a new child cgroup.
+
+        `settings` maps control files to a value or a list of values, e.g.
+        {"memory.max": 268435456, "io.max": [line, ...]}. Processes the pids
+        fork meanwhile join the cgroup too. Yields a dict that is filled with
+        memory_stats() when the block ends; everything left in the cgroup is
+        then moved back and the cgroup removed.
+        """
+        path = self.parent / name
+        path.mkdir(exist_ok=True)
+        stats = {}
+        try:
+            for control, values in settings.items():
+                for value in values if isinstance(values, list) else [values]:
+                    _write(path / control, value)
+            for pid in pids:
+                _write(path / "cgroup.procs", pid)
+            yield stats
+        finally:
+            for pid in procs(path):
+                try:
+                    _write(self.home / "cgroup.procs", pid)
+                except CgroupError:
+                    pass  # exited meanwhile
+            if "memory" in self.controllers:
+                stats.update(memory_stats(path))
+            try:
+                path.rmdir()
+            except OSError:
+                pass  # a process that can't be moved; reused by the next phase
+
+
+def procs(path: Path) -> list[int]:
+    return [int(pid) for pid in _read(path / "cgroup.procs").split()]
+
+
+def _read(path: Path) -> str:
+    try:
+        return path.read_text()
+    except OSError as e:
+        raise CgroupError(f"Can't read {path}: {e.strerror}")
+
+
+def _write(path: Path, value) -> None:
+    try:
+        path.write_text(f"{value}\n")
+    except OSError as e:
+        raise CgroupError(f"Can't write '{value}' to {path}: {e.strerror}")
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Codec Microbenchmark
+Measures compress/decompress throughput and compression ratio of the
+streamer codecs (none, tar, gzip, lz4, zlib, plus zstd levels when the
+zstandard package is installed) on a real checkpoint image directory or on
+memory generated with one of stress.py's entropy profiles. Input is split
+into the checkpoint engine's 4 MiB chunks and processed by 1..N threads,
+matching stream parallelism. Results go next to the timing CSVs as
+codec_<workload>.csv, so a codec can be chosen per workload without a full
+C/R sweep.
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import socket
+import tarfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import stress
+from common import parse_streams, timestamp
+from local_checkpoint import CHUNK_SIZE, lz4
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, benchmarked only when installed
+    zstandard = None
+
+MB = 1024**2
+ZSTD_LEVELS = [1, 3, 9]
+FIELDS = [
+    "timestamp",
+    "host",
+    "workload",
+    "source",
+    "codec",
+    "level",
+    "threads",
+    "raw_mb",
+    "compressed_mb",
+    "ratio",
+    "compress_mbps",
+    "decompress_mbps",
+]
+
+
+def _tar_compress(chunk) -> bytes:
+    out = io.BytesIO()
+    with tarfile.open(fileobj=out, mode="w") as tar:
+        info = tarfile.TarInfo("chunk")
+        info.size = len(chunk)
+        tar.addfile(info, io.BytesIO(chunk))
+    return out.getvalue()
+
+
+def _tar_decompress(data) -> bytes:
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        return tar.extractfile("chunk").read()
+
+
+def codecs() -> dict[tuple[str, int | None], tuple]:
+    """(codec, level) -> (compress, decompress), with local_checkpoint's levels."""
+    table = {
+        ("none", None): (bytes, bytes),
+        ("tar", None): (_tar_compress, _tar_decompress),
+        ("gzip", 6): (lambda b: gzip.compress(b, 6), gzip.decompress),
+        ("zlib", 6): (lambda b: zlib.compress(b, 6), zlib.decompress),
+    }
+    if lz4 is not None:
+        table[("lz4", None)] = (lz4.frame.compress, lz4.frame.decompress)
+    if zstandard is not None:
+        for level in ZSTD_LEVELS:
+            table[("zstd", level)] = (
+                zstandard.ZstdCompressor(level=level).compress,
+                zstandard.ZstdDecompressor().decompress,
+            )
+    return table
+
+
+def image_chunks(directory: Path, max_bytes: int) -> list[bytes]:
+    """Up to max_bytes of a checkpoint image directory as CHUNK_SIZE pieces.
+
+    Pass an uncompressed dump; manifests and other JSON files are skipped.
+    """
+    chunks = []
+    total = 0
+    for path in sorted(p for p in directory.rglob("*") if p.is_file()):
+        if path.suffix == ".json":
+            continue
+        with open(path, "rb") as f:
+            while total < max_bytes and (chunk := f.read(CHUNK_SIZE)):
+                chunks.append(chunk)
+                total += len(chunk)
+    return chunks
+
+
+def generated_chunks(size: int, profile: str, target_ratio: float) -> list[bytes]:
+    """A stress.py memory image of `size` bytes as CHUNK_SIZE pieces."""
+    data = bytearray(size)
+    stress.fill(data, profile, target_ratio)
+    view = memoryview(data)
+    return [bytes(view[i : i + CHUNK_SIZE]) for i in range(0, size, CHUNK_SIZE)]
+
+
+def measure(chunks: list[bytes], compress, decompress, threads: int) -> dict:
+    """Wall-clock throughput of compressing then decompressing every chunk."""
+    raw = sum(len(c) for c in chunks)
+    with ThreadPoolExecutor(threads) as pool:
+        start = time.monotonic()
+        compressed = list(pool.map(compress, chunks))
+        compress_time = time.monotonic() - start
+
+        start = time.monotonic()
+        restored = list(pool.map(decompress, compressed))
+        decompress_time = time.monotonic() - start
+
+    if sum(len(r) for r in restored) != raw:
+        raise RuntimeError("decompressed size does not match the input")
+    stored = sum(len(c) for c in compressed)
+    return {
+        "raw_mb": f"{raw / MB:.1f}",
+        "compressed_mb": f"{stored / MB:.1f}",
+        "ratio": f"{raw / stored:.3f}",
+        "compress_mbps": f"{raw / MB / compress_time:.1f}",
+        "decompress_mbps": f"{raw / MB / decompress_time:.1f}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark codec throughput and ratio on checkpoint memory"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--image", type=Path, help="Uncompressed checkpoint image directory"
+    )
+    source.add_argument(
+        "--generate-mb",
+        type=int,
+        help="Generate this much memory with stress.py's fill instead",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=stress.PROFILES,
+        default="tensor",
+        help="stress.py entropy profile for --generate-mb (default: tensor)",
+    )
+    parser.add_argument(
+        "--target-ratio",
+        type=float,
+        default=2.0,
+        help="Target ratio for the mixture profile (default: 2.0)",
+    )
+    parser.add_argument(
+        "--max-mb",
+        type=int,
+        default=1024,
+        help="Read at most this much of --image (default: 1024)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=parse_streams,
+        default=[1, 2, 4, 8],
+        help="Thread counts, e.g. 1,2,4,8 or 1-8 (default: 1,2,4,8)",
+    )
+    parser.add_argument(
+        "--codec",
+        action="append",
+        help="Only benchmark these codecs (default: all available)",
+    )
+    parser.add_argument(
+        "--workload",
+        help="Workload name for the results file (default: image dir name "
+        "or stress_py_<profile>)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        "-o",
+        type=Path,
+        default=Path("results/sweep"),
+        help="Directory of the workload's timing CSVs (default: results/sweep)",
+    )
+
+    args = parser.parse_args()
+
+    if args.image:
+        if not args.image.is_dir():
+            print(f"Error: {args.image} is not a directory")
+            return 1
+        chunks = image_chunks(args.image, args.max_mb * MB)
+        workload = args.workload or args.image.name
+        source_name = str(args.image)
+    else:
+        chunks = generated_chunks(
+            args.generate_mb * MB, args.profile, args.target_ratio
+        )
+        workload = args.workload or (
+            "stress_py" if args.profile == "zero" else f"stress_py_{args.profile}"
+        )
+        source_name = f"generated:{args.profile}"
+    if not chunks:
+        print(f"Error: no image data found in {args.image}")
+        return 1
+
+    selected = {
+        key: funcs
+        for key, funcs in codecs().items()
+        if not args.codec or key[0] in args.codec
+    }
+    if not selected:
+        print(f"Error: none of {args.codec} is available")
+        return 1
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    path = args.output_dir / f"codec_{workload}.csv"
+    new_file = not path.exists()
+    print(f"{sum(map(len, chunks)) / MB:.0f} MB of {source_name}, "
+          f"{len(chunks)} chunks\n")  # fmt: skip
+    print(f"{'codec':<8} {'threads':>7} {'ratio':>7} "
+          f"{'compress':>14} {'decompress':>14}")  # fmt: skip
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if new_file:
+            writer.writeheader()
+        for (codec, level), (compress, decompress) in selected.items():
+            for threads in args.threads:
+                row = {
+                    "timestamp": timestamp(),
+                    "host": socket.gethostname(),
+                    "workload": workload,
+                    "source": source_name,
+                    "codec": codec,
+                    "level": "" if level is None else level,
+                    "threads": threads,
+                    **measure(chunks, compress, decompress, threads),
+                }
+                writer.writerow(row)
+                f.flush()
+                name = codec if level is None else f"{codec}-{level}"
+                print(
+                    f"{name:<8} {threads:>7} {row['ratio']:>6}x "
+                    f"{row['compress_mbps']:>9} MB/s {row['decompress_mbps']:>9} MB/s"
+                )
+
+    print(f"\nResults appended to: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,29 @@
+"""
+Shared Helpers
+Small helpers the orchestrator, the optimizer and the standalone
+microbenchmarks and model all use. They live here so a microbenchmark
+doesn't import bench.py or optimize.py, which in turn import it.
+"""
+
+from datetime import datetime
+
+# Stream counts the optimizer searches and the model recommends from.
+DEFAULT_STREAMS = [0, 1, 2, 3, 4, 6, 8, 12, 16, 24, 32]
+
+
+def timestamp() -> str:
+    """Local time with its UTC offset, to the second, as written to CSVs."""
+    return datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def parse_ints(text: str) -> list[int]:
+    """Parse a comma-separated list like `64,1024,4096`."""
+    return [int(x) for x in text.split(",")]
+
+
+def parse_streams(text: str) -> list[int]:
+    """Parse `0,2,4,8` or a range `0-32`."""
+    if "-" in text:
+        low, high = (int(x) for x in text.split("-"))
+        return list(range(low, high + 1))
+    return parse_ints(text)
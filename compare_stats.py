@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Statistical Comparison of Benchmark Runs
+Compares a candidate set of runs against a baseline for every
+(compression, streams, storage, workload) cell at once, split further by
+any bench.py sweep dimension the runs carry: bootstrap confidence
+interval of the relative change in median, a Mann-Whitney U permutation test
+and Cliff's delta as effect size. Emits a faster/slower/inconclusive verdict
+per cell and exits non-zero when a cell regresses past the threshold, so it
+can gate CI against a stored baseline CSV.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import results_store
+
+CELL_KEYS = ["storage", "workload", "compression", "streams"]
+# bench.py sweep dimensions; runs that differ in one never share a cell.
+DIMENSIONS = [
+    "io_limit",
+    "mem_limit_mb",
+    "concurrency",
+    "job_index",
+    "size_gb",
+    "cache",
+]
+METRICS = ["checkpoint_time", "restore_time", "total_time"]
+# Per-cell statistics compare() reports, besides the metric, keys and verdict.
+STATS = [
+    "n_baseline",
+    "n_candidate",
+    "baseline_median",
+    "candidate_median",
+    "rel_change",
+    "ci_low",
+    "ci_high",
+    "p_value",
+    "cliffs_delta",
+]
+
+
+def distribution_stats(
+    df: pd.DataFrame, keys: list[str], metrics: list[str] = METRICS
+) -> pd.DataFrame:
+    """Per-group runs, min, p50, p90, p99, max, IQR and CV of each metric.
+
+    One grouped pass; columns are named `<metric>_<stat>`.
+    """
+    grouped = df.groupby(keys)[metrics]
+    quantiles = grouped.quantile([0.25, 0.5, 0.75, 0.9, 0.99]).unstack()
+    low, high, mean, std = grouped.min(), grouped.max(), grouped.mean(), grouped.std()
+    stats = {"runs": grouped.size()}
+    for metric in metrics:
+        q = quantiles[metric]
+        stats.update(
+            {
+                f"{metric}_min": low[metric],
+                f"{metric}_p50": q[0.5],
+                f"{metric}_p90": q[0.9],
+                f"{metric}_p99": q[0.99],
+                f"{metric}_max": high[metric],
+                f"{metric}_iqr": q[0.75] - q[0.25],
+                f"{metric}_cv": std[metric] / mean[metric],
+            }
+        )
+    return pd.DataFrame(stats).reset_index()
+
+
+def cell_keys(*frames: pd.DataFrame, ignore: list[str] = ()) -> list[str]:
+    """CELL_KEYS plus every dimension set in any row of `frames`, except the
+    `ignore`d ones, e.g. the dimension a comparison is across."""
+    return CELL_KEYS + [
+        key
+        for key in DIMENSIONS
+        if key not in ignore
+        and any(key in df and df[key].notna().any() for df in frames)
+    ]
+
+
+def cell_frame(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """`df` with null dimensions as None, so runs without one group together.
+
+    Runs from before bench.py recorded the cache state restored warm.
+    """
+    df = df.copy()
+    if "cache" in keys:
+        df["cache"] = df["cache"].fillna("warm")
+    for key in keys[len(CELL_KEYS) :]:
+        column = df.get(key, pd.Series(index=df.index, dtype=object)).astype(object)
+        df[key] = column.where(column.notna(), None)
+    return df
+
+
+def _cells(df: pd.DataFrame, metric: str, keys: list[str]) -> dict[tuple, np.ndarray]:
+    return {
+        key: group[metric].to_numpy(dtype=float)
+        for key, group in cell_frame(df, keys)
+        .dropna(subset=[metric])
+        .groupby(keys, dropna=False)
+    }
+
+
+def median_ci(
+    samples: np.ndarray,
+    alpha: float = 0.05,
+    n_boot: int = 2000,
+    rng: np.random.Generator | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Bootstrap (1 - alpha) CI of the median for each row of a (k, n) array."""
+    rng = rng or np.random.default_rng()
+    k, n = samples.shape
+    boot = np.median(
+        samples[np.arange(k)[:, None, None], rng.integers(0, n, (k, n_boot, n))],
+        axis=2,
+    )
+    low, high = np.percentile(boot, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=1)
+    return low, high
+
+
+def _mann_whitney_u(cand: np.ndarray, base: np.ndarray) -> np.ndarray:
+    """U statistic of candidate vs baseline over the last two axes (ties count 1/2)."""
+    diff = cand[..., :, None] - base[..., None, :]
+    return (diff > 0).sum(axis=(-1, -2)) + 0.5 * (diff == 0).sum(axis=(-1, -2))
+
+
+def _compare_group(
+    base: np.ndarray,
+    cand: np.ndarray,
+    rng: np.random.Generator,
+    n_boot: int,
+    n_perm: int,
+    alpha: float,
+) -> dict[str, np.ndarray]:
+    """Statistics for k cells that share sample sizes; arrays are (k, n)."""
+    k, nb = base.shape
+    nc = cand.shape[1]
+    rows = np.arange(k)[:, None, None]
+
+    med_base = np.median(base, axis=1)
+    med_cand = np.median(cand, axis=1)
+
+    # Bootstrap the relative change in median.
+    boot_b = np.median(base[rows, rng.integers(0, nb, (k, n_boot, nb))], axis=2)
+    boot_c = np.median(cand[rows, rng.integers(0, nc, (k, n_boot, nc))], axis=2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = boot_c / boot_b - 1
+    ci_low, ci_high = np.nanpercentile(
+        rel, [100 * alpha / 2, 100 * (1 - alpha / 2)], axis=1
+    )
+
+    # Two-sided permutation test on U, one shared set of permutations.
+    u_obs = _mann_whitney_u(cand, base)
+    pooled = np.concatenate([cand, base], axis=1)
+    perms = np.argsort(rng.random((n_perm, nb + nc)), axis=1)
+    shuffled = pooled[:, perms]  # (k, n_perm, nb + nc)
+    u_perm = _mann_whitney_u(shuffled[..., :nc], shuffled[..., nc:])
+    centre = nb * nc / 2
+    extreme = np.abs(u_perm - centre) >= np.abs(u_obs - centre)[:, None] - 1e-9
+    p_value = (extreme.sum(axis=1) + 1) / (n_perm + 1)
+
+    return {
+        "n_baseline": np.full(k, nb),
+        "n_candidate": np.full(k, nc),
+        "baseline_median": med_base,
+        "candidate_median": med_cand,
+        "rel_change": med_cand / med_base - 1,
+        "ci_low": ci_low,
+        "ci_high": ci_high,
+        "p_value": p_value,
+        "cliffs_delta": 2 * u_obs / (nb * nc) - 1,
+    }
+
+
+def compare(
+    baseline: pd.DataFrame,
+    candidate: pd.DataFrame,
+    metric: str = "total_time",
+    n_boot: int = 10000,
+    n_perm: int = 10000,
+    alpha: float = 0.05,
+    threshold: float = 0.05,
+    seed: int = 0,
+    ignore: list[str] = (),
+) -> pd.DataFrame:
+    """Compare candidate vs baseline in every cell present in both.
+
+    A cell is `slower`/`faster` when the permutation p-value is below alpha
+    and the bootstrap CI of the relative median change excludes zero; it is
+    a `regression` when slower by more than `threshold` (0.05 = 5%).
+    Dimensions in `ignore` don't split cells, so the two sides may differ in
+    them, as unlimited and memory-limited runs do:
+
+    >>> runs = pd.DataFrame(
+    ...     {"storage": "local", "workload": "stress_py", "compression": "gzip",
+    ...      "streams": 2, "total_time": [1.0, 1.1, 1.2, 1.3]}
+    ... )
+    >>> limited = runs.assign(mem_limit_mb=100.0)
+    >>> len(compare(runs, limited, n_boot=10, n_perm=10))
+    0
+    >>> len(compare(runs, limited, n_boot=10, n_perm=10, ignore=["mem_limit_mb"]))
+    1
+    """
+    rng = np.random.default_rng(seed)
+    columns = cell_keys(baseline, candidate, ignore=ignore)
+    base_cells = _cells(baseline, metric, columns)
+    cand_cells = _cells(candidate, metric, columns)
+    keys = sorted(set(base_cells) & set(cand_cells), key=str)
+
+    # Vectorise over all cells with the same (n_baseline, n_candidate).
+    shapes: dict[tuple, list] = {}
+    for key in keys:
+        shapes.setdefault((len(base_cells[key]), len(cand_cells[key])), []).append(key)
+
+    frames = []
+    for group_keys in shapes.values():
+        stats = _compare_group(
+            np.stack([base_cells[k] for k in group_keys]),
+            np.stack([cand_cells[k] for k in group_keys]),
+            rng,
+            n_boot,
+            n_perm,
+            alpha,
+        )
+        frame = pd.DataFrame(group_keys, columns=columns)
+        frames.append(frame.assign(**stats))
+
+    if not frames:
+        return pd.DataFrame(
+            columns=["metric", *columns, *STATS, "verdict", "regression"]
+        )
+
+    result = pd.concat(frames, ignore_index=True)
+    significant = result["p_value"] < alpha
+    slower = significant & (result["ci_low"] > 0)
+    faster = significant & (result["ci_high"] < 0)
+
+    result.insert(0, "metric", metric)
+    result["verdict"] = np.select(
+        [slower, faster], ["slower", "faster"], "inconclusive"
+    )
+    result["regression"] = slower & (result["rel_change"] > threshold)
+    return result.sort_values(columns, ignore_index=True)
+
+
+def load_runs(paths: list[Path]) -> pd.DataFrame:
+    """Load timing CSVs with storage/workload inferred from their names."""
+    return pd.concat([results_store.load_csv(p) for p in paths], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare benchmark runs against a baseline"
+    )
+    parser.add_argument(
+        "--baseline", "-b", nargs="+", type=Path, help="Baseline timing CSV(s)"
+    )
+    parser.add_argument(
+        "--candidate", "-c", nargs="+", type=Path, help="Candidate timing CSV(s)"
+    )
+    parser.add_argument(
+        "--mem-limit",
+        type=int,
+        help="Compare the streamer memory-limit runs at this limit (MB) "
+        "against the no-limit runs from the results store",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=METRICS,
+        action="append",
+        help="Metric(s) to compare (default: all three)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.05,
+        help="Relative slowdown that counts as a regression (default: 0.05)",
+    )
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--bootstrap", type=int, default=10000)
+    parser.add_argument("--permutations", type=int, default=10000)
+    parser.add_argument("--json", type=Path, help="Write verdicts to this JSON file")
+
+    args = parser.parse_args()
+
+    ignore = []
+    if args.mem_limit is not None:
+        ignore = ["mem_limit_mb"]  # the two sides differ in it by design
+        experiments = ["v2", "streamer-memory-limit"]
+        baseline = results_store.query(experiment=experiments, mem_limit_mb=None)
+        candidate = results_store.query(
+            experiment=experiments, mem_limit_mb=args.mem_limit
+        )
+    elif args.baseline and args.candidate:
+        baseline = load_runs(args.baseline)
+        candidate = load_runs(args.candidate)
+    else:
+        parser.error("give --baseline and --candidate, or --mem-limit")
+
+    results = pd.concat(
+        [
+            compare(
+                baseline,
+                candidate,
+                metric,
+                n_boot=args.bootstrap,
+                n_perm=args.permutations,
+                alpha=args.alpha,
+                threshold=args.threshold,
+                ignore=ignore,
+            )
+            for metric in args.metric or METRICS
+        ],
+        ignore_index=True,
+    )
+    if results.empty:
+        print("0 cells compared: no cell has runs in both baseline and candidate")
+        return 1
+
+    columns = [
+        "metric", *cell_keys(baseline, candidate, ignore=ignore), "baseline_median",
+        "candidate_median", "rel_change", "ci_low", "ci_high", "p_value",
+        "cliffs_delta", "verdict",
+    ]  # fmt: skip
+    print(results[columns].to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    regressions = results[results["regression"]]
+    summary = {
+        "cells": len(results),
+        "slower": int((results["verdict"] == "slower").sum()),
+        "faster": int((results["verdict"] == "faster").sum()),
+        "inconclusive": int((results["verdict"] == "inconclusive").sum()),
+        "regressions": len(regressions),
+        "threshold": args.threshold,
+        "alpha": args.alpha,
+    }
+    print(
+        f"\n{summary['slower']} slower, {summary['faster']} faster, "
+        f"{summary['inconclusive']} inconclusive; "
+        f"{summary['regressions']} regression(s) beyond {args.threshold:+.0%}"
+    )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "summary": summary,
+                    "cells": json.loads(results.to_json(orient="records")),
+                },
+                f,
+                indent=2,
+            )
+
+    if len(regressions):
+        print("REGRESSION DETECTED", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,101 @@
+"""
+Sweep Journal
+Append-only record of a bench.py sweep in <output_dir>/journal.jsonl, one
+JSON object per line, each fsynced before the sweep moves on:
+
+    sweep      a new sweep started, with its spec and job base name
+    resumed    bench.py --resume picked the sweep up again
+    planned    a case the sweep intends to run
+    started    an attempt at a case began, with the engine job names
+    completed  the attempt's rows are written; times feeds adaptive sampling
+    failed     the attempt failed, with the error
+
+Only the records after the last `sweep` count. A `started` record with no
+`completed` or `failed` after it is an attempt that was cut short; its jobs
+may still be running and its dumps still on disk.
+"""
+
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+EVENTS = ["sweep", "resumed", "planned", "started", "completed", "failed"]
+
+
+def case_key(case: dict) -> str:
+    """Stable identity of a case (its cell and run number)."""
+    return json.dumps(case, sort_keys=True)
+
+
+class Journal:
+    """A sweep's journal file and the state of the sweep it describes."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.spec: dict | None = None
+        self.job_base = ""
+        self._reset()
+        torn = path.exists() and self._replay()
+        self._file = open(path, "a")
+        if torn:
+            self._file.write("\n")  # keep the next record off the torn line
+
+    def _reset(self) -> None:
+        self.planned: set[str] = set()
+        self.completed: dict[str, dict] = {}
+        self.attempts: Counter = Counter()
+        self.failed: dict[str, dict] = {}
+        self.running: dict[str, dict] = {}
+
+    def _replay(self) -> bool:
+        """Apply the records on file; True if the last line is torn."""
+        line = ""
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # the last line, written as the sweep crashed
+                self._apply(record)
+        return bool(line) and not line.endswith("\n")
+
+    def _apply(self, record: dict) -> None:
+        event = record["event"]
+        if event == "sweep":
+            self.spec, self.job_base = record["spec"], record["job_base"]
+            self._reset()
+            return
+        if event == "resumed":
+            return
+        key = case_key(record["case"])
+        if event == "planned":
+            self.planned.add(key)
+        elif event == "started":
+            self.attempts[key] += 1
+            self.running[key] = record
+        elif event == "completed":
+            self.running.pop(key, None)
+            self.failed.pop(key, None)
+            self.completed[key] = record
+        elif event == "failed":
+            self.running.pop(key, None)
+            self.failed[key] = record
+
+    def record(self, event: str, case: dict | None = None, **fields) -> None:
+        """Append one record and fsync it."""
+        record = {"event": event, "time": datetime.now().isoformat(), **fields}
+        if case is not None:
+            record["case"] = case
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._apply(record)
+
+    def interrupted(self) -> list[dict]:
+        """`started` records of attempts that never finished."""
+        return list(self.running.values())
+
+    def close(self) -> None:
+        self._file.close()
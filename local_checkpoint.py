@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Local Stand-in Checkpoint Engine
+Freezes a process with SIGSTOP, reads its anonymous memory through
+/proc/<pid>/maps and /proc/<pid>/mem, and writes it across N parallel streams
+with the same compression choices as `cedana dump`. Restore reads the streams
+back, verifies every chunk and resumes the process. No daemon, CRIU or root
+needed (ptrace access to the target is enough).
+
+s3:// targets write each stream as one object to the unauthenticated
+endpoint in $AWS_ENDPOINT_URL (see s3_server.py), with multipart upload and
+ranged GETs over one connection per stream.
+"""
+
+import argparse
+import gzip
+import http.client
+import io
+import json
+import os
+import queue
+import re
+import shutil
+import signal
+import tarfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+try:
+    import lz4.frame
+except ImportError:  # lz4 is optional, only needed for --compression lz4
+    lz4 = None
+
+COMPRESSIONS = ["none", "tar", "gzip", "lz4", "zlib"]
+CHUNK_SIZE = 4 * 1024**2
+MANIFEST = "manifest.json"
+# Dumps to s3:// go to $AWS_ENDPOINT_URL in multipart parts of this size.
+S3_PART_SIZE = 8 * 1024**2
+S3_RETRIES = 5
+S3_TIMEOUT = 300
+
+# Special mappings that are either unreadable or not part of the process image.
+SKIP_MAPPINGS = {"[vvar]", "[vdso]", "[vsyscall]", "[vvar_vclock]"}
+
+STREAM_SUFFIX = {
+    "none": ".img",
+    "tar": ".tar",
+    "gzip": ".img.gz",
+    "lz4": ".img.lz4",
+    "zlib": ".img.zz",
+}
+
+
+def anonymous_regions(pid: int) -> list[tuple[int, int]]:
+    """Return (start, end) of readable anonymous mappings (heap, stack, mmap)."""
+    regions = []
+    with open(f"/proc/{pid}/maps") as f:
+        for line in f:
+            parts = line.split(maxsplit=5)
+            path = parts[5].strip() if len(parts) == 6 else ""
+            if "r" not in parts[1] or path in SKIP_MAPPINGS:
+                continue
+            if path.startswith("/dev/zero"):
+                pass  # shared anonymous memory (mmap(-1) in stress.py --mode processes)
+            elif path and not path.startswith("["):
+                continue  # file-backed, restorable from the file itself
+            start, end = (int(x, 16) for x in parts[0].split("-"))
+            regions.append((start, end))
+    return regions
+
+
+def is_s3(location) -> bool:
+    return str(location).startswith("s3://")
+
+
+def _join(directory, name: str):
+    if is_s3(directory):
+        return f"{str(directory).rstrip('/')}/{name}"
+    return Path(directory) / name
+
+
+def _open(location, mode: str):
+    """Binary file, or S3 object for s3:// locations."""
+    if is_s3(location):
+        return _S3Writer(location) if mode == "wb" else _S3Reader(location)
+    return open(location, mode)
+
+
+def open_stream(location, compression: str):
+    """Open a writable stream file (or s3:// object) for the given compression."""
+    if compression == "lz4" and lz4 is None:
+        raise RuntimeError("lz4 compression requires the 'lz4' package")
+    raw = _open(location, "wb")
+    if compression == "gzip":
+        return _Stacked(gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6), raw)
+    if compression == "lz4":
+        return _Stacked(lz4.frame.open(raw, "wb"), raw)
+    if compression == "zlib":
+        return _Stacked(_ZlibWriter(raw), raw)
+    if compression == "tar":
+        return _Stacked(_TarWriter(raw), raw)
+    return raw
+
+
+def read_stream(location, compression: str):
+    """Open a readable stream file (or s3:// object) for the given compression."""
+    if compression == "lz4" and lz4 is None:
+        raise RuntimeError("lz4 compression requires the 'lz4' package")
+    raw = _open(location, "rb")
+    if compression == "gzip":
+        return _Stacked(gzip.GzipFile(fileobj=raw, mode="rb"), raw)
+    if compression == "lz4":
+        return _Stacked(lz4.frame.open(raw, "rb"), raw)
+    if compression == "zlib":
+        return _Stacked(_ZlibReader(raw), raw)
+    if compression == "tar":
+        return _Stacked(_TarReader(raw), raw)
+    return raw
+
+
+class _Stacked:
+    """A codec stream over a raw file; close() finishes both."""
+
+    def __init__(self, stream, raw):
+        self.stream = stream
+        self.raw = raw
+
+    def write(self, data) -> None:
+        self.stream.write(data)
+
+    def read(self, n: int) -> bytes:
+        return self.stream.read(n)
+
+    def close(self) -> None:
+        try:
+            self.stream.close()
+        finally:
+            self.raw.close()
+
+
+class _ZlibWriter:
+    """Raw zlib stream, matching streamer's zlib codec."""
+
+    def __init__(self, f):
+        self.f = f
+        self.c = zlib.compressobj(6)
+
+    def write(self, data) -> None:
+        self.f.write(self.c.compress(data))
+
+    def close(self) -> None:
+        self.f.write(self.c.flush())
+
+
+class _ZlibReader:
+    def __init__(self, f):
+        self.f = f
+        self.d = zlib.decompressobj()
+        self.buf = bytearray()
+
+    def read(self, n: int) -> bytes:
+        while len(self.buf) < n:
+            raw = self.f.read(CHUNK_SIZE)
+            if not raw:
+                self.buf += self.d.flush()
+                break
+            self.buf += self.d.decompress(raw)
+        out = bytes(self.buf[:n])
+        del self.buf[:n]
+        return out
+
+    def close(self) -> None:
+        pass
+
+
+class _TarWriter:
+    """Uncompressed tar archive with one member per chunk, written as a stream."""
+
+    def __init__(self, f):
+        self.tar = tarfile.open(fileobj=f, mode="w|")
+        self.count = 0
+
+    def write(self, data) -> None:
+        info = tarfile.TarInfo(f"chunk-{self.count:08d}")
+        info.size = len(data)
+        self.tar.addfile(info, io.BytesIO(data))
+        self.count += 1
+
+    def close(self) -> None:
+        self.tar.close()
+
+
+class _TarReader:
+    def __init__(self, f):
+        self.tar = tarfile.open(fileobj=f, mode="r|")
+
+    def read(self, n: int) -> bytes:
+        return self.tar.extractfile(self.tar.next()).read()
+
+    def close(self) -> None:
+        self.tar.close()
+
+
+def _s3_connection(url: str) -> tuple[http.client.HTTPConnection, str, str]:
+    """Connection to $AWS_ENDPOINT_URL and the bucket and key of an s3:// URL.
+
+    Requests are unsigned, so this only talks to stand-ins like s3_server.py.
+    """
+    endpoint = os.environ.get("AWS_ENDPOINT_URL")
+    if not endpoint:
+        raise RuntimeError(
+            "s3:// targets need AWS_ENDPOINT_URL, e.g. a running s3_server.py"
+        )
+    parts = urlsplit(endpoint)
+    cls = (
+        http.client.HTTPSConnection
+        if parts.scheme == "https"
+        else http.client.HTTPConnection
+    )
+    bucket, _, key = url[len("s3://") :].partition("/")
+    return cls(parts.netloc, timeout=S3_TIMEOUT), bucket, key
+
+
+def _s3_request(
+    conn: http.client.HTTPConnection,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    headers: dict | None = None,
+    ok: tuple = (200, 204, 206),
+) -> tuple[int, dict, bytes]:
+    """Send one request, retrying 503 SlowDown and dropped connections with
+    exponential backoff like the AWS SDKs."""
+    for attempt in range(S3_RETRIES):
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+        except (ConnectionError, http.client.HTTPException):
+            conn.close()
+            status = None
+        else:
+            status = resp.status
+            if status != 503:
+                break
+        time.sleep(0.05 * 2**attempt)
+    if status not in ok:
+        raise RuntimeError(f"S3 {method} {path} failed ({status})")
+    return status, {k.lower(): v for k, v in resp.getheaders()}, data
+
+
+class _S3Writer:
+    """One object uploaded over its own connection in S3_PART_SIZE multipart
+    parts, as streamer uploads each stream."""
+
+    def __init__(self, url: str):
+        self.conn, bucket, key = _s3_connection(url)
+        self.path = f"/{quote(bucket)}/{quote(key)}"
+        self.buf = bytearray()
+        self.etags: list[str] = []
+        self.upload_id = None
+
+    def write(self, data) -> int:
+        self.buf += data
+        while len(self.buf) >= S3_PART_SIZE:
+            self._part(bytes(self.buf[:S3_PART_SIZE]))
+            del self.buf[:S3_PART_SIZE]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def _part(self, data: bytes) -> None:
+        if self.upload_id is None:
+            _, _, body = _s3_request(self.conn, "POST", f"{self.path}?uploads")
+            self.upload_id = re.search(rb"<UploadId>(.+?)</UploadId>", body)[1].decode()
+        query = f"partNumber={len(self.etags) + 1}&uploadId={self.upload_id}"
+        _, headers, _ = _s3_request(self.conn, "PUT", f"{self.path}?{query}", data)
+        self.etags.append(headers.get("etag", ""))
+
+    def close(self) -> None:
+        try:
+            if self.upload_id is None:
+                _s3_request(self.conn, "PUT", self.path, bytes(self.buf))
+                return
+            if self.buf:
+                self._part(bytes(self.buf))
+            parts = "".join(
+                f"<Part><PartNumber>{i}</PartNumber><ETag>{etag}</ETag></Part>"
+                for i, etag in enumerate(self.etags, 1)
+            )
+            _s3_request(
+                self.conn,
+                "POST",
+                f"{self.path}?uploadId={self.upload_id}",
+                f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode(),
+            )
+        finally:
+            self.conn.close()
+
+
+class _S3Reader:
+    """Sequential reads of one object through ranged GETs of S3_PART_SIZE."""
+
+    def __init__(self, url: str):
+        self.conn, bucket, key = _s3_connection(url)
+        self.path = f"/{quote(bucket)}/{quote(key)}"
+        self.offset = 0
+        self.buf = bytearray()
+        self.eof = False
+
+    def _fetch(self) -> None:
+        end = self.offset + S3_PART_SIZE - 1
+        status, _, data = _s3_request(
+            self.conn,
+            "GET",
+            self.path,
+            headers={"Range": f"bytes={self.offset}-{end}"},
+            ok=(200, 206, 416),
+        )
+        if status == 416:  # past the end
+            data = b""
+        self.buf += data
+        self.offset += len(data)
+        self.eof = status != 206 or len(data) < S3_PART_SIZE
+
+    def read(self, n: int = -1) -> bytes:
+        while not self.eof and (n < 0 or len(self.buf) < n):
+            self._fetch()
+        n = len(self.buf) if n < 0 else n
+        out = bytes(self.buf[:n])
+        del self.buf[:n]
+        return out
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def object_sizes(directory) -> dict[str, int]:
+    """Size of every file of a dump directory, or object under an s3:// prefix."""
+    if not is_s3(directory):
+        return {
+            name: os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory)
+        }
+    conn, bucket, prefix = _s3_connection(str(directory).rstrip("/") + "/")
+    try:
+        _, _, body = _s3_request(
+            conn, "GET", f"/{quote(bucket)}?list-type=2&prefix={quote(prefix)}"
+        )
+    finally:
+        conn.close()
+    sizes = {}
+    for element in ET.fromstring(body).iter():
+        if element.tag.rsplit("}", 1)[-1] == "Contents":
+            fields = {child.tag.rsplit("}", 1)[-1]: child.text for child in element}
+            sizes[fields["Key"][len(prefix) :]] = int(fields["Size"])
+    return sizes
+
+
+def remove(directory) -> None:
+    """Delete a dump directory or the objects under an s3:// prefix."""
+    if not is_s3(directory):
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    names = object_sizes(directory)
+    conn, bucket, prefix = _s3_connection(str(directory).rstrip("/") + "/")
+    try:
+        for name in names:
+            _s3_request(conn, "DELETE", f"/{quote(bucket)}/{quote(prefix + name)}")
+    finally:
+        conn.close()
+
+
+def _writer(path, compression: str, chunks: queue.Queue, errors: list) -> None:
+    """Drain one stream's chunk queue into its file."""
+    try:
+        out = open_stream(path, compression)
+        try:
+            while (data := chunks.get()) is not None:
+                out.write(data)
+        finally:
+            out.close()
+    except Exception as e:
+        errors.append(e)
+        while chunks.get() is not None:  # unblock the reader
+            pass
+
+
+def dump(
+    pid: int, directory: Path | str, compression: str = "none", streams: int = 0
+) -> dict:
+    """Freeze `pid` and write its anonymous memory to `directory`.
+
+    `streams=0` writes a single image inline, like cedana without streamer;
+    N > 0 round-robins chunks across N writer threads. The process is left
+    stopped until restore() resumes it. Returns the manifest. `directory` may
+    be an s3:// prefix, each stream then being one object.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'")
+    if not is_s3(directory):
+        Path(directory).mkdir(parents=True, exist_ok=True)
+    n_streams = max(1, streams)
+    names = [f"pages-{i}{STREAM_SUFFIX[compression]}" for i in range(n_streams)]
+    paths = [_join(directory, name) for name in names]
+
+    os.kill(pid, signal.SIGSTOP)
+    start = time.monotonic()
+
+    errors: list = []
+    queues = [queue.Queue(maxsize=4) for _ in range(n_streams)]
+    threads = []
+    if streams > 0:
+        for path, q in zip(paths, queues):
+            t = threading.Thread(target=_writer, args=(path, compression, q, errors))
+            t.start()
+            threads.append(t)
+        inline = None
+    else:
+        inline = open_stream(paths[0], compression)
+
+    chunks = []
+    try:
+        with open(f"/proc/{pid}/mem", "rb", buffering=0) as mem:
+            for start_addr, end_addr in anonymous_regions(pid):
+                for addr in range(start_addr, end_addr, CHUNK_SIZE):
+                    size = min(CHUNK_SIZE, end_addr - addr)
+                    try:
+                        mem.seek(addr)
+                        data = mem.read(size)
+                    except OSError:
+                        break  # guard pages and similar are unreadable
+                    stream = len(chunks) % n_streams
+                    chunks.append(
+                        {
+                            "addr": addr,
+                            "size": len(data),
+                            "stream": stream,
+                            "crc32": zlib.crc32(data),
+                        }
+                    )
+                    if inline is not None:
+                        inline.write(data)
+                    else:
+                        queues[stream].put(data)
+    finally:
+        if inline is not None:
+            inline.close()
+        for q, t in zip(queues, threads):
+            q.put(None)
+            t.join()
+
+    if errors:
+        raise errors[0]
+
+    manifest = {
+        "pid": pid,
+        "compression": compression,
+        "streams": streams,
+        "files": names,
+        "chunks": chunks,
+        "raw_bytes": sum(c["size"] for c in chunks),
+        "dump_seconds": time.monotonic() - start,
+    }
+    f = _open(_join(directory, MANIFEST), "wb")
+    try:
+        f.write(json.dumps(manifest).encode())
+    finally:
+        f.close()
+    return manifest
+
+
+def _verify_stream(path, compression: str, chunks: list[dict], errors: list) -> None:
+    try:
+        f = read_stream(path, compression)
+        try:
+            for chunk in chunks:
+                data = f.read(chunk["size"])
+                if len(data) != chunk["size"] or zlib.crc32(data) != chunk["crc32"]:
+                    raise RuntimeError(f"Corrupt chunk at {chunk['addr']:#x} in {path}")
+        finally:
+            f.close()
+    except Exception as e:
+        errors.append(e)
+
+
+def restore(directory: Path | str, resume: bool = True) -> dict:
+    """Read every stream back in parallel, verify each chunk and resume the process."""
+    f = _open(_join(directory, MANIFEST), "rb")
+    try:
+        manifest = json.loads(f.read())
+    finally:
+        f.close()
+
+    per_stream: list[list[dict]] = [[] for _ in manifest["files"]]
+    for chunk in manifest["chunks"]:
+        per_stream[chunk["stream"]].append(chunk)
+
+    errors: list = []
+    threads = [
+        threading.Thread(
+            target=_verify_stream,
+            args=(_join(directory, name), manifest["compression"], chunks, errors),
+        )
+        for name, chunks in zip(manifest["files"], per_stream)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+
+    if resume:
+        try:
+            os.kill(manifest["pid"], signal.SIGCONT)
+        except ProcessLookupError:
+            pass
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in checkpoint engine")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = sub.add_parser("dump", help="Checkpoint a running process")
+    dump_parser.add_argument("--pid", type=int, required=True)
+    dump_parser.add_argument(
+        "--dir", required=True, help="Dump directory or s3:// prefix"
+    )
+    dump_parser.add_argument("--compression", choices=COMPRESSIONS, default="none")
+    dump_parser.add_argument("--streams", type=int, default=0)
+
+    restore_parser = sub.add_parser("restore", help="Verify a dump and resume it")
+    restore_parser.add_argument("--dir", required=True)
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "dump":
+            manifest = dump(args.pid, args.dir, args.compression, args.streams)
+        else:
+            manifest = restore(args.dir)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    print(
+        f"{args.command}: {manifest['raw_bytes'] / 1024**2:.2f} MB in "
+        f"{len(manifest['chunks'])} chunks over {len(manifest['files'])} stream(s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
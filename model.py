@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+Checkpoint/Restore Time Model
+Fits a bottleneck model per storage target and phase to the results store:
+
+    time = overhead + raw_mb / min(codec_bw * k, storage_bw(k) * ratio,
+                                   network_bw * ratio)
+
+with k = max(1, streams). storage_bw(k) is a per-stream rate capped by an
+aggregate rate, or the curve measured by storage_bench.py; codec_bw is the
+single-thread codec rate, fitted or measured by codec_bench.py; the network
+cap only applies to remote targets. Reports the fit error per target, flags
+configurations the model doesn't explain and predicts the best configuration
+for a workload size and storage target without running it.
+"""
+
+import argparse
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import results_store
+import storage_bench
+from common import DEFAULT_STREAMS, parse_streams
+from compare_stats import DIMENSIONS, cell_frame, cell_keys
+
+REMOTE_STORAGE = {"s3", "cedana"}
+PHASES = {"checkpoint": "checkpoint_time", "restore": "restore_time"}
+# Microbenchmark columns that bound each phase.
+CODEC_COLUMNS = {"checkpoint": "compress_mbps", "restore": "decompress_mbps"}
+STORAGE_PHASES = {"checkpoint": "write", "restore": "read"}
+NETWORK_LINES = {"checkpoint": "Upload", "restore": "Download"}
+NETWORK_RE = re.compile(r"(Upload|Download): ([\d.]+) Mbit/s")
+LOG_BOUNDS = (np.log(1e-3), np.log(1e6))
+
+
+@dataclass
+class PhaseModel:
+    """Fitted parameters of one (storage, phase); rates in MB/s, overhead in s."""
+
+    storage: str
+    phase: str
+    # Fixed cost per workload, e.g. GPU state; others get the median.
+    overheads: dict[str, float] = field(default_factory=dict)
+    stream_mbps: float = np.inf
+    storage_mbps: float = np.inf
+    network_mbps: float = np.inf
+    codec_mbps: dict[str, float] = field(default_factory=dict)
+    # Measured storage MB/s per writer count; replaces the fitted curve.
+    ceiling: dict[int, float] | None = None
+    runs: int = 0
+
+    def storage_bw(self, k: np.ndarray) -> np.ndarray:
+        if self.ceiling:
+            writers = sorted(self.ceiling)
+            return np.interp(k, writers, [self.ceiling[w] for w in writers])
+        return np.minimum(self.stream_mbps * k, self.storage_mbps)
+
+    def limits(self, compression, streams, ratio=1.0) -> dict[str, np.ndarray]:
+        """Raw MB/s each resource allows; `none` has no codec bound."""
+        k = np.maximum(1, np.asarray(streams, dtype=float))
+        codec = np.array(
+            [self.codec_mbps.get(c, np.inf) for c in np.atleast_1d(compression)]
+        )
+        ratio = np.asarray(ratio, dtype=float)
+        return dict(
+            zip(
+                ["codec", "storage", "network"],
+                np.broadcast_arrays(
+                    codec * k, self.storage_bw(k) * ratio, self.network_mbps * ratio
+                ),
+            )
+        )
+
+    def overhead(self, workload) -> np.ndarray:
+        default = np.median(list(self.overheads.values()))
+        return np.array(
+            [self.overheads.get(w, default) for w in np.atleast_1d(workload)]
+        )
+
+    def predict(self, workload, raw_mb, compression, streams, ratio=1.0) -> np.ndarray:
+        bandwidth = np.minimum.reduce(
+            list(self.limits(compression, streams, ratio).values())
+        )
+        return self.overhead(workload) + np.asarray(raw_mb, dtype=float) / bandwidth
+
+    def bottleneck(self, compression, streams, ratio=1.0) -> np.ndarray:
+        limits = self.limits(compression, streams, ratio)
+        names = np.array(list(limits))
+        return names[np.argmin(np.stack(list(limits.values())), axis=0)]
+
+
+def least_squares(residuals, x0: np.ndarray, iterations: int = 200) -> np.ndarray:
+    """Levenberg-Marquardt with a forward-difference Jacobian."""
+    x = np.clip(np.asarray(x0, dtype=float), *LOG_BOUNDS)
+    r = residuals(x)
+    cost = r @ r
+    damping = 1e-3
+    for _ in range(iterations):
+        jac = np.empty((len(r), len(x)))
+        for i in range(len(x)):
+            step = np.zeros_like(x)
+            step[i] = 1e-6
+            jac[:, i] = (residuals(x + step) - r) / 1e-6
+        a, g = jac.T @ jac, jac.T @ r
+        while damping < 1e10:
+            dx = -np.linalg.solve(
+                a + damping * (np.diag(np.diag(a)) + 1e-9 * np.eye(len(x))), g
+            )
+            candidate = np.clip(x + dx, *LOG_BOUNDS)
+            new_r = residuals(candidate)
+            if (new_cost := new_r @ new_r) < cost:
+                break
+            damping *= 10
+        else:
+            return x
+        converged = cost - new_cost < 1e-10 * cost
+        x, r, cost, damping = candidate, new_r, new_cost, max(damping / 10, 1e-9)
+        if converged:
+            break
+    return x
+
+
+def fit_phase(
+    runs: pd.DataFrame,
+    storage: str,
+    phase: str,
+    codec_mbps: dict[str, float] | None = None,
+    ceiling: dict[int, float] | None = None,
+    network_mbps: float | None = None,
+) -> PhaseModel:
+    """Fit one (storage, phase) to runs with raw_mb, ratio, compression,
+    streams and the phase's time column. Measured rates are held fixed."""
+    measured = codec_mbps or {}
+    times = runs[PHASES[phase]].to_numpy(dtype=float)
+    raw = runs["raw_mb"].to_numpy(dtype=float)
+    rate = raw / times
+
+    workloads = sorted(set(runs["workload"]))
+    names = [f"overhead:{w}" for w in workloads]
+    x0 = [0.5 * times[runs["workload"] == w].min() for w in workloads]
+    if not ceiling:
+        names.append("stream_mbps")
+        x0.append(np.median(rate))
+    if not ceiling and storage not in REMOTE_STORAGE:
+        names.append("storage_mbps")
+        x0.append(2 * rate.max())
+    if storage in REMOTE_STORAGE and network_mbps is None:
+        names.append("network_mbps")
+        x0.append(2 * rate.max())
+    fitted_codecs = sorted(set(runs["compression"]) - set(measured) - {"none"})
+    for codec in fitted_codecs:
+        names.append(codec)
+        x0.append(np.median(rate[runs["compression"] == codec]))
+
+    model = PhaseModel(storage, phase, ceiling=ceiling, runs=len(runs))
+    if network_mbps is not None:
+        model.network_mbps = network_mbps
+
+    def apply(x: np.ndarray) -> PhaseModel:
+        values = dict(zip(names, np.exp(x)))
+        model.overheads = {w: values[f"overhead:{w}"] for w in workloads}
+        for name in ("stream_mbps", "storage_mbps", "network_mbps"):
+            if name in values:
+                setattr(model, name, values[name])
+        model.codec_mbps = {**measured, **{c: values[c] for c in fitted_codecs}}
+        return model
+
+    args = (runs["compression"].to_numpy(), runs["streams"], runs["ratio"])
+    workload = runs["workload"].to_numpy()
+
+    def residuals(x: np.ndarray) -> np.ndarray:
+        # Relative error, so slow and fast targets weigh the same.
+        return np.log(apply(x).predict(workload, raw, *args)) - np.log(times)
+
+    return apply(least_squares(residuals, np.log(x0)))
+
+
+def codec_bench_rates(paths: list[Path]) -> tuple[dict, pd.DataFrame]:
+    """Single-thread MB/s per phase and codec, and the ratio per (workload,
+    codec), from codec_bench.py CSVs. Only the levels streamer uses count."""
+    if not paths:
+        return {}, pd.DataFrame(columns=["workload", "compression", "ratio"])
+    df = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    df = df[df["codec"] != "zstd"].rename(columns={"codec": "compression"})
+    single = df[df["threads"] == 1].groupby("compression")
+    rates = {
+        phase: {
+            codec: mbps
+            for codec, mbps in single[column].median().items()
+            if codec != "none"
+        }
+        for phase, column in CODEC_COLUMNS.items()
+    }
+    ratios = df.groupby(["workload", "compression"], as_index=False)["ratio"].median()
+    return rates, ratios
+
+
+def network_rates(path: Path) -> dict[str, float]:
+    """MB/s per phase from a speedtest log such as network_speeds."""
+    found = dict(NETWORK_RE.findall(path.read_text()))
+    return {
+        phase: float(found[line]) * 1e6 / 8 / 1024**2
+        for phase, line in NETWORK_LINES.items()
+        if line in found
+    }
+
+
+def with_ratios(df: pd.DataFrame, bench_ratios: pd.DataFrame) -> pd.DataFrame:
+    """Add `ratio`: measured, else codec_bench's for the workload, else 1."""
+    df = results_store.with_throughput(df)
+    bench = df.merge(bench_ratios, on=["workload", "compression"], how="left")["ratio"]
+    df["ratio"] = (
+        df["compression_ratio"].fillna(pd.Series(bench.to_numpy(), index=df.index))
+    ).fillna(1.0)
+    df.loc[df["compression"].isin(["none", "tar"]), "ratio"] = 1.0
+    return df
+
+
+def unconstrained(df: pd.DataFrame) -> pd.DataFrame:
+    """Runs of one job at a time, without I/O limits, at the workload's own
+    size and restored from a warm cache: the runs the model describes."""
+    keep = (
+        df["io_limit"].isna()
+        & df["concurrency"].fillna(1).eq(1)
+        & df["size_gb"].isna()
+        & df["cache"].fillna("warm").eq("warm")
+    )
+    return df[keep]
+
+
+def newest_experiment(df: pd.DataFrame) -> str:
+    """The experiment with the latest run; experiments may run different
+    engine builds and machines, so one model shouldn't mix them."""
+    return df.groupby("experiment")["timestamp"].max().idxmax()
+
+
+def fit(
+    df: pd.DataFrame,
+    codec_rates: dict | None = None,
+    ceilings: dict | None = None,
+    network: dict | None = None,
+) -> dict[tuple[str, str], PhaseModel]:
+    """(storage, phase) -> fitted model. `ceilings` maps phase to the
+    storage_bench curve of the local target; `network` maps phase to MB/s."""
+    codec_rates, ceilings, network = codec_rates or {}, ceilings or {}, network or {}
+    models = {}
+    for storage, runs in df.groupby("storage"):
+        for phase, column in PHASES.items():
+            models[storage, phase] = fit_phase(
+                runs[runs[column] > 0],
+                storage,
+                phase,
+                codec_rates.get(phase),
+                ceilings.get(phase) if storage not in REMOTE_STORAGE else None,
+                network.get(phase) if storage in REMOTE_STORAGE else None,
+            )
+    return models
+
+
+def predictions(df: pd.DataFrame, models: dict) -> pd.DataFrame:
+    """Add predicted_<phase>, bottleneck_<phase> and predicted_total_time."""
+    df = df.copy()
+    for phase in PHASES:
+        df[f"predicted_{phase}"] = np.nan
+        df[f"bottleneck_{phase}"] = None
+        for storage, runs in df.groupby("storage"):
+            model = models[storage, phase]
+            args = (runs["compression"].to_numpy(), runs["streams"], runs["ratio"])
+            df.loc[runs.index, f"predicted_{phase}"] = model.predict(
+                runs["workload"].to_numpy(), runs["raw_mb"], *args
+            )
+            df.loc[runs.index, f"bottleneck_{phase}"] = model.bottleneck(*args)
+    df["predicted_total_time"] = df["predicted_checkpoint"] + df["predicted_restore"]
+    return df
+
+
+def fit_errors(df: pd.DataFrame) -> pd.DataFrame:
+    """Median and mean absolute percentage error per storage and phase."""
+    rows = []
+    for storage, runs in df.groupby("storage"):
+        for phase, column in PHASES.items():
+            error = (runs[f"predicted_{phase}"] / runs[column] - 1).abs() * 100
+            rows.append(
+                {
+                    "storage": storage,
+                    "phase": phase,
+                    "runs": len(runs),
+                    "median_error_pct": error.median(),
+                    "mean_error_pct": error.mean(),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def deviations(df: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """Cells whose median measured total time is off the model by > threshold."""
+    keys = cell_keys(df)
+    cells = (
+        cell_frame(df, keys)
+        .groupby(keys, as_index=False, dropna=False)
+        .agg(
+            runs=("total_time", "size"),
+            measured=("total_time", "median"),
+            predicted=("predicted_total_time", "median"),
+            checkpoint_bottleneck=("bottleneck_checkpoint", "first"),
+            restore_bottleneck=("bottleneck_restore", "first"),
+        )
+    )
+    cells["deviation"] = cells["measured"] / cells["predicted"] - 1
+    flagged = cells[cells["deviation"].abs() > threshold]
+    return flagged.sort_values("deviation", key=abs, ascending=False)
+
+
+def recommend(
+    models: dict,
+    storage: str,
+    workload: str | None,
+    raw_mb: float,
+    ratios: dict[str, float],
+    streams: list[int],
+) -> pd.DataFrame:
+    """Predicted times of every compression x streams config, best first;
+    ties go to fewer streams."""
+    codecs = sorted(
+        {"none"}
+        | set(models[storage, "checkpoint"].codec_mbps)
+        & set(models[storage, "restore"].codec_mbps)
+    )
+    grid = pd.DataFrame(
+        [(c, s) for c in codecs for s in streams], columns=["compression", "streams"]
+    )
+    ratio = grid["compression"].map(ratios).fillna(1.0)
+    for phase in PHASES:
+        model = models[storage, phase]
+        args = (grid["compression"].to_numpy(), grid["streams"], ratio)
+        grid[phase] = model.predict(workload, raw_mb, *args)
+        grid[f"{phase}_bottleneck"] = model.bottleneck(*args)
+    grid["total"] = grid["checkpoint"] + grid["restore"]
+    grid["total"] = grid["total"].round(3)
+    return grid.sort_values(["total", "streams"]).reset_index(drop=True)
+
+
+def _rate(mbps: float, unit: str = " MB/s") -> str:
+    # A rate that ran into the bound never limits a run: the data can't tell.
+    if mbps >= np.exp(LOG_BOUNDS[1]) * 0.99:
+        return "unbounded"
+    return f"{mbps:.0f}{unit}"
+
+
+def describe(model: PhaseModel) -> str:
+    if model.ceiling:
+        storage = "measured storage ceiling"
+    else:
+        storage = f"storage {_rate(model.stream_mbps)} per stream"
+        if np.isfinite(model.storage_mbps):
+            storage += f" up to {_rate(model.storage_mbps)}"
+    network = (
+        f", network {_rate(model.network_mbps)}"
+        if np.isfinite(model.network_mbps)
+        else ""
+    )
+    codecs = ", ".join(
+        f"{c} {_rate(v, '')}" for c, v in sorted(model.codec_mbps.items())
+    )
+    overheads = ", ".join(f"{w} {v:.2f}s" for w, v in sorted(model.overheads.items()))
+    return (
+        f"overhead {overheads}; {storage}{network}; " f"codec MB/s per stream: {codecs}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fit a bottleneck model of C/R time and predict configurations"
+    )
+    parser.add_argument(
+        "--experiment",
+        action="append",
+        help="Fit runs of these experiments, pooled (default: the newest)",
+    )
+    parser.add_argument(
+        "--storage-bench",
+        type=Path,
+        default=Path("results/storage_bench.csv"),
+        help="storage_bench.py CSV giving the local storage curve, used if it "
+        "exists (default: results/storage_bench.csv)",
+    )
+    parser.add_argument(
+        "--codec-bench",
+        type=Path,
+        nargs="*",
+        default=sorted(Path("results").glob("**/codec_*.csv")),
+        help="codec_bench.py CSVs giving codec rates and ratios "
+        "(default: results/**/codec_*.csv)",
+    )
+    parser.add_argument(
+        "--network",
+        type=Path,
+        help="Speedtest log (like network_speeds) fixing the remote network "
+        "rate; fitted if omitted",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Flag cells deviating from the model by more than this (default: 0.25)",
+    )
+    parser.add_argument(
+        "--predict-gb",
+        type=float,
+        help="Recommend a configuration for a workload of this many GB",
+    )
+    parser.add_argument(
+        "--storage", default="local", help="Storage target to predict for"
+    )
+    parser.add_argument(
+        "--workload",
+        help="Workload whose compression ratios to use for the prediction",
+    )
+    parser.add_argument(
+        "--streams",
+        type=parse_streams,
+        default=DEFAULT_STREAMS,
+        help="Stream counts to consider, e.g. 0-32 "
+        f"(default: {','.join(map(str, DEFAULT_STREAMS))})",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        help="Write every run with its predicted times to this CSV",
+    )
+
+    args = parser.parse_args()
+
+    codec_rates, bench_ratios = codec_bench_rates(args.codec_bench)
+    ceilings = {}
+    if args.storage_bench.exists():
+        ceilings = {
+            phase: storage_bench.ceiling(args.storage_bench, kind) or None
+            for phase, kind in STORAGE_PHASES.items()
+        }
+        print(f"Local storage curve from {args.storage_bench}")
+    for path in args.codec_bench:
+        print(f"Codec rates from {path}")
+    network = network_rates(args.network) if args.network else {}
+
+    filters = {"experiment": args.experiment} if args.experiment else {}
+    df = unconstrained(results_store.query(mem_limit_mb=None, **filters))
+    if df.empty:
+        print("Error: no runs to fit")
+        return 1
+    if not args.experiment:
+        experiment = newest_experiment(df)
+        df = df[df["experiment"] == experiment]
+        print(f"Fitting experiment {experiment}, the newest (see --experiment)")
+    df = with_ratios(df, bench_ratios)
+    models = fit(df, codec_rates, ceilings, network)
+    df = predictions(df, models)
+
+    print("\n=== Fitted model per storage target ===")
+    errors = fit_errors(df)
+    for row in errors.itertuples():
+        model = models[row.storage, row.phase]
+        print(
+            f"{row.storage} {row.phase}: {row.runs} runs, median error "
+            f"{row.median_error_pct:.1f}%, mean {row.mean_error_pct:.1f}%\n"
+            f"  {describe(model)}"
+        )
+
+    flagged = deviations(df, args.threshold)
+    print(f"\n=== Cells deviating from the model by > {args.threshold:.0%} ===")
+    if flagged.empty:
+        print("None")
+    for row in flagged.itertuples():
+        dimensions = "".join(
+            f" {key}={getattr(row, key)}"
+            for key in DIMENSIONS
+            if key in flagged and getattr(row, key) is not None
+        )
+        print(
+            f"{row.storage} {row.workload} {row.compression}/{row.streams}"
+            f"{dimensions}: "
+            f"measured {row.measured:.2f}s, model {row.predicted:.2f}s "
+            f"({row.deviation:+.0%}, bottlenecks {row.checkpoint_bottleneck}/"
+            f"{row.restore_bottleneck})"
+        )
+
+    if args.predict_gb:
+        if (args.storage, "checkpoint") not in models:
+            print(f"Error: no runs on storage '{args.storage}' to predict from")
+            return 1
+        ratios = {}
+        if args.workload:
+            ratios = (
+                df[df["workload"] == args.workload]
+                .groupby("compression")["ratio"]
+                .median()
+                .to_dict()
+            )
+        grid = recommend(
+            models,
+            args.storage,
+            args.workload,
+            args.predict_gb * 1024,
+            ratios,
+            args.streams,
+        )
+        best = grid.iloc[0]
+        print(
+            f"\n=== Predicted for {args.predict_gb:g} GB on {args.storage} "
+            f"(ratios of {args.workload or 'no workload, assumed 1'}) ==="
+        )
+        print(grid.head(10).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
+        print(
+            f"\nRecommended: {best['compression']} with {best['streams']} streams, "
+            f"{best['total']:.2f}s predicted total"
+        )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(args.output, index=False)
+        print(f"\nPredictions saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
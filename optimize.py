@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Configuration Optimizer
+Searches compression x stream count per (workload, storage) target, and the
+memory budget too if the spec sets mem_limits_mb, with successive halving on
+measured total_time: every candidate gets a few runs, the best 1/eta survive
+and get eta times more, until one remains. This finds the best configuration
+with far fewer C/R cycles than repeating the full grid.
+"""
+
+import argparse
+import asyncio
+import csv
+import time
+from pathlib import Path
+
+import numpy as np
+
+import cgroups
+from backends import Backend, CommandError, get_backend
+from bench import (
+    Case,
+    Killed,
+    ResultWriter,
+    SweepSpec,
+    capture_system_info,
+    limits,
+    pin_checkpointer,
+    run_case,
+    s3_standin,
+)
+from common import DEFAULT_STREAMS, parse_streams
+
+TRACE_FIELDS = [
+    "workload",
+    "storage",
+    "round",
+    "compression",
+    "streams",
+    "mem_limit_mb",
+    "runs",
+    "median_total_time",
+    "promoted",
+]
+
+
+def check_searchable(spec: SweepSpec) -> None:
+    """Refuse specs with dimensions the search doesn't cover, rather than
+    silently searching without them."""
+    unsupported = [
+        name
+        for name, value in (
+            ("io_limits", spec.io_limits),
+            ("concurrency", spec.concurrency),
+            ("sizes_gb", spec.sizes_gb),
+            ("caches", set(spec.caches or []) - {"warm"}),
+        )
+        if value
+    ]
+    if unsupported:
+        raise ValueError(
+            f"optimize.py doesn't search {', '.join(unsupported)}; sweep them "
+            "with bench.py"
+        )
+
+
+async def successive_halving(
+    backend: Backend,
+    spec: SweepSpec,
+    writer: ResultWriter,
+    workload: str,
+    storage: str,
+    configs: list[tuple[str, int, int | None]],
+    eta: int,
+    min_runs: int,
+    job_base: str,
+    limiter=None,
+) -> tuple[tuple[str, int, int | None], list[dict], int]:
+    """Return the best (compression, streams, mem_limit_mb) for one target,
+    the search trace and the number of C/R cycles spent.
+
+    A run the OOM killer ends counts as infinitely slow, so budgets too tight
+    for a configuration drop out in the first round.
+    """
+    samples: dict[tuple, list[float]] = {config: [] for config in configs}
+    survivors = list(configs)
+    trace = []
+    round_ = 0
+    runs_per_config = min_runs
+
+    while True:
+        round_ += 1
+        print(
+            f"\n=== {workload} on {storage}: round {round_}, "
+            f"{len(survivors)} candidates x {runs_per_config} runs ==="
+        )
+        for config in survivors:
+            while len(samples[config]) < runs_per_config:
+                compression, streams, mem_limit_mb = config
+                case = Case(
+                    workload,
+                    storage,
+                    compression,
+                    streams,
+                    len(samples[config]) + 1,
+                    mem_limit_mb=mem_limit_mb,
+                )
+                name = f"{compression}/{streams}"
+                if mem_limit_mb:
+                    name += f"/{mem_limit_mb}MB"
+                try:
+                    row = await run_case(backend, spec, case, job_base, writer, limiter)
+                except Killed as e:
+                    print(f"  {name}: KILLED: {e}")
+                    samples[config].append(float("inf"))
+                except CommandError as e:
+                    print(f"  {name}: ERROR: {e}")
+                    samples[config].append(float("inf"))
+                else:
+                    writer.write(case, row)
+                    samples[config].append(float(row["total_time"]))
+                    print(f"  {name}: {row['total_time']} s")
+                await asyncio.sleep(spec.pause)
+
+        ranked = sorted(survivors, key=lambda c: np.median(samples[c]))
+        keep = ranked[: max(1, len(ranked) // eta)]
+        for config in survivors:
+            trace.append(
+                {
+                    "workload": workload,
+                    "storage": storage,
+                    "round": round_,
+                    "compression": config[0],
+                    "streams": config[1],
+                    "mem_limit_mb": config[2] or "",
+                    "runs": len(samples[config]),
+                    "median_total_time": f"{np.median(samples[config]):.3f}",
+                    "promoted": config in keep,
+                }
+            )
+
+        if len(keep) == 1:
+            return keep[0], trace, sum(len(v) for v in samples.values())
+        survivors = keep
+        runs_per_config *= eta
+
+
+async def optimize(
+    spec: SweepSpec, output_dir: Path, streams: list[int], eta: int, min_runs: int
+) -> list[dict]:
+    """Search every (workload, storage) target in the spec; return the winners."""
+    check_searchable(spec)
+    backend = get_backend(spec.backend, **spec.backend_options)
+    await backend.setup()
+    if (spec.cpus or {}).get("checkpointer"):
+        await pin_checkpointer(spec, backend)
+
+    writer = ResultWriter(output_dir)
+    job_base = f"search-job-{int(time.time())}"
+    configs = [
+        (c, s, m)
+        for c in spec.compressions
+        for s in streams
+        for m in spec.mem_limits_mb or [None]
+    ]
+    best = []
+
+    trace_path = output_dir / "search_trace.csv"
+    async with limits(spec, backend, output_dir) as limiter:
+        with open(trace_path, "w", newline="") as f:
+            trace_writer = csv.DictWriter(f, fieldnames=TRACE_FIELDS)
+            trace_writer.writeheader()
+
+            for workload in spec.workloads:
+                for storage in spec.storage:
+                    config, trace, cycles = await successive_halving(
+                        backend,
+                        spec,
+                        writer,
+                        workload,
+                        storage,
+                        configs,
+                        eta,
+                        min_runs,
+                        job_base,
+                        limiter,
+                    )
+                    trace_writer.writerows(trace)
+                    f.flush()
+
+                    compression, stream_count, mem_limit_mb = config
+                    best.append(
+                        {
+                            "workload": workload,
+                            "storage": storage,
+                            "compression": compression,
+                            "streams": stream_count,
+                            "mem_limit_mb": mem_limit_mb,
+                            "median_total_time": next(
+                                row["median_total_time"]
+                                for row in reversed(trace)
+                                if (
+                                    row["compression"],
+                                    row["streams"],
+                                    row["mem_limit_mb"] or None,
+                                )
+                                == config
+                            ),
+                            "cycles": cycles,
+                            "grid_cycles": len(configs) * spec.runs,
+                        }
+                    )
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Find the best compression/stream count per storage target"
+    )
+    parser.add_argument("spec", type=Path, help="Sweep spec JSON file")
+    parser.add_argument(
+        "--output-dir", "-o", type=Path, help="Override the spec's output_dir"
+    )
+    parser.add_argument(
+        "--streams",
+        type=parse_streams,
+        default=DEFAULT_STREAMS,
+        help="Stream counts to search, e.g. 0,2,4,8 or 0-32 "
+        f"(default: {','.join(map(str, DEFAULT_STREAMS))})",
+    )
+    parser.add_argument(
+        "--eta",
+        type=int,
+        default=3,
+        help="Keep the best 1/eta candidates each round (default: 3)",
+    )
+    parser.add_argument(
+        "--min-runs",
+        type=int,
+        default=1,
+        help="Runs per candidate in the first round (default: 1)",
+    )
+
+    args = parser.parse_args()
+
+    spec = SweepSpec.from_file(args.spec)
+    output_dir = args.output_dir or Path(spec.output_dir) / "search"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    capture_system_info(output_dir / "system_info.txt")
+
+    try:
+        with s3_standin(spec, output_dir):
+            best = asyncio.run(
+                optimize(spec, output_dir, args.streams, args.eta, args.min_runs)
+            )
+    except (CommandError, cgroups.CgroupError, ValueError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    print("\n=== Best configuration per target ===")
+    for row in best:
+        budget = f" in {row['mem_limit_mb']} MB" if row["mem_limit_mb"] else ""
+        print(
+            f"{row['workload']} on {row['storage']}: {row['compression']} with "
+            f"{row['streams']} streams{budget} "
+            f"({row['median_total_time']}s median total, "
+            f"{row['cycles']} C/R cycles vs {row['grid_cycles']} for the full grid)"
+        )
+    print(f"\nSearch trace saved to: {output_dir / 'search_trace.csv'}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,49 +1,41 @@
+from pathlib import Path
+
 import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import numpy as np
 
+import results_store
+from compare_stats import METRICS, distribution_stats
+from report import Figure, render_all
 
-def load_data():
-    local_df = pd.read_csv("results/v2/5_runs_gpu_local_storage_stress.csv")
-    s3_df = pd.read_csv("results/v2/5_runs_s3_gpu.csv")
-    cedana_df = pd.read_csv("results/v2/5_runs_cedana_gpu.csv")
+# README figure tag per workload.
+WORKLOADS = {"cuda_stress": "gpu", "stress_py": "cpu"}
+# stat_type -> compare_stats.distribution_stats column suffix
+STAT_TYPES = {"min": "min", "median": "p50", "p90": "p90", "p99": "p99", "max": "max"}
 
-    local_df["storage"] = "local"
-    s3_df["storage"] = "s3"
-    cedana_df["storage"] = "cedana"
 
-    return pd.concat([local_df, s3_df, cedana_df], ignore_index=True)
+def load_data():
+    return results_store.query(
+        experiment="v2", workload=list(WORKLOADS), mem_limit_mb=None
+    )
 
 
 def calculate_stats(df):
-    stats = []
-    for compression in df["compression"].unique():
-        for streams in df["streams"].unique():
-            for storage in ["local", "s3", "cedana"]:
-                subset = df[
-                    (df["compression"] == compression)
-                    & (df["streams"] == streams)
-                    & (df["storage"] == storage)
-                ]
-
-                if len(subset) > 0:
-                    for stat_type, func in [("min", np.min), ("median", np.median)]:
-                        stats.append(
-                            {
-                                "compression": compression,
-                                "streams": streams,
-                                "storage": storage,
-                                "stat_type": stat_type,
-                                "checkpoint_time": func(subset["checkpoint_time"]),
-                                "restore_time": func(subset["restore_time"]),
-                                "total_time": func(subset["total_time"]),
-                            }
-                        )
-
-    return pd.DataFrame(stats)
-
-
-def plot_graph(stats_df, stat_type):
+    """Long-format min/median/p90/p99/max per compression, streams and storage."""
+    stats = distribution_stats(df, ["compression", "streams", "storage"])
+    frames = []
+    for stat_type, suffix in STAT_TYPES.items():
+        frame = stats[["compression", "streams", "storage"]].assign(stat_type=stat_type)
+        for metric in METRICS:
+            frame[metric] = stats[f"{metric}_{suffix}"]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def plot_graph(stats_df, stat_type, output):
     compressions = sorted(stats_df["compression"].unique())
     streams = [0, 2, 4, 8]
     storages = ["local", "s3", "cedana"]
@@ -141,23 +133,39 @@ def plot_graph(stats_df, stat_type):
                 if "restore" not in by_label:
                     by_label[f"{storage} (restore)"] = handle
 
-        ax.legend(by_label.values(), by_label.keys(), bbox_to_anchor=(1.02, 1), loc="upper left")
+        ax.legend(
+            by_label.values(),
+            by_label.keys(),
+            bbox_to_anchor=(1.02, 1),
+            loc="upper left",
+        )
         ax.grid(axis="y", alpha=0.3)
 
     plt.tight_layout()
     plt.subplots_adjust(right=0.85)
-    output_file = f"plots/stream_benchmarks_gpu_{stat_type}.png"
-    plt.savefig(output_file, dpi=300, bbox_inches="tight")
-    print(f"Saved {output_file}")
-    plt.close()
+    fig.savefig(output, dpi=300, bbox_inches="tight")
+    plt.close(fig)
+
+
+def figure_specs(df):
+    """Min, median and p90 figures per workload, from v2 runs without a memory limit."""
+    figures = []
+    for workload, tag in WORKLOADS.items():
+        stats_df = calculate_stats(df[df["workload"] == workload])
+        for stat_type in ["min", "median", "p90"]:
+            figures.append(
+                Figure(
+                    Path(f"plots/stream_benchmarks_{tag}_{stat_type}.png"),
+                    plot_graph,
+                    {"stats_df": stats_df, "stat_type": stat_type},
+                )
+            )
+    return figures
 
 
 def main():
-    df = load_data()
-    stats_df = calculate_stats(df)
-
-    for stat_type in ["min", "median"]:
-        plot_graph(stats_df, stat_type)
+    for output_file in render_all(figure_specs(load_data())):
+        print(f"Saved {output_file}")
 
 
 if __name__ == "__main__":
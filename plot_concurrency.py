@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Node Concurrency Chart
+Charts a bench.py sweep run with `concurrency`: for each compression, the
+aggregate GB/s dumped, the batch makespan and the per-job latency (median
+with p90 whiskers) against the number of jobs checkpointed at once, one line
+per stream count. Shows whether per-job streams still help once the node is
+saturated; the best stream count per job count is printed too.
+"""
+
+import argparse
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import results_store
+from report import Figure, render_all
+
+TARGET = ["storage", "workload"]
+
+
+def load_data(results_dir: Path) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Batch summaries and per-job rows of a concurrency sweep."""
+    batches = []
+    for path in sorted(results_dir.glob("*_batches.csv")):
+        df = pd.read_csv(path)
+        describe = results_store.describe_file(
+            path.with_name(path.name.replace("_batches", ""))
+        )
+        df["storage"], df["workload"] = describe["storage"], describe["workload"]
+        batches.append(df)
+    if not batches:
+        raise ValueError(f"no *_batches.csv under {results_dir}")
+
+    jobs = [
+        results_store.load_csv(path) for path in results_store.discover(results_dir)
+    ]
+    jobs = pd.concat(jobs, ignore_index=True).dropna(subset=["concurrency"])
+    return pd.concat(batches, ignore_index=True), jobs
+
+
+def best_streams(batches: pd.DataFrame, metric: str = "total_makespan") -> pd.DataFrame:
+    """Stream count with the lowest median `metric` per compression and K."""
+    medians = (
+        batches.groupby(["compression", "concurrency", "streams"])[metric]
+        .median()
+        .reset_index()
+    )
+    best = medians.loc[medians.groupby(["compression", "concurrency"])[metric].idxmin()]
+    return best.rename(columns={metric: f"median_{metric}"}).reset_index(drop=True)
+
+
+def plot_concurrency(batches, jobs, output, title=""):
+    """Rows: compressions. Columns: GB/s, makespan, per-job latency vs K."""
+    compressions = sorted(batches["compression"].unique())
+    fig, axes = plt.subplots(
+        len(compressions), 3, figsize=(16, 4 * len(compressions)), squeeze=False
+    )
+    for row, compression in enumerate(compressions):
+        ax_gbps, ax_makespan, ax_latency = axes[row]
+        batch = batches[batches["compression"] == compression]
+        job = jobs[jobs["compression"] == compression]
+        for streams, group in batch.groupby("streams"):
+            medians = group.groupby("concurrency")[
+                ["checkpoint_gbps", "total_makespan"]
+            ].median()
+            for ax, column in (
+                (ax_gbps, "checkpoint_gbps"),
+                (ax_makespan, "total_makespan"),
+            ):
+                ax.plot(
+                    medians.index,
+                    medians[column],
+                    marker="o",
+                    label=f"{streams} streams",
+                )
+
+            latency = job[job["streams"] == streams].groupby("concurrency")[
+                "total_time"
+            ]
+            p50, p90 = latency.median(), latency.quantile(0.9)
+            ax_latency.errorbar(
+                p50.index,
+                p50.values,
+                yerr=[p50.values * 0, (p90 - p50).values],
+                marker="o",
+                capsize=3,
+                label=f"{streams} streams",
+            )
+
+        ax_gbps.set_ylabel(f"{compression}\naggregate dump GB/s (raw)")
+        ax_makespan.set_ylabel("batch makespan, dump + restore (s)")
+        ax_latency.set_ylabel("per-job C/R time, p50 to p90 (s)")
+        for ax in axes[row]:
+            ax.set_xscale("log", base=2)
+            ax.set_xticks(sorted(batch["concurrency"].unique()))
+            ax.get_xaxis().set_major_formatter(matplotlib.ticker.ScalarFormatter())
+            ax.set_ylim(bottom=0)
+            ax.grid(alpha=0.3)
+    for ax in axes[-1]:
+        ax.set_xlabel("concurrent jobs")
+    axes[0][0].legend()
+    fig.suptitle(title or "Concurrent checkpoint/restore")
+    fig.tight_layout()
+    fig.savefig(output, dpi=200, bbox_inches="tight")
+    plt.close(fig)
+
+
+def figure_specs(batches, jobs, output_prefix):
+    """One chart per storage target and workload of the sweep."""
+    return [
+        Figure(
+            Path(f"{output_prefix}_{storage}_{workload}.png"),
+            plot_concurrency,
+            {
+                "batches": group,
+                "jobs": jobs[
+                    (jobs["storage"] == storage) & (jobs["workload"] == workload)
+                ],
+                "title": f"{workload} on {storage}: concurrent checkpoint/restore",
+            },
+        )
+        for (storage, workload), group in batches.groupby(TARGET)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chart node-level C/R throughput against concurrent jobs"
+    )
+    parser.add_argument(
+        "--input",
+        "-i",
+        type=Path,
+        default=Path("results/concurrency"),
+        help="Output directory of the concurrency sweep (default: results/concurrency)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Output file prefix (default: <input>/concurrency)",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        batches, jobs = load_data(args.input)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    for (storage, workload), group in batches.groupby(TARGET):
+        print(f"\nFastest stream count per job count, {workload} on {storage}:")
+        print(best_streams(group).to_string(index=False))
+
+    prefix = args.output or str(args.input / "concurrency")
+    for path in render_all(figure_specs(batches, jobs, prefix)):
+        print(f"Saved: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
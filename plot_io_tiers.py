@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Storage Speed Tier Heatmap
+Charts a bench.py sweep run with io_limits: one row per storage speed tier,
+one column per compression x streams configuration, coloured by the median
+time relative to the tier's best configuration, which is outlined. Shows how
+the best stream count and codec move as the dump target gets slower.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import results_store
+from report import Figure, render_all
+
+METRICS = ["total_time", "checkpoint_time", "restore_time"]
+
+
+def load_data(results_dir: Path) -> tuple[pd.DataFrame, dict]:
+    """Runs of an io_limits sweep, and its tiers from io_limits.json in order."""
+    frames = [
+        results_store.load_csv(path) for path in results_store.discover(results_dir)
+    ]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if df.empty or df["io_limit"].isna().all():
+        raise ValueError(f"no runs with an io_limit under {results_dir}")
+    df = df.dropna(subset=["io_limit"])
+
+    info_path = results_dir / "io_limits.json"
+    tiers = json.loads(info_path.read_text())["tiers"] if info_path.exists() else {}
+    for tier in df["io_limit"].unique():
+        tiers.setdefault(tier, {})
+    return df, tiers
+
+
+def tier_label(tier: str, limits: dict) -> str:
+    """Tier name over its limits, e.g. "gp3\\n125 MB/s r, 125 MB/s w"."""
+    parts = [
+        f"{limits[k]:g} MB/s {k[0]}" for k in ("rbps_mb", "wbps_mb") if k in limits
+    ]
+    parts += [f"{limits[k]:g} {k}" for k in ("riops", "wiops") if k in limits]
+    return f"{tier}\n{', '.join(parts) or 'unlimited'}"
+
+
+def best_per_tier(df: pd.DataFrame, metric: str = "total_time") -> pd.DataFrame:
+    """The configuration with the lowest median `metric` in each tier."""
+    medians = (
+        df.groupby(["io_limit", "compression", "streams"])[metric]
+        .median()
+        .reset_index()
+    )
+    best = medians.loc[medians.groupby("io_limit")[metric].idxmin()]
+    return best.rename(columns={metric: f"median_{metric}"}).reset_index(drop=True)
+
+
+def plot_heatmap(df, tiers, output, metric="total_time", title=""):
+    """Tiers x configurations heatmap of median `metric`, annotated in seconds."""
+    configs = sorted(
+        df[["compression", "streams"]].drop_duplicates().itertuples(index=False)
+    )
+    names = [tier for tier in tiers if tier in set(df["io_limit"])]
+    medians = df.groupby(["io_limit", "compression", "streams"])[metric].median()
+
+    seconds = np.full((len(names), len(configs)), np.nan)
+    for i, tier in enumerate(names):
+        for j, config in enumerate(configs):
+            seconds[i, j] = medians.get((tier, *config), np.nan)
+    relative = seconds / np.nanmin(seconds, axis=1, keepdims=True)
+
+    fig, ax = plt.subplots(figsize=(2 + 0.7 * len(configs), 1.5 + 0.8 * len(names)))
+    image = ax.imshow(
+        relative,
+        cmap="RdYlGn_r",
+        vmin=1,
+        vmax=max(1.01, min(3, np.nanmax(relative))),
+        aspect="auto",
+    )
+    for i in range(len(names)):
+        for j in range(len(configs)):
+            if not np.isnan(seconds[i, j]):
+                ax.text(
+                    j, i, f"{seconds[i, j]:.3g}", ha="center", va="center", fontsize=8
+                )
+        best = np.nanargmin(seconds[i])
+        ax.add_patch(
+            plt.Rectangle(
+                (best - 0.5, i - 0.5), 1, 1, fill=False, edgecolor="black", lw=2.5
+            )
+        )
+
+    ax.set_xticks(range(len(configs)))
+    ax.set_xticklabels([f"{c}/{s}" for c, s in configs], rotation=45, ha="right")
+    ax.set_yticks(range(len(names)))
+    ax.set_yticklabels([tier_label(tier, tiers[tier]) for tier in names], fontsize=8)
+    ax.set_xlabel("compression / streams")
+    ax.set_title(title or f"Median {metric.replace('_', ' ')} (s) per storage tier")
+    fig.colorbar(image, ax=ax, label="relative to the tier's best (outlined)")
+    fig.tight_layout()
+    fig.savefig(output, dpi=200, bbox_inches="tight")
+    plt.close(fig)
+
+
+def figure_specs(df, tiers, output_prefix, metric="total_time"):
+    """One heatmap per storage target and workload of the sweep."""
+    figures = []
+    for (storage, workload), group in df.groupby(["storage", "workload"]):
+        figures.append(
+            Figure(
+                Path(f"{output_prefix}_{storage}_{workload}_{metric}.png"),
+                plot_heatmap,
+                {
+                    "df": group,
+                    "tiers": tiers,
+                    "metric": metric,
+                    "title": f"{workload} on {storage}: median "
+                    f"{metric.replace('_', ' ')} (s) per storage tier",
+                },
+            )
+        )
+    return figures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Heatmap of the best C/R configuration per storage speed tier"
+    )
+    parser.add_argument(
+        "--input",
+        "-i",
+        type=Path,
+        default=Path("results/io-tiers"),
+        help="Output directory of the io_limits sweep (default: results/io-tiers)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Output file prefix (default: <input>/io_tiers)",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=METRICS,
+        default="total_time",
+        help="Time to compare configurations on (default: total_time)",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        df, tiers = load_data(args.input)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    for (storage, workload), group in df.groupby(["storage", "workload"]):
+        print(f"\nBest configuration per tier, {workload} on {storage}:")
+        best = best_per_tier(group, args.metric).set_index("io_limit")
+        print(best.reindex([t for t in tiers if t in best.index]).to_string())
+
+    prefix = args.output or str(args.input / "io_tiers")
+    for path in render_all(figure_specs(df, tiers, prefix, args.metric)):
+        print(f"Saved: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Memory Budget Chart
+Charts C/R time against the checkpointer's memory budget for a bench.py
+sweep run with mem_limits_mb, one line per compression x streams
+configuration. Budgets where the OOM killer fired are marked, and for each
+configuration it picks the smallest budget whose median time stays within a
+tolerance of the unlimited runs, with no kills at it or any larger budget.
+"""
+
+import argparse
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import results_store
+from report import Figure, render_all
+
+METRICS = ["total_time", "checkpoint_time", "restore_time"]
+# The same less bench.py's CLI round-trip baseline, for sweeps that have one.
+METRICS += ["total_net_time", "checkpoint_net_time", "restore_net_time"]
+CONFIG = ["compression", "streams"]
+# One chart per target; io_limit is "" unless the sweep also had io tiers.
+TARGET = ["storage", "workload", "io_limit"]
+
+
+def load_data(results_dir: Path) -> pd.DataFrame:
+    """Every run of a memory-limit sweep, including killed ones (no times)."""
+    frames = []
+    for path in results_store.discover(results_dir):
+        df = pd.read_csv(path)
+        if "memory_status" not in df:
+            continue
+        for key in ("storage", "workload"):
+            df[key] = results_store.describe_file(path)[key]
+        df["io_limit"] = df["io_limit"].fillna("") if "io_limit" in df else ""
+        frames.append(df)
+    if not frames:
+        raise ValueError(f"no memory-limit sweep results under {results_dir}")
+    return pd.concat(frames, ignore_index=True)
+
+
+def smallest_limits(
+    df: pd.DataFrame, metric: str = "total_time", tolerance: float = 0.05
+) -> pd.DataFrame:
+    """Smallest safe budget per configuration of one storage/workload.
+
+    The baseline is the median of the unlimited runs, or of the largest
+    budget if the sweep has none. A budget is safe if no run was killed and
+    its median is within `tolerance` of the baseline, and so is every larger
+    budget. Also reports the cgroup peak of the unlimited runs, the memory
+    the configuration takes when left alone.
+    """
+    rows = []
+    for (compression, streams), group in df.groupby(CONFIG):
+        unlimited = group[group["mem_limit_mb"].isna()]
+        limits = sorted(group["mem_limit_mb"].dropna().unique())
+        if not unlimited.empty:
+            baseline = unlimited[metric].median()
+        elif limits:
+            baseline = group.loc[group["mem_limit_mb"] == limits[-1], metric].median()
+        else:
+            continue
+        peak = unlimited[["checkpoint_memory_peak_mb", "restore_memory_peak_mb"]].max(
+            axis=None
+        )
+
+        smallest = None
+        for limit in reversed(limits):
+            runs = group[group["mem_limit_mb"] == limit]
+            if (runs["memory_status"] == "killed").any():
+                break
+            if not runs[metric].median() <= baseline * (1 + tolerance):
+                break
+            smallest = limit
+        rows.append(
+            {
+                "compression": compression,
+                "streams": streams,
+                f"unlimited_{metric}": round(baseline, 2),
+                "unlimited_peak_mb": peak,
+                "smallest_limit_mb": smallest,
+                f"{metric}_at_limit": (
+                    round(
+                        group.loc[group["mem_limit_mb"] == smallest, metric].median(), 2
+                    )
+                    if smallest is not None
+                    else None
+                ),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def plot_budget(df, output, metric="total_time", title=""):
+    """Median `metric` vs memory budget per configuration; kills marked with x."""
+    limits = sorted(df["mem_limit_mb"].dropna().unique())
+    # Unlimited runs are drawn one step past the largest budget.
+    positions = {limit: i for i, limit in enumerate(limits)}
+    unlimited_x = len(limits)
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for (compression, streams), group in df.groupby(CONFIG):
+        x = group["mem_limit_mb"].map(positions).fillna(unlimited_x)
+        medians = group.assign(x=x).groupby("x")[metric].median().dropna()
+        (line,) = ax.plot(
+            medians.index, medians.values, marker="o", label=f"{compression}/{streams}"
+        )
+        throttled = group.assign(x=x)[group["memory_status"] == "throttled"]
+        throttled = throttled.groupby("x")[metric].median().dropna()
+        ax.scatter(
+            throttled.index,
+            throttled.values,
+            s=90,
+            facecolors="none",
+            edgecolors=line.get_color(),
+        )
+        killed = sorted(set(x[group["memory_status"] == "killed"]))
+        ax.scatter(
+            killed,
+            np.zeros(len(killed)),
+            marker="x",
+            s=80,
+            color=line.get_color(),
+            clip_on=False,
+        )
+
+    ax.set_xticks(range(len(limits) + 1))
+    ax.set_xticklabels([f"{limit:g}" for limit in limits] + ["none"])
+    ax.set_xlabel("memory.max of the checkpointer (MB)")
+    ax.set_ylabel(f"median {metric.replace('_', ' ')} (s)")
+    ax.set_ylim(bottom=0)
+    ax.set_title(
+        title
+        or f"Median {metric.replace('_', ' ')} vs memory budget\n"
+        "(ringed: throttled, x: OOM killed)"
+    )
+    ax.legend(title="compression/streams", bbox_to_anchor=(1.02, 1), loc="upper left")
+    ax.grid(alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(output, dpi=200, bbox_inches="tight")
+    plt.close(fig)
+
+
+def figure_specs(df, output_prefix, metric="total_time"):
+    """One chart per storage target, workload and io tier of the sweep."""
+    figures = []
+    for (storage, workload, io_limit), group in df.groupby(TARGET):
+        target = f"{storage}_{io_limit}" if io_limit else storage
+        on = f"{storage} ({io_limit})" if io_limit else storage
+        figures.append(
+            Figure(
+                Path(f"{output_prefix}_{target}_{workload}_{metric}.png"),
+                plot_budget,
+                {
+                    "df": group,
+                    "metric": metric,
+                    "title": f"{workload} on {on}: median "
+                    f"{metric.replace('_', ' ')} vs memory budget\n"
+                    "(ringed: throttled, x: OOM killed)",
+                },
+            )
+        )
+    return figures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chart C/R time against the checkpointer's memory budget"
+    )
+    parser.add_argument(
+        "--input",
+        "-i",
+        type=Path,
+        default=Path("results/mem-limits"),
+        help="Output directory of the mem_limits_mb sweep (default: results/mem-limits)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Output file prefix (default: <input>/mem_limits)",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=METRICS,
+        default="total_time",
+        help="Time to judge budgets on (default: total_time)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.05,
+        help="Slowdown vs unlimited a budget may cause (default: 0.05)",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        df = load_data(args.input)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    for (storage, workload, io_limit), group in df.groupby(TARGET):
+        counts = group["memory_status"].fillna("").value_counts()
+        on = f"{storage} ({io_limit})" if io_limit else storage
+        print(
+            f"\n{workload} on {on}: "
+            + ", ".join(f"{n} {status or 'unmeasured'}" for status, n in counts.items())
+        )
+        table = smallest_limits(group, args.metric, args.tolerance)
+        print(table.to_string(index=False))
+
+    prefix = args.output or str(args.input / "mem_limits")
+    for path in render_all(figure_specs(df, prefix, args.metric)):
+        print(f"Saved: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -3,15 +3,29 @@
 
 from pathlib import Path
 
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+import results_store
+from report import Figure, render_all
+
+# "No mem limit" rows are the pre-change v2 sweeps; limited runs come from
+# the streamer-memory-limit sweeps (old-v-new holds copies of both).
+EXPERIMENTS = ["v2", "streamer-memory-limit"]
+
 
-def load_and_pick(csv_path: Path, streams: int, compressions: list[str]) -> pd.DataFrame:
-    """Load one CSV and return one row per compression for the selected stream count."""
-    df = pd.read_csv(csv_path)
-    picked = df[df["streams"] == streams].copy()
+def load_and_pick(
+    df: pd.DataFrame, mem_limit_mb: int | None, streams: int, compressions: list[str]
+) -> pd.DataFrame:
+    """Return one row per compression for the selected memory limit and stream count."""
+    if mem_limit_mb is None:
+        picked = df[df["mem_limit_mb"].isna() & (df["streams"] == streams)]
+    else:
+        picked = df[(df["mem_limit_mb"] == mem_limit_mb) & (df["streams"] == streams)]
 
     # Support multiple runs by averaging each metric per compression.
     picked = (
@@ -26,47 +40,29 @@ def load_and_pick(csv_path: Path, streams: int, compressions: list[str]) -> pd.D
 
     if picked[["checkpoint_time", "restore_time", "total_time"]].isna().any().any():
         missing = picked[picked["checkpoint_time"].isna()]["compression"].tolist()
-        raise ValueError(f"Missing compression rows in {csv_path}: {missing}")
+        raise ValueError(
+            f"Missing compression rows for {mem_limit_mb}MB/{streams} streams: {missing}"
+        )
 
     return picked
 
 
 def plot_for_stream(
-    base: Path,
+    output: Path,
+    df: pd.DataFrame,
     compressions: list[str],
     target_stream: int,
-    dataset_prefix: str,
     dataset_label: str,
     workload: str,
 ) -> Path:
-    """Create one grouped stacked chart for a target stream and return output path."""
-    out = (
-        base
-        / f"{dataset_prefix}_{workload}_checkpoint_restore_grouped_{target_stream}streams.png"
-    )
-
+    """Create one grouped stacked chart for a target stream from one
+    (storage, workload) slice of the store."""
     scenarios = [
-        ("0 streams", base / f"{dataset_prefix}_{workload}.csv", 0),
-        (
-            f"{target_stream} streams (no mem limit)",
-            base / f"{dataset_prefix}_{workload}.csv",
-            target_stream,
-        ),
-        (
-            f"{target_stream} streams (1000MB)",
-            base / f"{dataset_prefix}_{workload}_1000MB.csv",
-            target_stream,
-        ),
-        (
-            f"{target_stream} streams (250MB)",
-            base / f"{dataset_prefix}_{workload}_250MB.csv",
-            target_stream,
-        ),
-        (
-            f"{target_stream} streams (100MB)",
-            base / f"{dataset_prefix}_{workload}_100MB.csv",
-            target_stream,
-        ),
+        ("0 streams", None, 0),
+        (f"{target_stream} streams (no mem limit)", None, target_stream),
+        (f"{target_stream} streams (1000MB)", 1000, target_stream),
+        (f"{target_stream} streams (250MB)", 250, target_stream),
+        (f"{target_stream} streams (100MB)", 100, target_stream),
     ]
 
     # shape: [scenario_idx][compression_idx]
@@ -74,8 +70,8 @@ def plot_for_stream(
     restore_vals = []
     total_vals = []
 
-    for _, csv_path, streams in scenarios:
-        picked = load_and_pick(csv_path, streams, compressions)
+    for _, mem_limit_mb, streams in scenarios:
+        picked = load_and_pick(df, mem_limit_mb, streams, compressions)
         checkpoint_vals.append(picked["checkpoint_time"].to_numpy())
         restore_vals.append(picked["restore_time"].to_numpy())
         total_vals.append(picked["total_time"].to_numpy())
@@ -159,29 +155,50 @@ def plot_for_stream(
     ax.legend(handles=legend_comp, title="Bar Order in Each Group", loc="upper right")
 
     plt.tight_layout()
-    plt.savefig(out, dpi=300, bbox_inches="tight")
+    fig.savefig(output, dpi=300, bbox_inches="tight")
     plt.close(fig)
-    return out
+    return output
 
 
-def main() -> None:
-    base = Path("results/old-v-new")
+def figure_specs(
+    df: pd.DataFrame, base: Path = Path("results/old-v-new")
+) -> list[Figure]:
+    """One figure per workload, storage and target stream count."""
     compressions = ["none", "tar", "gzip", "lz4", "zlib"]
     datasets = [("local", "Local"), ("cedana", "Cedana")]
     workloads = ["stress_py", "cuda_stress"]
 
+    figures = []
     for workload in workloads:
         for dataset_prefix, dataset_label in datasets:
+            subset = df[
+                (df["storage"] == dataset_prefix) & (df["workload"] == workload)
+            ]
             for target_stream in (2, 4, 8):
-                out = plot_for_stream(
-                    base,
-                    compressions,
-                    target_stream,
-                    dataset_prefix,
-                    dataset_label,
-                    workload,
+                name = (
+                    f"{dataset_prefix}_{workload}_checkpoint_restore_grouped_"
+                    f"{target_stream}streams.png"
+                )
+                figures.append(
+                    Figure(
+                        base / name,
+                        plot_for_stream,
+                        {
+                            "df": subset,
+                            "compressions": compressions,
+                            "target_stream": target_stream,
+                            "dataset_label": dataset_label,
+                            "workload": workload,
+                        },
+                    )
                 )
-                print(f"Saved: {out}")
+    return figures
+
+
+def main() -> None:
+    df = results_store.query(experiment=EXPERIMENTS)
+    for out in render_all(figure_specs(df)):
+        print(f"Saved: {out}")
 
 
 if __name__ == "__main__":
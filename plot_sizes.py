@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Workload Size Scaling
+Fits C/R time against image size for a bench.py sweep run with sizes_gb,
+per compression x streams configuration:
+
+    time = overhead + image_gb * seconds_per_gb
+
+separating the fixed cost of a checkpoint from its per-byte cost. The image
+size is the measured raw_mb, or the requested size for runs without one.
+From the fits it finds the size above which each stream count beats the
+fewest streams by a tolerance, and recommends the fewest streams within the
+tolerance of the fastest for every swept size and any size passed with
+--predict-gb, e.g. the 8-24 GB jobs a test host can't hold.
+"""
+
+import argparse
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+import results_store
+from report import Figure, render_all
+
+METRICS = ["total_time", "checkpoint_time", "restore_time"]
+# The same less bench.py's CLI round-trip baseline, for sweeps that have one.
+METRICS += ["total_net_time", "checkpoint_net_time", "restore_net_time"]
+CONFIG = ["compression", "streams"]
+TARGET = ["storage", "workload"]
+
+
+def load_data(results_dir: Path) -> pd.DataFrame:
+    """Runs of a sizes_gb sweep, with the image size in GB of each."""
+    frames = [
+        results_store.load_csv(path) for path in results_store.discover(results_dir)
+    ]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if df.empty or df["size_gb"].isna().all():
+        raise ValueError(f"no runs with a size_gb under {results_dir}")
+    df = df.dropna(subset=["size_gb"])
+    df["image_gb"] = (df["raw_mb"] / 1024).fillna(df["size_gb"])
+    return df
+
+
+def fit_sizes(df: pd.DataFrame, metric: str = "total_time") -> pd.DataFrame:
+    """Least-squares overhead and per-GB cost per configuration.
+
+    Configurations swept at fewer than two sizes can't be fitted and are left
+    out.
+    """
+    rows = []
+    for (compression, streams), group in df.dropna(subset=[metric]).groupby(CONFIG):
+        if group["size_gb"].nunique() < 2:
+            continue
+        x, y = group["image_gb"].to_numpy(), group[metric].to_numpy()
+        per_gb, overhead = np.polyfit(x, y, 1)
+        residuals = y - (overhead + per_gb * x)
+        r2 = 1 - (residuals @ residuals) / (((y - y.mean()) ** 2).sum() or np.inf)
+        rows.append(
+            {
+                "compression": compression,
+                "streams": streams,
+                "overhead_s": overhead,
+                "s_per_gb": per_gb,
+                "mbps": 1024 / per_gb if per_gb > 0 else np.inf,
+                "r2": r2,
+                "runs": len(group),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def helps_above(fits: pd.DataFrame, tolerance: float = 0.1) -> pd.DataFrame:
+    """Image size from which each stream count beats the compression's fewest
+    streams by `tolerance`: 0 if it always does, NaN if it never does."""
+    rows = []
+    for compression, group in fits.groupby("compression"):
+        base = group.loc[group["streams"].idxmin()]
+        for fit in group.itertuples():
+            # base(s) > (1 + tolerance) * fit(s), solved for s
+            gain = base.s_per_gb - (1 + tolerance) * fit.s_per_gb
+            cost = (1 + tolerance) * fit.overhead_s - base.overhead_s
+            if fit.streams == base.streams:
+                size = np.nan
+            elif gain > 0:
+                size = max(0.0, cost / gain)
+            else:
+                size = 0.0 if cost < 0 else np.nan
+            rows.append(
+                {
+                    "compression": compression,
+                    "streams": fit.streams,
+                    "helps_above_gb": size,
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def recommend_streams(
+    fits: pd.DataFrame, sizes_gb: list[float], tolerance: float = 0.1
+) -> pd.DataFrame:
+    """Fewest streams predicted within `tolerance` of the fastest, per
+    compression and image size."""
+    rows = []
+    for compression, group in fits.groupby("compression"):
+        group = group.sort_values("streams")
+        for size in sizes_gb:
+            predicted = group["overhead_s"] + group["s_per_gb"] * size
+            best = predicted.min()
+            fewest = group.loc[predicted <= best * (1 + tolerance), "streams"].iloc[0]
+            rows.append(
+                {
+                    "compression": compression,
+                    "image_gb": size,
+                    "fastest_streams": group.loc[predicted.idxmin(), "streams"],
+                    "recommended_streams": fewest,
+                    "predicted_s": round(best, 2),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def plot_scaling(df, fits, output, metric="total_time", title=""):
+    """Columns: compressions. Rows: time and throughput vs image size, with
+    the fitted lines dashed."""
+    compressions = sorted(df["compression"].unique())
+    fig, axes = plt.subplots(
+        2, len(compressions), figsize=(5 * len(compressions), 9), squeeze=False
+    )
+    span = np.geomspace(df["image_gb"].min(), df["image_gb"].max(), 50)
+    for col, compression in enumerate(compressions):
+        ax_time, ax_rate = axes[0][col], axes[1][col]
+        for streams, group in df[df["compression"] == compression].groupby("streams"):
+            medians = group.groupby("size_gb")[["image_gb", metric]].median()
+            (line,) = ax_time.plot(
+                medians["image_gb"],
+                medians[metric],
+                marker="o",
+                linestyle="none",
+                label=f"{streams} streams",
+            )
+            ax_rate.plot(
+                medians["image_gb"],
+                medians["image_gb"] * 1024 / medians[metric],
+                marker="o",
+                color=line.get_color(),
+            )
+            fit = fits[
+                (fits["compression"] == compression) & (fits["streams"] == streams)
+            ]
+            if not fit.empty:
+                fitted = fit["overhead_s"].iloc[0] + fit["s_per_gb"].iloc[0] * span
+                ax_time.plot(span, fitted, "--", color=line.get_color(), alpha=0.7)
+                ax_rate.plot(
+                    span, span * 1024 / fitted, "--", color=line.get_color(), alpha=0.7
+                )
+
+        ax_time.set_title(compression)
+        ax_time.set_ylabel(f"{metric.replace('_', ' ')} (s)")
+        ax_rate.set_ylabel("raw image MB/s")
+        ax_rate.set_xlabel("image size (GB)")
+        for ax in (ax_time, ax_rate):
+            ax.set_xscale("log")
+            ax.grid(alpha=0.3)
+        ax_time.set_yscale("log")
+        ax_rate.set_ylim(bottom=0)
+    axes[0][0].legend()
+    fig.suptitle(
+        title or f"{metric.replace('_', ' ').capitalize()} vs image size (dashed: fit)"
+    )
+    fig.tight_layout()
+    fig.savefig(output, dpi=200, bbox_inches="tight")
+    plt.close(fig)
+
+
+def figure_specs(df, output_prefix, metric="total_time"):
+    """One chart per storage target and workload of the sweep."""
+    return [
+        Figure(
+            Path(f"{output_prefix}_{storage}_{workload}_{metric}.png"),
+            plot_scaling,
+            {
+                "df": group,
+                "fits": fit_sizes(group, metric),
+                "metric": metric,
+                "title": f"{workload} on {storage}: "
+                f"{metric.replace('_', ' ')} vs image size (dashed: fit)",
+            },
+        )
+        for (storage, workload), group in df.groupby(TARGET)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fit C/R time against workload size and pick streams per size"
+    )
+    parser.add_argument(
+        "--input",
+        "-i",
+        type=Path,
+        default=Path("results/sizes"),
+        help="Output directory of the sizes_gb sweep (default: results/sizes)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Output file prefix (default: <input>/sizes)",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=METRICS,
+        default="total_time",
+        help="Time to fit (default: total_time)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Speedup more streams must bring to be worth it (default: 0.1)",
+    )
+    parser.add_argument(
+        "--predict-gb",
+        type=float,
+        nargs="+",
+        default=[],
+        help="Image sizes to recommend streams for besides the swept ones",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        df = load_data(args.input)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+    for (storage, workload), group in df.groupby(TARGET):
+        fits = fit_sizes(group, args.metric)
+        if fits.empty:
+            print(f"\n{workload} on {storage}: fewer than two sizes, nothing to fit")
+            continue
+        fits = fits.merge(helps_above(fits, args.tolerance), on=CONFIG)
+        print(
+            f"\nFixed and per-GB {args.metric} per configuration, {workload} on {storage}:"
+        )
+        print(fits.round(3).to_string(index=False))
+
+        swept = group.groupby("size_gb")["image_gb"].median()
+        sizes = sorted({*swept.round(3), *args.predict_gb})
+        print(f"\nStreams per image size, within {args.tolerance:.0%} of the fastest:")
+        print(recommend_streams(fits, sizes, args.tolerance).to_string(index=False))
+
+    prefix = args.output or str(args.input / "sizes")
+    for path in render_all(figure_specs(df, prefix, args.metric)):
+        print(f"Saved: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
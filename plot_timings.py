@@ -6,12 +6,21 @@ for different compression methods and stream counts.
 """
 
 import pandas as pd
+import matplotlib
+
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 import os
 import argparse
-from datetime import datetime
+from pathlib import Path
+
+import results_store
+from compare_stats import distribution_stats
+from report import Figure, render_all
+
+TIME_COLUMNS = ["checkpoint_time", "restore_time", "total_time"]
 
 
 def load_data(csv_file):
@@ -25,14 +34,31 @@ def load_data(csv_file):
     return df
 
 
-def prepare_data(df):
-    """Prepare data for visualization - calculate min, median, and std."""
+def to_throughput(df):
+    """Replace the three times with MB/s of raw checkpoint image moved.
+
+    Runs without a measured image size fall back to the workload's typical
+    size (see results_store.with_throughput).
+    """
+    df = results_store.with_throughput(df)
+    for col in TIME_COLUMNS:
+        df[col] = df[col.replace("_time", "_mbps")]
+    print(
+        "Image size per run: "
+        + ", ".join(f"{k}={v}" for k, v in df["size_source"].value_counts().items())
+    )
+    return df
+
+
+def prepare_data(df, best="min"):
+    """Prepare data for visualization - calculate best, median, and std.
+
+    `best` is "min" for times and "max" for throughput.
+    """
     # Group by compression and streams
-    grouped = df.groupby(["compression", "streams"])[
-        ["checkpoint_time", "restore_time", "total_time"]
-    ]
+    grouped = df.groupby(["compression", "streams"])[TIME_COLUMNS]
 
-    min_data = grouped.min().reset_index()
+    min_data = grouped.agg(best).reset_index()
     median_data = grouped.median().reset_index()
     std_data = grouped.std().reset_index()
 
@@ -45,14 +71,19 @@ def prepare_data(df):
     return min_data, median_data, std_data, has_multiple_runs
 
 
-def create_min_visualization(min_data, output_prefix="cedana_performance_min"):
+def create_min_visualization(
+    min_data,
+    output_prefix="cedana_performance_min",
+    title="Minimum Times",
+    ylabel="Time (seconds)",
+):
     """Create visualization showing only minimum times."""
 
     # Set up the plotting style
     plt.style.use("seaborn-v0_8-whitegrid")
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
     fig.suptitle(
-        "Cedana Checkpoint/Restore Performance - Minimum Times",
+        f"Cedana Checkpoint/Restore Performance - {title}",
         fontsize=16,
         fontweight="bold",
     )
@@ -125,7 +156,7 @@ def create_min_visualization(min_data, output_prefix="cedana_performance_min"):
 
         # Customize the subplot
         ax.set_xlabel("Compression Method", fontsize=12)
-        ax.set_ylabel("Time (seconds)", fontsize=12)
+        ax.set_ylabel(ylabel, fontsize=12)
         ax.set_title(title, fontsize=14, fontweight="bold")
         ax.set_xticks(x_pos)
         ax.set_xticklabels(compressions, fontsize=11)
@@ -156,27 +187,21 @@ def create_min_visualization(min_data, output_prefix="cedana_performance_min"):
     # Adjust layout and save
     plt.tight_layout()
 
-    # Save in multiple formats
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
     # High-resolution PNG
-    png_filename = f"{output_prefix}_{timestamp}.png"
-    plt.savefig(png_filename, dpi=300, bbox_inches="tight")
-    print(f"Saved minimum times PNG: {png_filename}")
-
-    # Also save a generic version without timestamp for easy reference
-    generic_png = f"{output_prefix}.png"
-    plt.savefig(generic_png, dpi=300, bbox_inches="tight")
-    print(f"Saved generic minimum times PNG: {generic_png}")
-
-    # Show the plot
-    plt.show()
+    png_filename = f"{output_prefix}.png"
+    fig.savefig(png_filename, dpi=300, bbox_inches="tight")
+    plt.close(fig)
 
     return png_filename
 
 
 def create_median_visualization(
-    median_data, std_data, has_multiple_runs, output_prefix="cedana_performance_median"
+    median_data,
+    std_data,
+    has_multiple_runs,
+    output_prefix="cedana_performance_median",
+    title="Median Times with Error Bars",
+    ylabel="Time (seconds)",
 ):
     """Create visualization showing median times with error bars."""
 
@@ -184,7 +209,7 @@ def create_median_visualization(
     plt.style.use("seaborn-v0_8-whitegrid")
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
     fig.suptitle(
-        "Cedana Checkpoint/Restore Performance - Median Times with Error Bars",
+        f"Cedana Checkpoint/Restore Performance - {title}",
         fontsize=16,
         fontweight="bold",
     )
@@ -275,7 +300,7 @@ def create_median_visualization(
 
         # Customize the subplot
         ax.set_xlabel("Compression Method", fontsize=12)
-        ax.set_ylabel("Time (seconds)", fontsize=12)
+        ax.set_ylabel(ylabel, fontsize=12)
         ax.set_title(title, fontsize=14, fontweight="bold")
         ax.set_xticks(x_pos)
         ax.set_xticklabels(compressions, fontsize=11)
@@ -312,25 +337,130 @@ def create_median_visualization(
     # Adjust layout and save
     plt.tight_layout()
 
-    # Save in multiple formats
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
     # High-resolution PNG
-    png_filename = f"{output_prefix}_{timestamp}.png"
-    plt.savefig(png_filename, dpi=300, bbox_inches="tight")
-    print(f"Saved median times PNG: {png_filename}")
+    png_filename = f"{output_prefix}.png"
+    fig.savefig(png_filename, dpi=300, bbox_inches="tight")
+    plt.close(fig)
 
-    # Also save a generic version without timestamp for easy reference
-    generic_png = f"{output_prefix}.png"
-    plt.savefig(generic_png, dpi=300, bbox_inches="tight")
-    print(f"Saved generic median times PNG: {generic_png}")
+    return png_filename
 
-    # Show the plot
-    plt.show()
+
+def create_ecdf_visualization(
+    df,
+    output_prefix="cedana_performance_ecdf",
+    title="Distribution of Times (ECDF)",
+    xlabel="Time (seconds)",
+):
+    """Create ECDF plots of every run, one line per configuration."""
+
+    plt.style.use("seaborn-v0_8-whitegrid")
+    fig, axes = plt.subplots(1, 3, figsize=(20, 7), sharey=True)
+    fig.suptitle(
+        f"Cedana Checkpoint/Restore Performance - {title}",
+        fontsize=16,
+        fontweight="bold",
+    )
+
+    compressions = sorted(df["compression"].unique())
+    streams = sorted(df["streams"].unique())
+    colors = dict(zip(compressions, plt.cm.tab10.colors))
+    linestyles = dict(zip(streams, ["-", "--", "-.", ":"] * len(streams)))
+
+    for ax, metric, name in zip(axes, TIME_COLUMNS, ["Checkpoint", "Restore", "Total"]):
+        for (compression, stream_count), group in df.groupby(
+            ["compression", "streams"]
+        ):
+            values = np.sort(group[metric].dropna().to_numpy())
+            if not len(values):
+                continue
+            ax.step(
+                values,
+                np.arange(1, len(values) + 1) / len(values),
+                where="post",
+                color=colors[compression],
+                linestyle=linestyles[stream_count],
+                label=f"{compression}/{stream_count}",
+            )
+        ax.axhline(0.9, color="gray", linewidth=0.8, linestyle=":")  # p90
+        ax.set_ylim(0, 1.02)
+        ax.set_xlabel(xlabel, fontsize=12)
+        ax.set_title(name, fontsize=14, fontweight="bold")
+        ax.grid(True, alpha=0.3)
+
+    axes[0].set_ylabel("Fraction of runs", fontsize=12)
+    axes[-1].legend(
+        title="compression/streams",
+        bbox_to_anchor=(1.02, 1),
+        loc="upper left",
+        fontsize=9,
+    )
+
+    plt.tight_layout()
+
+    png_filename = f"{output_prefix}.png"
+    fig.savefig(png_filename, dpi=300, bbox_inches="tight")
+    plt.close(fig)
 
     return png_filename
 
 
+METRIC_LABELS = {
+    "time": {
+        "ylabel": "Time (seconds)",
+        "min": "Minimum Times",
+        "median": "Median Times with Error Bars",
+        "ecdf": "Distribution of Times (ECDF)",
+        "suffix": "",
+    },
+    "throughput": {
+        "ylabel": "Throughput (MB/s)",
+        "min": "Best Throughput",
+        "median": "Median Throughput with Error Bars",
+        "ecdf": "Distribution of Throughput (ECDF)",
+        "suffix": "_throughput",
+    },
+}
+
+
+def render_figure(output, df, kind="min", metric="time"):
+    """Draw the min, median or ECDF chart of one timing CSV's runs to `output`."""
+    labels = METRIC_LABELS[metric]
+    best = "min"
+    if metric == "throughput":
+        df = to_throughput(df)
+        best = "max"
+    prefix = str(output).removesuffix(".png")
+    if kind == "ecdf":
+        return create_ecdf_visualization(df, prefix, labels["ecdf"], labels["ylabel"])
+
+    min_data, median_data, std_data, has_multiple_runs = prepare_data(df, best)
+    if kind == "min":
+        return create_min_visualization(
+            min_data, prefix, labels["min"], labels["ylabel"]
+        )
+    return create_median_visualization(
+        median_data,
+        std_data,
+        has_multiple_runs,
+        prefix,
+        labels["median"],
+        labels["ylabel"],
+    )
+
+
+def figure_specs(df, output_prefix, metric="time"):
+    """The min, median and ECDF figures for one set of runs."""
+    suffix = METRIC_LABELS[metric]["suffix"]
+    return [
+        Figure(
+            Path(f"{output_prefix}{suffix}_{kind}.png"),
+            render_figure,
+            {"df": df, "kind": kind, "metric": metric},
+        )
+        for kind in ("min", "median", "ecdf")
+    ]
+
+
 def create_table_border(widths, style="header"):
     """Create Unicode table border lines."""
     if style == "header":
@@ -516,6 +646,57 @@ def generate_summary_report(df, min_data, median_data):
 
     print(create_table_border(comp_widths, "footer"))
 
+    # Tail latency: SLOs are on the worst runs, not the best
+    print("\n" + "-" * 50)
+    print("TAIL LATENCY RANKING (by p90 total time)")
+    print("-" * 50)
+
+    tails = distribution_stats(df, ["compression", "streams"]).sort_values(
+        ["total_time_p90", "total_time_p50"]
+    )
+
+    tail_widths = [13, 9, 9, 9, 9, 9, 9, 7, 12]
+    tail_alignments = ["left", "center"] + ["right"] * 7
+    tail_headers = [
+        "Method", "Streams", "p50(s)", "p90(s)", "p99(s)", "Max(s)",
+        "IQR(s)", "CV(%)", "Restore p90",
+    ]  # fmt: skip
+
+    print(create_table_border(tail_widths, "header"))
+    print(format_table_row(tail_headers, tail_widths, ["center"] * 9))
+    print(create_table_border(tail_widths, "separator"))
+
+    for row in tails.itertuples(index=False):
+        cv = row.total_time_cv * 100 if row.runs > 1 else float("nan")
+        row_values = [
+            f"{row.compression:<12}",
+            f"{row.streams:^7}",
+            f"{row.total_time_p50:>8.3f}",
+            f"{row.total_time_p90:>8.3f}",
+            f"{row.total_time_p99:>8.3f}",
+            f"{row.total_time_max:>8.3f}",
+            f"{row.total_time_iqr:>8.3f}",
+            f"{cv:>6.1f}",
+            f"{row.restore_time_p90:>10.3f}s",
+        ]
+        print(format_table_row(row_values, tail_widths, tail_alignments))
+
+    print(create_table_border(tail_widths, "footer"))
+
+    worst_restore = tails.loc[tails["restore_time_max"].idxmin()]
+    print(
+        f"\nBest worst-case restore: {worst_restore['compression']} with "
+        f"{worst_restore['streams']} streams "
+        f"(max {worst_restore['restore_time_max']:.3f}s, "
+        f"p90 {worst_restore['restore_time_p90']:.3f}s)"
+    )
+    if tails["runs"].min() < 10:
+        print(
+            f"Note: p90/p99 are interpolated from {tails['runs'].min()} run(s) "
+            "per configuration; run bench.py with --adaptive or more --runs "
+            "for stable tails."
+        )
+
     print("\n" + "=" * 70)
 
 
@@ -541,6 +722,12 @@ def main():
         action="store_true",
         help="Only show plots, suppress summary report",
     )
+    parser.add_argument(
+        "--metric",
+        choices=["time", "throughput"],
+        default="time",
+        help="Chart seconds or MB/s of checkpoint image (default: time)",
+    )
 
     args = parser.parse_args()
 
@@ -552,18 +739,20 @@ def main():
         if not args.quiet:
             generate_summary_report(df, min_data, median_data)
 
-        # Create both visualizations
-        print("\nGenerating minimum times visualization...")
-        png_min = create_min_visualization(min_data, args.output + "_min")
+        if args.metric == "throughput":
+            df = df.assign(**results_store.describe_file(Path(args.input)))
 
-        print("\nGenerating median times visualization...")
-        png_median = create_median_visualization(
-            median_data, std_data, has_multiple_runs, args.output + "_median"
-        )
+        # Render both visualizations in parallel
+        print("\nGenerating minimum, median and ECDF visualizations...")
+        figures = figure_specs(df, args.output, args.metric)
+        if not render_all(figures):
+            print("Inputs unchanged, figures are up to date")
+        png_min, png_median, png_ecdf = (figure.output for figure in figures)
 
         print(f"\nVisualization complete!")
         print(f"Minimum times PNG: {png_min}")
         print(f"Median times PNG: {png_median}")
+        print(f"ECDF PNG: {png_ecdf}")
 
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Report Renderer
+Loads the results store once, builds the spec of every figure referenced by
+the READMEs and renders them in a process pool on the headless Agg backend.
+The plot scripts contribute figures through their figure_specs() functions
+and render their own subsets through render_all() too.
+
+A manifest records a content hash of each figure's input data, parameters
+and plotting code, including the repository modules it uses; figures whose
+hash and image are unchanged are skipped, and images the report no longer
+produces are pruned.
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import matplotlib
+import pandas as pd
+
+import results_store
+
+MANIFEST_PATH = Path(".figures.json")
+REPO_DIR = Path(__file__).resolve().parent
+# Copies plot_timings.py used to save next to each figure: <prefix>_<date>_<time>.png
+TIMESTAMPED_RE = re.compile(r"_\d{8}_\d{6}\.png$")
+
+# plot_timings.py figures in the READMEs: source CSV -> output prefix.
+TIMING_FIGURES = {
+    "results/v2/5_runs_s3_gpu.csv": "gpu_s3",
+    "results/v2/5_runs_cedana_gpu.csv": "gpu_cedana",
+    "results/v2/5_runs_gpu_local_storage_stress.csv": "gpu_local",
+    "results/v2/5_run_cpu_local_storage.csv": "cpu_local_storage",
+    "results/v1/3_runs_cedana_storage_timings.csv": "results/v1/3_runs_cedana",
+    "results/v1/3_runs_s3.csv": "results/v1/3_runs_s3",
+    "results/v1/3_runs_local.csv": "results/v1/3_runs_local",
+}
+
+
+@dataclass
+class Figure:
+    """One image: `render(output=output, **kwargs)` draws and saves it."""
+
+    output: Path
+    render: Callable
+    kwargs: dict = field(default_factory=dict)
+
+
+def _digest(value, h) -> None:
+    if isinstance(value, pd.DataFrame):
+        h.update(repr(list(value.columns)).encode())
+        h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            h.update(repr(key).encode())
+            _digest(value[key], h)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _digest(item, h)
+    else:
+        h.update(repr(value).encode())
+
+
+def _source_modules(name: str) -> list[str]:
+    """`name` and the modules of this repository it draws on, directly or
+    through each other (e.g. results_store.with_throughput)."""
+    found, todo = set(), [name]
+    while todo:
+        module = sys.modules[todo.pop()]
+        found.add(module.__name__)
+        for value in vars(module).values():
+            used = value if inspect.ismodule(value) else inspect.getmodule(value)
+            path = Path(getattr(used, "__file__", None) or "/").resolve()
+            if path.parent == REPO_DIR and used.__name__ not in found:
+                todo.append(used.__name__)
+    return sorted(found)
+
+
+def figure_hash(figure: Figure) -> str:
+    """Hash of the data, parameters and source modules that draw a figure."""
+    h = hashlib.sha256()
+    name = figure.render.__module__
+    h.update(f"{name}.{figure.render.__qualname__}".encode())
+    for module in _source_modules(name):
+        h.update(inspect.getsource(sys.modules[module]).encode())
+    _digest(figure.kwargs, h)
+    return h.hexdigest()
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict[str, dict]:
+    """Output path -> {hash, group} of every figure rendered so far."""
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict[str, dict], path: Path = MANIFEST_PATH) -> None:
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    tmp.replace(path)
+
+
+def _init_worker() -> None:
+    matplotlib.use("Agg")
+
+
+def _render(figure: Figure) -> Path:
+    figure.output.parent.mkdir(parents=True, exist_ok=True)
+    # Scripts set styles globally; keep them from leaking into later figures.
+    with matplotlib.rc_context():
+        figure.render(output=figure.output, **figure.kwargs)
+    return figure.output
+
+
+def render_all(
+    figures: list[Figure],
+    jobs: int | None = None,
+    manifest_path: Path | None = MANIFEST_PATH,
+    force: bool = False,
+    group: str | None = None,
+) -> list[Path]:
+    """Render the figures whose inputs changed, in parallel; return those paths.
+
+    jobs=1 renders in this process. With manifest_path=None, or force, every
+    figure is drawn. `group` tags the manifest entries so prune() can tell
+    which images a complete run owns.
+    """
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    hashes = {str(figure.output): figure_hash(figure) for figure in figures}
+    todo = [
+        figure
+        for figure in figures
+        if force
+        or not figure.output.exists()
+        or manifest.get(str(figure.output), {}).get("hash")
+        != hashes[str(figure.output)]
+    ]
+
+    if jobs == 1 or len(todo) <= 1:
+        _init_worker()
+        rendered = [_render(figure) for figure in todo]
+    else:
+        jobs = min(jobs or len(os.sched_getaffinity(0)), len(todo))
+        with ProcessPoolExecutor(jobs, initializer=_init_worker) as pool:
+            rendered = list(pool.map(_render, todo))
+
+    if manifest_path:
+        # Re-read so concurrent scripts' entries are not lost.
+        manifest = load_manifest(manifest_path)
+        for figure in todo:
+            key = str(figure.output)
+            manifest[key] = {"hash": hashes[key], "group": group}
+        save_manifest(manifest, manifest_path)
+    return rendered
+
+
+def prune(
+    figures: list[Figure], group: str, manifest_path: Path = MANIFEST_PATH
+) -> list[Path]:
+    """Delete images of `group` the figure set no longer produces, and the
+    timestamped copies next to the figures; return the removed paths."""
+    manifest = load_manifest(manifest_path)
+    keep = {str(figure.output) for figure in figures}
+    removed = []
+    for output, entry in list(manifest.items()):
+        if entry.get("group") == group and output not in keep:
+            Path(output).unlink(missing_ok=True)
+            del manifest[output]
+            removed.append(Path(output))
+
+    for directory in {figure.output.parent for figure in figures}:
+        prefixes = {figure.output.stem for figure in figures}
+        for path in directory.glob("*.png"):
+            stem = TIMESTAMPED_RE.sub("", path.name)
+            if stem != path.name and stem in prefixes:
+                path.unlink()
+                removed.append(path)
+    save_manifest(manifest, manifest_path)
+    return removed
+
+
+def readme_figures(df=None) -> list[Figure]:
+    """Every figure the READMEs embed, from one load of the results store."""
+    import plot_benchmarks
+    import plot_old_v_new_local
+    import plot_timings
+
+    if df is None:
+        df = results_store.query()
+
+    figures = plot_benchmarks.figure_specs(
+        df[(df["experiment"] == "v2") & df["mem_limit_mb"].isna()]
+    )
+    for source, prefix in TIMING_FIGURES.items():
+        figures += plot_timings.figure_specs(df[df["source"] == source], prefix)
+    figures += plot_old_v_new_local.figure_specs(
+        df[df["experiment"].isin(plot_old_v_new_local.EXPERIMENTS)]
+    )
+    return figures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Render every README figure from the results store"
+    )
+    parser.add_argument(
+        "--jobs", "-j", type=int, help="Worker processes (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="List the figures without rendering"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Redraw figures even if unchanged"
+    )
+    parser.add_argument(
+        "--no-prune",
+        action="store_true",
+        help="Keep images the report no longer produces",
+    )
+
+    args = parser.parse_args()
+
+    start = time.monotonic()
+    figures = readme_figures()
+    if args.list:
+        for figure in figures:
+            print(figure.output)
+        return 0
+
+    rendered = render_all(figures, args.jobs, force=args.force, group="readme")
+    for path in rendered:
+        print(f"Saved: {path}")
+    if not args.no_prune:
+        for path in prune(figures, "readme"):
+            print(f"Removed: {path}")
+    print(
+        f"\nRendered {len(rendered)} of {len(figures)} figures "
+        f"({len(figures) - len(rendered)} unchanged) in "
+        f"{time.monotonic() - start:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Consolidated Results Store
+Ingests every timing CSV under results/ into one typed, deduplicated Parquet
+dataset, adding the metadata that is otherwise only encoded in file names
+(experiment, storage, workload, memory limit) or adjacent logs/system info
+(cedana version, CPU model). Plot scripts read it through query(), which
+pushes filters down to the Parquet row groups.
+"""
+
+import argparse
+import re
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+RESULTS_DIR = Path("results")
+STORE_PATH = RESULTS_DIR / "results.parquet"
+
+# When the same measurement appears in several directories (old-v-new is
+# assembled from copies), the row is attributed to the earliest of these.
+EXPERIMENT_PRIORITY = ["v1", "v2", "streamer-memory-limit", "old-v-new"]
+
+TIMING_COLUMNS = ["checkpoint_time", "restore_time", "total_time"]
+SIZE_COLUMNS = ["raw_mb", "stored_mb"]
+
+# Approximate checkpoint sizes (results/old-v-new/README.md), used for runs
+# that predate artifact measurement and have no uncompressed dump to go by.
+NOMINAL_IMAGE_MB = {"cuda_stress": 700.0, "stress_py": 500.0}
+MEASUREMENT_KEY = [
+    "storage",
+    "workload",
+    "mem_limit_mb",
+    "io_limit",
+    "concurrency",
+    "job_index",
+    "size_gb",
+    "cache",
+    "compression",
+    "streams",
+    "run_number",
+    "timestamp",
+    *TIMING_COLUMNS,
+]
+
+SCHEMA = pa.schema(
+    [
+        ("experiment", pa.string()),
+        ("storage", pa.string()),
+        ("workload", pa.string()),
+        ("mem_limit_mb", pa.int32()),
+        ("io_limit", pa.string()),  # bench.py io_limits tier, null if none
+        ("concurrency", pa.int16()),  # jobs dumped at once, null if not swept
+        ("job_index", pa.int16()),
+        ("size_gb", pa.float64()),  # bench.py sizes_gb, null if not swept
+        ("cache", pa.string()),  # page cache state of restore, warm or cold
+        ("cli_baseline", pa.float64()),  # session's no-op CLI round trip (s)
+        ("compression", pa.string()),
+        ("streams", pa.int16()),
+        ("run_number", pa.int16()),
+        ("checkpoint_time", pa.float64()),
+        ("restore_time", pa.float64()),
+        ("total_time", pa.float64()),
+        ("raw_mb", pa.float64()),
+        ("stored_mb", pa.float64()),
+        ("timestamp", pa.timestamp("s", tz="UTC")),
+        ("cedana_version", pa.string()),
+        ("cpu_model", pa.string()),
+        ("source", pa.string()),
+    ]
+)
+
+STORAGE_TOKENS = ["local", "s3", "cedana"]
+# Non-default stress.py --profile values; sweeps name them stress_py_<profile>.
+STRESS_PROFILES = ["random", "repeat", "tensor", "mixture"]
+MEM_LIMIT_RE = re.compile(r"_(\d+)MB$")
+VERSION_RE = re.compile(r"cedana version (\S+)")
+CPU_RE = re.compile(r"Model name:\s+(.+)")
+
+
+def describe_file(csv_path: Path) -> dict:
+    """Infer experiment/storage/workload/memory limit from a CSV's path."""
+    stem = csv_path.stem
+    tokens = stem.split("_")
+
+    storage = next((t for t in tokens if t in STORAGE_TOKENS), "unknown")
+    if "cuda" in tokens or "gpu" in tokens:
+        workload = "cuda_stress"
+    else:
+        workload = "stress_py"  # v1 and the `cpu` runs use stress.py
+        profile = next((t for t in tokens if t in STRESS_PROFILES), None)
+        if profile:
+            workload += f"_{profile}"
+
+    match = MEM_LIMIT_RE.search(stem)
+    return {
+        "experiment": csv_path.parent.name,
+        "storage": storage,
+        "workload": workload,
+        "mem_limit_mb": int(match.group(1)) if match else None,
+    }
+
+
+def _token_key(path: Path, drop: set[str]) -> frozenset:
+    return frozenset(t for t in path.stem.split("_") if t not in drop)
+
+
+def find_companions(csv_path: Path) -> dict[str, Path | None]:
+    """Find the log and system info file that belong to a CSV.
+
+    Names are matched on their underscore-separated tokens, since the order
+    differs between files of one run (5_runs_s3_cpu.csv vs 5_runs_cpu_s3.log).
+    """
+    key = _token_key(csv_path, {"timings"})
+    companions = {"log": None, "system_info": None}
+    for path in csv_path.parent.iterdir():
+        if path.suffix == ".log" and _token_key(path, set()) == key:
+            companions["log"] = path
+        elif path.name.endswith("_system_info.txt"):
+            if _token_key(path, {"system", "info"}) == key:
+                companions["system_info"] = path
+    return companions
+
+
+def read_metadata(csv_path: Path) -> dict:
+    """Cedana version and CPU model from the CSV's log and system info."""
+    meta = {"cedana_version": None, "cpu_model": None}
+    companions = find_companions(csv_path)
+
+    for path in (companions["log"], companions["system_info"]):
+        if path is None:
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for _, line in zip(range(200), f):  # both appear in the header
+                if meta["cedana_version"] is None and (m := VERSION_RE.search(line)):
+                    meta["cedana_version"] = m.group(1)
+                if meta["cpu_model"] is None and (m := CPU_RE.search(line)):
+                    meta["cpu_model"] = m.group(1).strip()
+    return meta
+
+
+def load_csv(csv_path: Path) -> pd.DataFrame:
+    """Read one timing CSV and attach its metadata columns."""
+    df = pd.read_csv(csv_path)
+    for col in TIMING_COLUMNS + SIZE_COLUMNS + ["cli_baseline"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce") if col in df else None
+    df = df.dropna(subset=TIMING_COLUMNS)
+    for col in ("io_limit", "concurrency", "job_index", "size_gb", "cache"):
+        if col not in df:
+            df[col] = None
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+
+    meta = {**describe_file(csv_path), **read_metadata(csv_path)}
+    if "mem_limit_mb" in df:  # bench.py sweeps record the limit per row
+        limit = pd.to_numeric(df["mem_limit_mb"], errors="coerce")
+        meta["mem_limit_mb"] = limit.fillna(meta["mem_limit_mb"] or float("nan"))
+    for key, value in meta.items():
+        df[key] = value
+    df["source"] = str(csv_path)
+    return df
+
+
+def discover(results_dir: Path = RESULTS_DIR) -> list[Path]:
+    """All timing CSVs under results/, in experiment priority order."""
+
+    def priority(path: Path):
+        exp = path.parent.name
+        rank = EXPERIMENT_PRIORITY.index(exp) if exp in EXPERIMENT_PRIORITY else 99
+        return rank, str(path)
+
+    csvs = []
+    for path in results_dir.rglob("*.csv"):
+        with open(path) as f:
+            if "checkpoint_time" in f.readline():
+                csvs.append(path)
+    return sorted(csvs, key=priority)
+
+
+def build(results_dir: Path = RESULTS_DIR, store: Path = STORE_PATH) -> pa.Table:
+    """Ingest every CSV, drop duplicate measurements and write the Parquet store."""
+    frames = [load_csv(path) for path in discover(results_dir)]
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates(subset=MEASUREMENT_KEY, keep="first")
+    df = df.sort_values(["experiment", "storage", "workload", "compression", "streams"])
+
+    table = pa.Table.from_pandas(df[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+    store.parent.mkdir(parents=True, exist_ok=True)
+    # Small row groups keep min/max statistics selective for pushdown.
+    pq.write_table(table, store, row_group_size=256)
+    return table
+
+
+def is_stale(results_dir: Path = RESULTS_DIR, store: Path = STORE_PATH) -> bool:
+    """True if the store is missing, has an older schema or is older than any
+    CSV under results_dir."""
+    if not store.exists() or pq.read_schema(store).names != SCHEMA.names:
+        return True
+    built = store.stat().st_mtime
+    return any(p.stat().st_mtime > built for p in results_dir.rglob("*.csv"))
+
+
+def _expression(filters: dict):
+    expr = None
+    for column, value in filters.items():
+        if value is None:
+            term = pc.field(column).is_null()
+        elif isinstance(value, (list, tuple, set)):
+            term = pc.field(column).isin(list(value))
+        else:
+            term = pc.field(column) == value
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def query(
+    columns: list[str] | None = None,
+    store: Path = STORE_PATH,
+    rebuild: bool = True,
+    **filters,
+) -> pd.DataFrame:
+    """Load matching rows from the store as a DataFrame.
+
+    Keyword filters match a value, any of a list of values, or NULL for None,
+    e.g. query(storage="s3", streams=[0, 8], mem_limit_mb=None). The store is
+    rebuilt first if any CSV changed since it was written.
+    """
+    if rebuild and store == STORE_PATH and is_stale():
+        build()
+    dataset = ds.dataset(store, format="parquet")
+    table = dataset.to_table(columns=columns, filter=_expression(filters))
+    return table.to_pandas()
+
+
+def with_throughput(df: pd.DataFrame) -> pd.DataFrame:
+    """Add MB/s and compression-ratio columns to a frame of runs.
+
+    Runs without a measured raw size borrow the median raw size of the
+    uncompressed runs of the same workload, else the nominal image size;
+    `size_source` records which (measured, none_runs, nominal).
+    """
+    df = df.copy()
+    if "raw_mb" not in df:
+        df["raw_mb"] = float("nan")
+    if "stored_mb" not in df:
+        df["stored_mb"] = float("nan")
+
+    # An uncompressed dump stores the raw image as is.
+    plain = df["compression"] == "none"
+    df.loc[plain, "raw_mb"] = df.loc[plain, "raw_mb"].fillna(df["stored_mb"])
+
+    source = pd.Series("measured", index=df.index).where(df["raw_mb"].notna())
+    from_none = df["workload"].map(df[plain].groupby("workload")["raw_mb"].median())
+    df["raw_mb"] = df["raw_mb"].fillna(from_none)
+    source = source.fillna(
+        pd.Series("none_runs", index=df.index).where(from_none.notna())
+    )
+    df["raw_mb"] = df["raw_mb"].fillna(df["workload"].map(NOMINAL_IMAGE_MB))
+    df["size_source"] = source.fillna("nominal")
+
+    df["checkpoint_mbps"] = df["raw_mb"] / df["checkpoint_time"]
+    df["restore_mbps"] = df["raw_mb"] / df["restore_time"]
+    df["total_mbps"] = df["raw_mb"] / df["total_time"]
+    df["compression_ratio"] = df["raw_mb"] / df["stored_mb"]
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the consolidated Parquet results store"
+    )
+    parser.add_argument(
+        "--results-dir",
+        type=Path,
+        default=RESULTS_DIR,
+        help="Directory to scan for timing CSVs (default: results)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        default=STORE_PATH,
+        help="Parquet file to write (default: results/results.parquet)",
+    )
+
+    args = parser.parse_args()
+
+    table = build(args.results_dir, args.output)
+    df = table.to_pandas()
+    print(f"Wrote {len(df)} runs to {args.output}")
+    print(
+        df.groupby(["experiment", "storage", "workload"], dropna=False)["mem_limit_mb"]
+        .agg(lambda s: sorted(s.dropna().astype(int).unique().tolist()) or "-")
+        .to_string()
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
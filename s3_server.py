@@ -0,0 +1,705 @@
+#!/usr/bin/env python3
+"""
+Local S3 Stand-in
+A small asyncio, S3-compatible object server for running the s3:// sweeps
+offline: path-style buckets, PUT/GET/HEAD/DELETE, ListObjectsV2, multipart
+upload and ranged GET. Signatures are accepted without checking. Objects
+live in a directory that is removed on shutdown.
+
+The link can be shaped to study streamer under different networks: upload
+and download bandwidth per connection, an aggregate cap over all
+connections, latency added before every response and a request-rate limit
+answered with 503 SlowDown, like S3 does.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass, field
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape
+
+MB = 1024**2
+BLOCK = 64 * 1024
+UPLOADS = ".uploads"
+XMLNS = "http://s3.amazonaws.com/doc/2006-03-01/"
+REASONS = {
+    100: "Continue",
+    200: "OK",
+    204: "No Content",
+    206: "Partial Content",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    416: "Range Not Satisfiable",
+    500: "Internal Server Error",
+    503: "Slow Down",
+}
+
+
+@dataclass
+class Link:
+    """Shaping of the simulated link; 0 disables a limit. Rates in MB/s."""
+
+    conn_up_mbps: float = 0.0  # client -> server, per connection
+    conn_down_mbps: float = 0.0  # server -> client, per connection
+    total_mbps: float = 0.0  # both directions, all connections together
+    latency_ms: float = 0.0  # added before every response
+    rps: float = 0.0  # requests/s over all connections; excess gets 503
+
+
+LINK_PROFILES = {
+    "unlimited": Link(),
+    # results/v2 S3 minus local times of cuda_stress without compression: one
+    # connection uploads ~130 MB/s and downloads ~50 MB/s, 8 reach ~800 MB/s.
+    "s3": Link(
+        conn_up_mbps=130, conn_down_mbps=50, total_mbps=800, latency_ms=10, rps=3500
+    ),
+    "lan": Link(total_mbps=1100, latency_ms=0.2),  # 10 GbE
+    "wan": Link(
+        conn_up_mbps=10, conn_down_mbps=25, total_mbps=120, latency_ms=40, rps=100
+    ),
+}
+
+
+class Pacer:
+    """Async token bucket of `rate` units/s with bursts of `burst` (0 = unlimited).
+
+    Takers that overdraw sleep off their debt, so concurrent connections
+    sharing one pacer split its rate.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    async def take(self, n: int) -> None:
+        if not self.rate:
+            return
+        self._refill()
+        self.tokens -= n
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+    def try_take(self, n: int = 1) -> bool:
+        """Take n if available right now, without waiting."""
+        if not self.rate:
+            return True
+        self._refill()
+        if self.tokens < n:
+            return False
+        self.tokens -= n
+        return True
+
+
+def _byte_pacer(mbps: float) -> Pacer:
+    return Pacer(mbps * MB, 4 * BLOCK)
+
+
+class _LimitedReader:
+    """At most `length` bytes of a StreamReader."""
+
+    def __init__(self, reader: asyncio.StreamReader, length: int):
+        self.reader = reader
+        self.left = length
+
+    async def readline(self) -> bytes:
+        line = await self.reader.readline()
+        self.left -= len(line)
+        return line
+
+    async def read(self, n: int) -> bytes:
+        n = min(n, self.left)
+        if n <= 0:
+            return b""
+        data = await self.reader.readexactly(n)
+        self.left -= n
+        return data
+
+
+class _ChunkedReader:
+    """Decodes `<hex>[;ext]\\r\\n<data>\\r\\n ... 0\\r\\n\\r\\n` framing, used by
+    HTTP chunked transfer encoding and by aws-chunked signed payloads."""
+
+    def __init__(self, source):
+        self.source = source
+        self.left = 0
+        self.done = False
+
+    async def _exactly(self, n: int) -> bytes:
+        data = b""
+        while len(data) < n:
+            piece = await self.source.read(n - len(data))
+            if not piece:
+                raise asyncio.IncompleteReadError(data, n)
+            data += piece
+        return data
+
+    async def read(self, n: int) -> bytes:
+        if self.done:
+            return b""
+        if self.left == 0:
+            size = int((await self.source.readline()).split(b";")[0].strip(), 16)
+            if size == 0:
+                while (await self.source.readline()).strip():
+                    pass  # trailers
+                self.done = True
+                return b""
+            self.left = size
+        data = await self._exactly(min(n, self.left))
+        self.left -= len(data)
+        if self.left == 0:
+            await self.source.readline()  # CRLF after the chunk
+        return data
+
+
+class S3Error(Exception):
+    def __init__(self, status: int, code: str, message: str = ""):
+        super().__init__(message or code)
+        self.status = status
+        self.code = code
+
+
+@dataclass
+class Request:
+    method: str
+    bucket: str
+    key: str
+    query: dict[str, str]
+    headers: dict[str, str]
+    body: object = None
+
+
+@dataclass
+class Stats:
+    requests: int = 0
+    throttled: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    connections: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+
+class S3Server:
+    """Serves `root` over HTTP on host:port (0 = any free port)."""
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        link: Link | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.owns_root = root is None
+        self.root = Path(root or tempfile.mkdtemp(prefix="s3-standin-"))
+        self.link = link or Link()
+        self.host = host
+        self.port = port
+        self.total = _byte_pacer(self.link.total_mbps)
+        self.requests = Pacer(self.link.rps, max(1.0, self.link.rps))
+        self.stats = Stats()
+        self.server: asyncio.AbstractServer | None = None
+        self.handlers: dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.server = await asyncio.start_server(self._connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.endpoint
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            for writer in self.handlers.values():  # idle keep-alive connections
+                writer.transport.abort()
+            await asyncio.gather(*self.handlers, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def start_thread(self) -> str:
+        """Serve from a daemon thread with its own event loop, so blocking
+        clients in the caller's loop can't stall it; return the endpoint."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name="s3-standin", daemon=True
+        )
+        self.thread.start()
+        return asyncio.run_coroutine_threadsafe(self.start(), self.loop).result()
+
+    def stop_thread(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    # -- HTTP ----------------------------------------------------------------
+
+    async def _connection(self, reader, writer) -> None:
+        self.stats.connections += 1
+        self.handlers[asyncio.current_task()] = writer
+        up = _byte_pacer(self.link.conn_up_mbps)
+        down = _byte_pacer(self.link.conn_down_mbps)
+        try:
+            while (line := await reader.readline()).strip():
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (header := await reader.readline()).strip():
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if not await self._request(
+                    method, target, headers, reader, writer, up, down
+                ):
+                    keep_alive = False
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.handlers.pop(asyncio.current_task(), None)
+            writer.close()
+
+    def _body(self, headers: dict, reader, up: Pacer):
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            source = _ChunkedReader(reader)
+        else:
+            source = _LimitedReader(reader, int(headers.get("content-length", 0)))
+        if headers.get("x-amz-content-sha256", "").startswith("STREAMING-"):
+            source = _ChunkedReader(source)  # aws-chunked signed payload
+
+        async def blocks():
+            while data := await source.read(BLOCK):
+                await up.take(len(data))
+                await self.total.take(len(data))
+                self.stats.bytes_in += len(data)
+                yield data
+
+        return blocks()
+
+    async def _request(self, method, target, headers, reader, writer, up, down) -> bool:
+        """Serve one request; False if the connection can't be reused."""
+        self.stats.requests += 1
+        url = urlsplit(target)
+        bucket, _, key = unquote(url.path).lstrip("/").partition("/")
+        query = {
+            k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()
+        }
+        has_body = "content-length" in headers or "transfer-encoding" in headers
+        request = Request(method, bucket, key, query, headers)
+
+        if not self.requests.try_take():
+            self.stats.throttled += 1
+            # An unread body would corrupt the next request: drop the connection.
+            await self._error(
+                writer,
+                S3Error(503, "SlowDown", "Reduce your request rate"),
+                method,
+                close=has_body,
+            )
+            return not has_body
+        if headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        if has_body:
+            request.body = self._body(headers, reader, up)
+
+        try:
+            status, response_headers, payload = await self._dispatch(request)
+        except S3Error as e:
+            if request.body is not None:
+                async for _ in request.body:
+                    pass
+            await self._error(writer, e, method)
+            return True
+        except OSError as e:
+            await self._error(
+                writer, S3Error(500, "InternalError", str(e)), method, close=True
+            )
+            return False
+
+        await asyncio.sleep(self.link.latency_ms / 1000)
+        await self._send(writer, status, response_headers, payload, down, method)
+        return True
+
+    async def _send(self, writer, status, headers, payload, down, method) -> None:
+        """Write a response; payload is bytes or an async iterator of blocks."""
+        if isinstance(payload, bytes):
+            headers.setdefault("Content-Length", str(len(payload)))
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        head += [f"Date: {formatdate(usegmt=True)}", "Server: s3-standin", "", ""]
+        writer.write("\r\n".join(head).encode("latin-1"))
+
+        if method != "HEAD" and payload:
+            blocks = [payload] if isinstance(payload, bytes) else payload
+            async for block in _aiter(blocks):
+                for i in range(0, len(block), BLOCK):
+                    piece = block[i : i + BLOCK]
+                    await down.take(len(piece))
+                    await self.total.take(len(piece))
+                    self.stats.bytes_out += len(piece)
+                    writer.write(piece)
+                    await writer.drain()
+        await writer.drain()
+
+    async def _error(
+        self, writer, error: S3Error, method: str, close: bool = False
+    ) -> None:
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f"<Error><Code>{error.code}</Code>"
+            f"<Message>{escape(str(error))}</Message></Error>"
+        ).encode()
+        await asyncio.sleep(self.link.latency_ms / 1000)
+        await self._send(
+            writer,
+            error.status,
+            {
+                "Content-Type": "application/xml",
+                **({"Connection": "close"} if close else {}),
+            },
+            body,
+            _byte_pacer(0),
+            method,
+        )
+
+    # -- S3 ------------------------------------------------------------------
+
+    def _path(self, bucket: str, key: str = "") -> Path:
+        path = (self.root / bucket / key).resolve()
+        if bucket in ("", UPLOADS) or not path.is_relative_to(self.root.resolve()):
+            raise S3Error(400, "InvalidArgument", f"Bad bucket or key: {bucket}/{key}")
+        return path
+
+    async def _dispatch(self, r: Request):
+        if not r.bucket:
+            if r.method == "GET":
+                return 200, {"Content-Type": "application/xml"}, self._buckets()
+            raise S3Error(405, "MethodNotAllowed")
+        if not r.key:
+            return await self._bucket_request(r)
+
+        if r.method == "POST" and "uploads" in r.query:
+            return self._create_upload(r)
+        if r.method == "PUT" and "uploadId" in r.query:
+            return await self._upload_part(r)
+        if r.method == "POST" and "uploadId" in r.query:
+            return await self._complete_upload(r)
+        if r.method == "DELETE" and "uploadId" in r.query:
+            shutil.rmtree(self._upload_dir(r.query["uploadId"]), ignore_errors=True)
+            return 204, {}, b""
+        if r.method == "PUT":
+            return await self._put(r)
+        if r.method in ("GET", "HEAD"):
+            return self._get(r)
+        if r.method == "DELETE":
+            self._path(r.bucket, r.key).unlink(missing_ok=True)
+            return 204, {}, b""
+        raise S3Error(405, "MethodNotAllowed")
+
+    def _buckets(self) -> bytes:
+        names = sorted(p.name for p in self.root.iterdir() if p.name != UPLOADS)
+        buckets = "".join(f"<Bucket><Name>{escape(n)}</Name></Bucket>" for n in names)
+        return _xml("ListAllMyBucketsResult", f"<Buckets>{buckets}</Buckets>")
+
+    async def _bucket_request(self, r: Request):
+        path = self._path(r.bucket)
+        if r.method == "PUT":
+            path.mkdir(parents=True, exist_ok=True)
+            return 200, {}, b""
+        if r.method == "DELETE":
+            shutil.rmtree(path, ignore_errors=True)
+            return 204, {}, b""
+        if r.method == "HEAD":
+            return (200 if path.is_dir() else 404), {}, b""
+        if r.method == "GET":
+            return 200, {"Content-Type": "application/xml"}, self._list(r, path)
+        raise S3Error(405, "MethodNotAllowed")
+
+    def _list(self, r: Request, path: Path) -> bytes:
+        prefix = r.query.get("prefix", "")
+        contents = []
+        if path.is_dir():
+            for file in sorted(path.rglob("*")):
+                key = file.relative_to(path).as_posix()
+                if file.is_file() and key.startswith(prefix):
+                    stat = file.stat()
+                    contents.append(
+                        f"<Contents><Key>{escape(key)}</Key>"
+                        f"<LastModified>{_iso(stat.st_mtime)}</LastModified>"
+                        f"<ETag>{_etag(stat)}</ETag><Size>{stat.st_size}</Size>"
+                        "<StorageClass>STANDARD</StorageClass></Contents>"
+                    )
+        return _xml(
+            "ListBucketResult",
+            f"<Name>{escape(r.bucket)}</Name><Prefix>{escape(prefix)}</Prefix>"
+            f"<KeyCount>{len(contents)}</KeyCount><MaxKeys>{len(contents)}</MaxKeys>"
+            f"<IsTruncated>false</IsTruncated>{''.join(contents)}",
+        )
+
+    async def _receive(self, body, path: Path) -> str:
+        """Store a request body at path; return its quoted MD5 ETag."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        md5 = hashlib.md5()
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        try:
+            with open(tmp, "wb") as f:
+                if body is not None:
+                    async for block in body:
+                        md5.update(block)
+                        f.write(block)
+            tmp.replace(path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return f'"{md5.hexdigest()}"'
+
+    async def _put(self, r: Request):
+        path = self._path(r.bucket, r.key)
+        self._path(r.bucket).mkdir(parents=True, exist_ok=True)  # auto-create
+        return 200, {"ETag": await self._receive(r.body, path)}, b""
+
+    def _upload_dir(self, upload_id: str) -> Path:
+        if not upload_id.isalnum():
+            raise S3Error(404, "NoSuchUpload")
+        return self.root / UPLOADS / upload_id
+
+    def _create_upload(self, r: Request):
+        self._path(r.bucket, r.key)
+        upload_id = uuid.uuid4().hex
+        self._upload_dir(upload_id).mkdir(parents=True)
+        body = _xml(
+            "InitiateMultipartUploadResult",
+            f"<Bucket>{escape(r.bucket)}</Bucket><Key>{escape(r.key)}</Key>"
+            f"<UploadId>{upload_id}</UploadId>",
+        )
+        return 200, {"Content-Type": "application/xml"}, body
+
+    async def _upload_part(self, r: Request):
+        directory = self._upload_dir(r.query["uploadId"])
+        if not directory.is_dir():
+            raise S3Error(404, "NoSuchUpload")
+        try:
+            number = int(r.query.get("partNumber", 0))
+        except ValueError:
+            number = 0
+        if not 1 <= number <= 10000:
+            raise S3Error(400, "InvalidArgument", "partNumber must be 1..10000")
+        etag = await self._receive(r.body, directory / f"{number:05d}")
+        return 200, {"ETag": etag}, b""
+
+    async def _complete_upload(self, r: Request):
+        directory = self._upload_dir(r.query["uploadId"])
+        if not directory.is_dir():
+            raise S3Error(404, "NoSuchUpload")
+        document = b"".join([block async for block in r.body]) if r.body else b""
+        numbers = []
+        try:
+            if document.strip():
+                numbers = [
+                    int(element.text)
+                    for element in ET.fromstring(document).iter()
+                    if element.tag.rsplit("}", 1)[-1] == "PartNumber"
+                ]
+        except (ET.ParseError, TypeError, ValueError):
+            raise S3Error(
+                400, "MalformedXML", "The XML you provided was not well-formed"
+            ) from None
+        numbers = numbers or sorted(int(p.name) for p in directory.iterdir())
+        parts = [directory / f"{n:05d}" for n in numbers]
+        if not all(part.is_file() for part in parts):
+            raise S3Error(400, "InvalidPart")
+
+        path = self._path(r.bucket, r.key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        await asyncio.to_thread(_concatenate, parts, path)
+        shutil.rmtree(directory, ignore_errors=True)
+        etag = f'"{hashlib.md5(str(numbers).encode()).hexdigest()}-{len(parts)}"'
+        body = _xml(
+            "CompleteMultipartUploadResult",
+            f"<Location>{self.endpoint}/{escape(r.bucket)}/{escape(r.key)}</Location>"
+            f"<Bucket>{escape(r.bucket)}</Bucket><Key>{escape(r.key)}</Key>"
+            f"<ETag>{escape(etag)}</ETag>",
+        )
+        return 200, {"Content-Type": "application/xml"}, body
+
+    def _get(self, r: Request):
+        path = self._path(r.bucket, r.key)
+        if not path.is_file():
+            raise S3Error(404, "NoSuchKey", f"{r.bucket}/{r.key}")
+        stat = path.stat()
+        size = stat.st_size
+        headers = {
+            "ETag": _etag(stat),
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+            "Content-Type": "application/octet-stream",
+        }
+        status, start, end = 200, 0, size - 1
+        if "range" in r.headers:
+            start, end = _parse_range(r.headers["range"], size)
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(max(0, end - start + 1))
+        return status, headers, _read_range(path, start, end + 1)
+
+
+def _concatenate(parts: list[Path], path: Path) -> None:
+    with open(path, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, MB)
+
+
+async def _read_range(path: Path, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while start < end and (data := f.read(min(MB, end - start))):
+            start += len(data)
+            yield data
+
+
+async def _aiter(blocks):
+    if hasattr(blocks, "__aiter__"):
+        async for block in blocks:
+            yield block
+    else:
+        for block in blocks:
+            yield block
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int]:
+    """First range of a `bytes=a-b`, `bytes=a-` or `bytes=-n` header."""
+    try:
+        unit, _, spec = header.partition("=")
+        first, _, last = spec.split(",")[0].strip().partition("-")
+        if unit.strip() != "bytes":
+            raise ValueError
+        if first == "":
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        raise S3Error(400, "InvalidArgument", f"Bad Range: {header}")
+    if start >= size or start > end:
+        raise S3Error(416, "InvalidRange", f"{header} of {size} bytes")
+    return start, end
+
+
+def _etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_size:x}{stat.st_mtime_ns:x}"'
+
+
+def _iso(mtime: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(mtime))
+
+
+def _xml(root: str, inner: str) -> bytes:
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<{root} xmlns="{XMLNS}">{inner}</{root}>'
+    ).encode()
+
+
+def link_from_options(options: dict) -> Link:
+    """Link from a profile name plus overrides, e.g. {"profile": "s3", "rps": 50}."""
+    options = dict(options)
+    profile = options.pop("profile", "unlimited")
+    if profile not in LINK_PROFILES:
+        raise ValueError(
+            f"Unknown link profile '{profile}' "
+            f"(available: {', '.join(LINK_PROFILES)})"
+        )
+    return Link(**{**asdict(LINK_PROFILES[profile]), **options})
+
+
+async def serve(server: S3Server) -> None:
+    endpoint = await server.start()
+    print(f"Serving {server.root} at {endpoint} with {server.link}")
+    print(
+        f"  export AWS_ENDPOINT_URL={endpoint} AWS_ACCESS_KEY_ID=standin "
+        "AWS_SECRET_ACCESS_KEY=standin AWS_REGION=us-east-1"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a local S3-compatible endpoint with a shaped link"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument(
+        "--root",
+        type=Path,
+        help="Directory holding the buckets, kept on exit (default: a temp dir)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=LINK_PROFILES,
+        default="unlimited",
+        help="Link profile to start from (default: unlimited)",
+    )
+    for name, help_text in [
+        ("conn_up_mbps", "Upload MB/s per connection"),
+        ("conn_down_mbps", "Download MB/s per connection"),
+        ("total_mbps", "MB/s over all connections"),
+        ("latency_ms", "Latency added before every response"),
+        ("rps", "Requests per second before 503 SlowDown"),
+    ]:
+        parser.add_argument(
+            f"--{name.replace('_', '-')}",
+            type=float,
+            help=f"{help_text}, overriding the profile (0 = unlimited)",
+        )
+
+    args = parser.parse_args()
+
+    overrides = {
+        name: value
+        for name, value in vars(args).items()
+        if name in Link.__dataclass_fields__ and value is not None
+    }
+    link = link_from_options({"profile": args.profile, **overrides})
+    server = S3Server(args.root, link, args.host, args.port)
+    try:
+        asyncio.run(serve(server))
+    except KeyboardInterrupt:
+        stats = server.stats
+        elapsed = time.monotonic() - stats.started
+        print(
+            f"\n{stats.requests} requests ({stats.throttled} throttled) on "
+            f"{stats.connections} connections, {stats.bytes_in / MB:.1f} MB in, "
+            f"{stats.bytes_out / MB:.1f} MB out in {elapsed:.0f}s"
+        )
+    except OSError as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
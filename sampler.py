@@ -0,0 +1,254 @@
+"""
+Resource Sampler
+Background thread that polls /proc every 10-50 ms while a dump or restore
+runs: per-role CPU utilisation, RSS/peak RSS and /proc/<pid>/io bytes for
+the checkpointer's processes (daemon, CRIU, streamer, ...), plus host-wide
+/proc/diskstats and /proc/net/dev counters.
+"""
+
+import os
+import re
+import threading
+import time
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+SECTOR = 512
+MB = 1024**2
+# Whole disks only; partitions would double count.
+DISK_RE = re.compile(r"^(sd[a-z]+|vd[a-z]+|xvd[a-z]+|nvme\d+n\d+|mmcblk\d+)$")
+
+SAMPLE_FIELDS = [
+    "job",
+    "phase",
+    "t",
+    "role",
+    "processes",
+    "cpu_pct",
+    "rss_mb",
+    "io_read_mb",
+    "io_write_mb",
+    "disk_read_mb",
+    "disk_write_mb",
+    "net_rx_mb",
+    "net_tx_mb",
+]
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read().decode(errors="replace")
+    except OSError:
+        return None
+
+
+def read_process(pid: int) -> dict | None:
+    """CPU ticks, RSS and I/O bytes for one process (None if gone)."""
+    stat = _read(f"/proc/{pid}/stat")
+    status = _read(f"/proc/{pid}/status")
+    if stat is None or status is None:
+        return None
+    fields = stat[stat.rindex(")") + 2 :].split()
+    proc = {"ticks": int(fields[11]) + int(fields[12]), "rss": 0}
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            proc["rss"] = int(line.split()[1]) * 1024
+
+    io = _read(f"/proc/{pid}/io") or ""  # needs ptrace access to the process
+    counters = dict(line.split(": ") for line in io.splitlines() if ": " in line)
+    proc["read"] = int(counters.get("read_bytes", 0))
+    proc["write"] = int(counters.get("write_bytes", 0))
+    return proc
+
+
+def read_host() -> dict:
+    """Host-wide disk sector and network byte counters."""
+    host = {"disk_read": 0, "disk_write": 0, "net_rx": 0, "net_tx": 0}
+    for line in (_read("/proc/diskstats") or "").splitlines():
+        parts = line.split()
+        if len(parts) > 9 and DISK_RE.match(parts[2]):
+            host["disk_read"] += int(parts[5]) * SECTOR
+            host["disk_write"] += int(parts[9]) * SECTOR
+    for line in (_read("/proc/net/dev") or "").splitlines()[2:]:
+        iface, data = line.split(":", 1)
+        if iface.strip() == "lo":
+            continue
+        values = data.split()
+        host["net_rx"] += int(values[0])
+        host["net_tx"] += int(values[8])
+    return host
+
+
+def list_pids() -> set[int]:
+    """Pids of every process on the host."""
+    return {int(entry) for entry in os.listdir("/proc") if entry.isdigit()}
+
+
+def find_processes(
+    selectors: dict[str, str | int], candidates: set[int] | None = None
+) -> dict[int, str]:
+    """Map pid -> role for every process matching a selector.
+
+    A selector is either a pid or a substring of the command line; roles are
+    tried in order, so list more specific patterns first. Only the command
+    lines of `candidates` are read, if given, else those of every process.
+    """
+    matched = {pid: role for role, pid in selectors.items() if isinstance(pid, int)}
+    patterns = [(role, p) for role, p in selectors.items() if isinstance(p, str)]
+    if not patterns:
+        return matched
+
+    own = os.getpid()
+    for pid in list_pids() if candidates is None else candidates:
+        if pid == own or pid in matched:
+            continue
+        cmdline = _read(f"/proc/{pid}/cmdline")
+        if not cmdline:
+            continue
+        cmdline = cmdline.replace("\0", " ")
+        for role, pattern in patterns:
+            if pattern in cmdline:
+                matched[pid] = role
+                break
+    return matched
+
+
+class Sampler:
+    """Samples the selected processes and the host while in a `with` block.
+
+    After the block, `rows` holds the time series (one row per role per tick,
+    counters relative to the start) and `summary()` the per-phase aggregates.
+
+    Processes that start during the phase, like CRIU and the streamer, are
+    picked up on the first tick they are alive for, with everything they did
+    before it: their counters start from zero. Every `rescan_every` ticks all
+    command lines are read again, for processes that exec'd after being seen.
+    """
+
+    def __init__(
+        self,
+        selectors: dict[str, str | int],
+        interval: float = 0.02,
+        job: str = "",
+        phase: str = "",
+        rescan_every: int = 10,
+    ):
+        self.selectors = selectors
+        self.interval = interval
+        self.job = job
+        self.phase = phase
+        self.rescan_every = rescan_every
+        self.rows: list[dict] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._peak_rss = 0
+        self._role_peak: dict[str, int] = {}
+        self._cpu_samples: list[float] = []
+        self._io: dict[str, list[int]] = {}
+        self._host = {"disk_read": 0.0, "disk_write": 0.0, "net_rx": 0.0, "net_tx": 0.0}
+
+    def __enter__(self) -> "Sampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        start = time.monotonic()
+        host0 = read_host()
+        listed = list_pids()
+        pids = find_processes(self.selectors, listed)
+        # Counters at the start of the phase; zero for processes started since.
+        first: dict[int, dict] = {pid: read_process(pid) for pid in pids}
+        first = {pid: proc for pid, proc in first.items() if proc is not None}
+        zero = {"ticks": 0, "rss": 0, "read": 0, "write": 0}
+        roles_by_pid: dict[int, str] = {}
+        last: dict[int, dict] = {}  # kept after exit so I/O is not lost
+        last_t = start
+        tick = 0
+
+        while not self._stop.wait(self.interval):
+            tick += 1
+            now = time.monotonic()
+            current = list_pids()
+            rescan = tick % self.rescan_every == 0
+            new = current if rescan else current - listed
+            pids = {**pids, **find_processes(self.selectors, new)}
+            listed = current
+
+            roles: dict[str, dict] = {}
+            for pid, role in list(pids.items()):
+                proc = read_process(pid)
+                if proc is None:
+                    pids.pop(pid)
+                    continue
+                roles_by_pid[pid] = role
+                first.setdefault(pid, zero)
+                prev = last.get(pid, first[pid])
+                last[pid] = proc
+                agg = roles.setdefault(role, {"n": 0, "cpu": 0.0, "rss": 0})
+                agg["n"] += 1
+                agg["cpu"] += (proc["ticks"] - prev["ticks"]) / CLK_TCK
+                agg["rss"] += proc["rss"]
+
+            io: dict[str, list[int]] = {}
+            for pid, role in roles_by_pid.items():
+                totals = io.setdefault(role, [0, 0])
+                totals[0] += last[pid]["read"] - first[pid]["read"]
+                totals[1] += last[pid]["write"] - first[pid]["write"]
+
+            host = read_host()
+            self._host = {
+                key: (host[key] - host0[key]) / MB
+                for key in ("disk_read", "disk_write", "net_rx", "net_tx")
+            }
+            base = {
+                "job": self.job,
+                "phase": self.phase,
+                "t": round(now - start, 4),
+                **{f"{k}_mb": round(v, 2) for k, v in self._host.items()},
+            }
+
+            total_cpu = 0.0
+            for role, agg in roles.items():
+                self._role_peak[role] = max(self._role_peak.get(role, 0), agg["rss"])
+                cpu_pct = 100 * agg["cpu"] / (now - last_t)
+                total_cpu += cpu_pct
+                self.rows.append(
+                    {
+                        **base,
+                        "role": role,
+                        "processes": agg["n"],
+                        "cpu_pct": round(cpu_pct, 1),
+                        "rss_mb": round(agg["rss"] / MB, 2),
+                        "io_read_mb": round(io[role][0] / MB, 2),
+                        "io_write_mb": round(io[role][1] / MB, 2),
+                    }
+                )
+            self._cpu_samples.append(total_cpu)
+            self._peak_rss = max(self._peak_rss, sum(a["rss"] for a in roles.values()))
+            self._io = io
+            last_t = now
+
+    def summary(self) -> dict:
+        """Peak RSS, mean CPU% (all roles summed) and bytes moved in the phase.
+
+        Peaks are the highest sampled RSS within the phase, not the processes'
+        lifetime VmHWM, which long-lived ones like the daemon carry across
+        phases. role_peak_rss_mb is the peak per role, e.g.
+        "criu=41.2;streamer=130.5".
+        """
+        cpu = self._cpu_samples
+        return {
+            "peak_rss_mb": round(self._peak_rss / MB, 1),
+            "role_peak_rss_mb": ";".join(
+                f"{role}={rss / MB:.1f}"
+                for role, rss in sorted(self._role_peak.items())
+            ),
+            "cpu_pct": round(sum(cpu) / len(cpu), 1) if cpu else 0.0,
+            "io_read_mb": round(sum(r for r, _ in self._io.values()) / MB, 1),
+            "io_write_mb": round(sum(w for _, w in self._io.values()) / MB, 1),
+            **{f"{k}_mb": round(v, 1) for k, v in self._host.items()},
+        }
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Cedana Span Timing Parser
+Extracts the daemon's span timings (e.g. `cedana.(*Server).Run.Manage`,
+`process.SetupIO[...]`, `run (total)`) from benchmark logs, attaches each span
+to its (compression, streams, concurrency, run) test case and phase, and
+summarises them as a per-phase table. Spans of bench.py's warmup runs are
+skipped; those of a concurrent batch are pooled over its jobs.
+"""
+
+import argparse
+import csv
+import re
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+CASE_RE = re.compile(
+    r"Testing: (?P<compression>\S+) compression with (?P<streams>\d+) streams"
+    r"(?:, (?P<concurrency>\d+) concurrent jobs)? "
+    r"\((?:run (?P<run>\d+)|warmup \d+)/\d+\)"
+)
+# Go duration, optional share of the total, then the span (optionally
+# prefixed by a category column separated by two or more spaces).
+SPAN_RE = re.compile(
+    r"^\s*(?P<duration>(?:\d+(?:\.\d+)?(?:h|m(?!s)|s|ms|µs|μs|us|ns))+)"
+    r"\s+(?:(?P<share>\d+(?:\.\d+)?)%\s+)?(?P<rest>\S.*?)\s*$"
+)
+CATEGORY_RE = re.compile(r"^(?P<category>[\w-]+)\s{2,}(?P<name>\S.*)$")
+UNIT_RE = re.compile(r"(\d+(?:\.\d+)?)(h|ms|m|s|µs|μs|us|ns)")
+
+UNIT_SECONDS = {
+    "h": 3600.0,
+    "m": 60.0,
+    "s": 1.0,
+    "ms": 1e-3,
+    "µs": 1e-6,
+    "μs": 1e-6,
+    "us": 1e-6,
+    "ns": 1e-9,
+}
+
+# Marker lines written by run_benchmarks.sh and bench.py between phases.
+PHASE_MARKERS = {
+    "Starting job:": "run",
+    "STARTING CHECKPOINT": "dump",
+    "STARTING RESTORE": "restore",
+}
+
+FIELDS = [
+    "log",
+    "compression",
+    "streams",
+    "concurrency",
+    "run_number",
+    "phase",
+    "block",
+    "category",
+    "span",
+    "share",
+    "seconds",
+]
+
+
+def parse_duration(text: str) -> float:
+    """Convert a Go duration string (e.g. `1m2.5s`, `415.328µs`) to seconds."""
+    return sum(float(v) * UNIT_SECONDS[u] for v, u in UNIT_RE.findall(text))
+
+
+def iter_spans(lines, log: str = ""):
+    """Yield one dict per span line, streaming over `lines`.
+
+    Each blank-line separated group of span lines is a block; the daemon
+    prints the span tree first and, for GPU jobs, a per-category breakdown
+    (lines with a percentage share) second.
+
+    Warmup runs are not attributed to any case, not even the one before:
+
+    >>> log = [
+    ...     "Testing: zstd compression with 2 streams (run 1/3)",
+    ...     "Testing: zstd compression with 2 streams (warmup 1/2)",
+    ...     "STARTING CHECKPOINT",
+    ...     "  1.5s   run (total)",
+    ... ]
+    >>> list(iter_spans(log))
+    []
+    """
+    no_case = {
+        "compression": None,
+        "streams": None,
+        "concurrency": None,
+        "run_number": None,
+    }
+    case = no_case
+    phase = None
+    block = 0
+    in_block = False
+
+    for raw in lines:
+        line = ANSI_RE.sub("", raw).rstrip("\n")
+
+        match = CASE_RE.search(line)
+        if match:
+            case = no_case
+            if match["run"] is not None:  # a warmup's spans are dropped
+                case = {
+                    "compression": match["compression"],
+                    "streams": int(match["streams"]),
+                    "concurrency": int(match["concurrency"] or 1),
+                    "run_number": int(match["run"]),
+                }
+            phase, block, in_block = None, 0, False
+            continue
+
+        for marker, marker_phase in PHASE_MARKERS.items():
+            if marker in line:
+                phase, block, in_block = marker_phase, 0, False
+                break
+
+        match = SPAN_RE.match(line)
+        if not match or case["compression"] is None:
+            in_block = False
+            continue
+
+        if not in_block:
+            block += 1
+            in_block = True
+
+        rest = match["rest"]
+        category = ""
+        cat_match = CATEGORY_RE.match(rest)
+        if match["share"] is not None:
+            category, rest = rest, ""
+        elif cat_match:
+            category, rest = cat_match["category"], cat_match["name"]
+
+        yield {
+            "log": log,
+            **case,
+            "phase": phase or "run",
+            "block": block,
+            "category": category,
+            "span": rest or f"[{category}]",
+            "share": float(match["share"]) if match["share"] else None,
+            "seconds": round(parse_duration(match["duration"]), 9),
+        }
+
+
+def parse_logs(paths: list[Path]):
+    """Stream spans from several log files without loading any of them whole."""
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            yield from iter_spans(f, log=path.name)
+
+
+def phase_table(spans: pd.DataFrame) -> pd.DataFrame:
+    """Median seconds per (phase, span) with a column per (compression,
+    streams) case, so codecs aren't pooled into one median."""
+    tree = spans[spans["share"].isna()]
+    return (
+        tree.groupby(["phase", "span", "compression", "streams"])["seconds"]
+        .median()
+        .unstack(["compression", "streams"])
+        .sort_index()
+        .sort_index(axis=1)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse cedana span timings")
+    parser.add_argument("logs", nargs="+", type=Path, help="Benchmark log files")
+    parser.add_argument(
+        "--output", "-o", type=Path, help="Write every span to this CSV"
+    )
+    parser.add_argument(
+        "--summary",
+        "-s",
+        action="store_true",
+        help="Print median span time per phase, compression and stream count",
+    )
+
+    args = parser.parse_args()
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    writer = csv.DictWriter(out, fieldnames=FIELDS)
+    writer.writeheader()
+
+    rows = [] if args.summary else None
+    try:
+        for span in parse_logs(args.logs):
+            writer.writerow(span)
+            if rows is not None:
+                rows.append(span)
+    finally:
+        if args.output:
+            out.close()
+
+    if rows:
+        table = phase_table(pd.DataFrame(rows, columns=FIELDS))
+        print(
+            "\nMedian span time (seconds) by phase, compression and stream count",
+            file=sys.stderr,
+        )
+        print(table.to_string(float_format=lambda v: f"{v:.6f}"), file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Multi-Stream Storage Microbenchmark
+Writes a workload-sized payload to the dump target through 1..N parallel
+writers, one file per stream like the streamer's image files, then reads it
+back. Buffered and O_DIRECT I/O and several chunk sizes can be compared. It
+reports the aggregate and per-stream throughput curve, so C/R results can be
+read as a fraction of the storage ceiling measured on the same machine.
+"""
+
+import argparse
+import csv
+import mmap
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+
+from common import parse_ints, parse_streams, timestamp
+
+MB = 1024**2
+ALIGN = 4096  # O_DIRECT needs block-aligned buffers, offsets and sizes
+FIELDS = [
+    "timestamp",
+    "host",
+    "target",
+    "mode",
+    "chunk_kb",
+    "writers",
+    "size_mb",
+    "phase",
+    "seconds",
+    "aggregate_mbps",
+    "per_stream_mbps",
+    "slowest_stream_mbps",
+]
+
+
+def _payload(size: int) -> mmap.mmap:
+    """Page-aligned buffer of incompressible bytes."""
+    buf = mmap.mmap(-1, size)
+    buf.write(os.urandom(size))
+    return buf
+
+
+def _stream(
+    path: Path,
+    phase: str,
+    direct: bool,
+    nbytes: int,
+    chunk: int,
+    fsync: bool,
+    barrier: threading.Barrier,
+    times: list,
+    errors: list,
+    index: int,
+) -> None:
+    """Write or read one stream file in `chunk` pieces; record its duration.
+
+    An error is recorded in `errors` and breaks the barrier, so neither the
+    other streams nor measure() wait for this one.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC if phase == "write" else os.O_RDONLY
+    if direct:
+        flags |= os.O_DIRECT
+    buf = _payload(chunk)
+    fd = None
+    try:
+        fd = os.open(path, flags, 0o644)
+        barrier.wait()
+        start = time.monotonic()
+        done = 0
+        while done < nbytes:
+            if phase == "write":
+                done += os.write(fd, buf)
+            else:
+                n = os.readv(fd, [buf])
+                if n == 0:
+                    break
+                done += n
+        if phase == "write" and fsync:
+            os.fsync(fd)
+        times[index] = time.monotonic() - start
+    except threading.BrokenBarrierError:
+        pass  # another stream failed first
+    except Exception as e:
+        errors[index] = e
+        barrier.abort()
+    finally:
+        if fd is not None:
+            if phase == "write" and not direct:
+                # Drop the clean pages so the read phase hits the device.
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            os.close(fd)
+        buf.close()
+
+
+def measure(
+    target: Path,
+    writers: int,
+    size: int,
+    chunk: int,
+    direct: bool = False,
+    fsync: bool = True,
+) -> list[dict]:
+    """Write then read `size` bytes split across `writers` stream files."""
+    per_stream = max(chunk, size // writers // chunk * chunk)
+    paths = [target / f"storage-bench-{os.getpid()}-{i}.img" for i in range(writers)]
+    rows = []
+    try:
+        for phase in ("write", "read"):
+            times = [0.0] * writers
+            errors: list[Exception | None] = [None] * writers
+            barrier = threading.Barrier(writers + 1)
+            threads = [
+                threading.Thread(
+                    target=_stream,
+                    args=(paths[i], phase, direct, per_stream, chunk, fsync,
+                          barrier, times, errors, i),  # fmt: skip
+                )
+                for i in range(writers)
+            ]
+            for thread in threads:
+                thread.start()
+            try:
+                barrier.wait()
+            except threading.BrokenBarrierError:
+                pass  # a stream failed; its error is raised below
+            start = time.monotonic()
+            for thread in threads:
+                thread.join()
+            wall = time.monotonic() - start
+            error = next((e for e in errors if e is not None), None)
+            if error is not None:
+                raise OSError(f"a {phase} stream failed: {error}") from error
+            if not all(times):
+                raise OSError(f"a {phase} stream failed")
+
+            rows.append(
+                {
+                    "timestamp": timestamp(),
+                    "host": socket.gethostname(),
+                    "target": str(target),
+                    "mode": "direct" if direct else "buffered",
+                    "chunk_kb": chunk // 1024,
+                    "writers": writers,
+                    "size_mb": per_stream * writers // MB,
+                    "phase": phase,
+                    "seconds": f"{wall:.3f}",
+                    "aggregate_mbps": f"{per_stream * writers / MB / wall:.1f}",
+                    "per_stream_mbps": f"{per_stream / MB / (sum(times) / writers):.1f}",
+                    "slowest_stream_mbps": f"{per_stream / MB / max(times):.1f}",
+                }
+            )
+    finally:
+        for path in paths:
+            path.unlink(missing_ok=True)
+    return rows
+
+
+def evict(directory: str | os.PathLike) -> float:
+    """Write back a dump directory's files and drop them from the page cache.
+
+    Reads that follow hit the device. Returns the seconds the write-back took.
+    """
+    start = time.monotonic()
+    for root, _, files in os.walk(directory):
+        for name in files:
+            fd = os.open(os.path.join(root, name), os.O_RDONLY)
+            try:
+                os.fdatasync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+    return time.monotonic() - start
+
+
+def drop_caches() -> bool:
+    """Write back dirty pages and drop the page cache, dentries and inodes
+    system-wide. Needs root; False if drop_caches can't be written."""
+    os.sync()
+    try:
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+    except OSError:
+        return False
+    return True
+
+
+def ceiling(csv_path: Path, phase: str = "write", mode: str = "buffered") -> dict:
+    """Best aggregate MB/s per writer count from a storage_bench CSV."""
+    ceilings: dict[int, float] = {}
+    with open(csv_path) as f:
+        for row in csv.DictReader(f):
+            if row["phase"] == phase and row["mode"] == mode:
+                writers = int(row["writers"])
+                mbps = float(row["aggregate_mbps"])
+                ceilings[writers] = max(ceilings.get(writers, 0.0), mbps)
+    return ceilings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure parallel stream write/read throughput of a dump target"
+    )
+    parser.add_argument(
+        "target",
+        type=Path,
+        nargs="?",
+        default=Path("/tmp"),
+        help="Directory to benchmark, i.e. the dump target (default: /tmp)",
+    )
+    parser.add_argument(
+        "--size-mb",
+        type=int,
+        default=512,
+        help="Total payload, about the checkpoint size (default: 512)",
+    )
+    parser.add_argument(
+        "--writers",
+        type=parse_streams,
+        default=[1, 2, 4, 8],
+        help="Parallel stream counts, e.g. 1,2,4,8 or 1-16 (default: 1,2,4,8)",
+    )
+    parser.add_argument(
+        "--chunk-kb",
+        type=parse_ints,
+        default=[4096],
+        help="Write/read sizes in KiB, comma separated (default: 4096)",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["buffered", "direct", "both"],
+        default="buffered",
+        help="Page-cache or O_DIRECT I/O (default: buffered)",
+    )
+    parser.add_argument(
+        "--no-fsync",
+        action="store_true",
+        help="Don't fsync buffered writes (measures the page cache)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        default=Path("results/storage_bench.csv"),
+        help="CSV to append results to (default: results/storage_bench.csv)",
+    )
+
+    args = parser.parse_args()
+
+    if not args.target.is_dir():
+        print(f"Error: {args.target} is not a directory")
+        return 1
+    if any(kb * 1024 % ALIGN for kb in args.chunk_kb):
+        print(f"Error: chunk sizes must be multiples of {ALIGN // 1024} KiB")
+        return 1
+
+    modes = [False, True] if args.mode == "both" else [args.mode == "direct"]
+    size = args.size_mb * MB
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    new_file = not args.output.exists()
+    with open(args.output, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        if new_file:
+            writer.writeheader()
+
+        print(f"{'mode':<9} {'chunk':>7} {'writers':>7} {'phase':<6} "
+              f"{'aggregate':>12} {'per stream':>12} {'slowest':>10}")  # fmt: skip
+        for direct in modes:
+            for chunk_kb in args.chunk_kb:
+                for writers in args.writers:
+                    try:
+                        rows = measure(
+                            args.target,
+                            writers,
+                            size,
+                            chunk_kb * 1024,
+                            direct,
+                            not args.no_fsync,
+                        )
+                    except OSError as e:
+                        print(f"Error: {'direct' if direct else 'buffered'} I/O "
+                              f"on {args.target}: {e}")  # fmt: skip
+                        return 1
+                    writer.writerows(rows)
+                    f.flush()
+                    for row in rows:
+                        print(
+                            f"{row['mode']:<9} {row['chunk_kb']:>5}KB "
+                            f"{row['writers']:>7} {row['phase']:<6} "
+                            f"{row['aggregate_mbps']:>7} MB/s "
+                            f"{row['per_stream_mbps']:>7} MB/s "
+                            f"{row['slowest_stream_mbps']:>5} MB/s"
+                        )
+
+    print(f"\nResults appended to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,20 +1,387 @@
-import time
+#!/usr/bin/env python3
+"""
+Stress Workload Generator
+Allocates TARGET_RAM_GB of memory, fills it with a chosen entropy profile and
+keeps it busy until interrupted. The profile decides how compressible the
+checkpoint image is: an all-zero heap makes every codec look equally good,
+while real tensors and heaps barely compress.
+
+Profiles:
+  zero     untouched zero pages (the original stress.py behaviour)
+  random   incompressible bytes
+  repeat   one random block repeated; compresses when the block fits in
+           the codec's window (32 KiB zlib, 64 KiB lz4)
+  tensor   float32 with the exponent spread of N(0, 0.02) weights
+  mixture  random and zero 4 KiB pages mixed to hit --target-ratio
+"""
+
+import argparse
+import mmap
+import multiprocessing
 import os
+import threading
+import time
+import zlib
+
+import numpy as np
+
 TARGET_RAM_GB = 0.5  # Set this to your desired memory usage
-def hybrid_load(shared_size): # Allocate a large bytearray (this takes up the RAM)
-    data = bytearray(shared_size)
-    print(f"Process {os.getpid()} allocated {shared_size / 1024**2:.2f} MB")
+PROFILES = ["zero", "random", "repeat", "tensor", "mixture"]
+CHUNK_SIZE = 64 * 1024**2
+PAGE_SIZE = 4096
 
-    while True:
-        # This forces the CPU to constantly fetch from RAM. We use a slice and a simple sum to keep the CPU pinned.
-        _ = sum(data[::1000])
 
-if __name__ == "__main__":
-    bytes_per_core = int((TARGET_RAM_GB * 1024**3))
-    print("Press Ctrl+C to stop.")
+def _tensor_high_bytes(std: float = 0.02) -> np.ndarray:
+    """Map a random byte to the top byte of a float32 drawn like N(0, std).
+
+    The top byte holds the sign and the upper 7 exponent bits. Rewriting only
+    that byte of random words gives weights-like values (the last exponent
+    bit and the mantissa stay random). It is several times faster than
+    standard_normal and has about the same byte-level entropy.
+    """
+    rng = np.random.default_rng(0)
+    values = np.abs(rng.normal(0, std, 1 << 16)).astype(np.float32)
+    high = np.sort(values.view(np.uint32) >> 24).astype(np.uint8)
+    quantiles = high[np.linspace(0, len(high) - 1, 128).astype(int)]
+    table = np.arange(256, dtype=np.uint8) & 0x80  # keep the random sign
+    table |= np.tile(quantiles, 2)
+    return table
+
+
+TENSOR_HIGH_BYTES = _tensor_high_bytes()
+
+
+def _random_bytes(rng: np.random.Generator, n: int) -> np.ndarray:
+    """n random bytes straight from the bit generator (faster than rng.bytes)."""
+    return rng.bit_generator.random_raw(-(-n // 8)).view(np.uint8)[:n]
+
+
+def _fill_chunk(
+    chunk: np.ndarray,
+    profile: str,
+    rng: np.random.Generator,
+    block: np.ndarray,
+    random_share: float,
+) -> None:
+    """Fill one uint8 chunk in place."""
+    if profile == "random":
+        chunk[:] = _random_bytes(rng, len(chunk))
+    elif profile == "repeat":
+        reps = -(-len(chunk) // len(block))
+        chunk[:] = np.tile(block, reps)[: len(chunk)]
+    elif profile == "tensor":
+        chunk[:] = _random_bytes(rng, len(chunk))
+        words = chunk[: len(chunk) // 4 * 4].reshape(-1, 4)  # little-endian
+        words[:, 3] = TENSOR_HIGH_BYTES[words[:, 3]]
+    elif profile == "mixture":
+        pages = chunk[: len(chunk) // PAGE_SIZE * PAGE_SIZE].reshape(-1, PAGE_SIZE)
+        noisy = rng.random(len(pages)) < random_share
+        pages[~noisy] = 0
+        pages[noisy] = _random_bytes(rng, int(noisy.sum()) * PAGE_SIZE).reshape(
+            -1, PAGE_SIZE
+        )
+
+
+def fill(
+    data: bytearray,
+    profile: str = "zero",
+    target_ratio: float = 2.0,
+    block_size: int = 16 * 1024,
+    seed: int = 0,
+) -> None:
+    """Fill `data` with an entropy profile, one chunk at a time.
+
+    For `mixture`, random pages make up 1/target_ratio of the buffer and the
+    rest are zero, so codecs that squeeze zero pages to nothing land near the
+    target.
+    """
+    if profile == "zero":
+        return  # bytearray() is already zeroed and the pages stay untouched
+    view = np.frombuffer(data, dtype=np.uint8)
+    rng = np.random.default_rng(seed)
+    block = _random_bytes(rng, block_size)
+    random_share = min(1.0, 1 / target_ratio)
+    for start in range(0, len(view), CHUNK_SIZE):
+        chunk = view[start : start + CHUNK_SIZE]
+        _fill_chunk(chunk, profile, rng, block, random_share)
+
+
+def compressibility(
+    data: bytearray, samples: int = 8, sample_size: int = 4 * 1024**2
+) -> dict[str, float]:
+    """Compression ratio of evenly spaced samples of `data` per codec.
+
+    Samples are compressed independently, so repeats longer than a sample are
+    not found. That matches the 4 MiB chunks used by local_checkpoint.py.
+    """
+    view = memoryview(data)
+    step = max(sample_size, len(data) // samples)
+    chunks = [view[i : i + sample_size] for i in range(0, len(data), step)][:samples]
+    raw = sum(len(c) for c in chunks)
+
+    codecs = {"zlib-1": lambda b: zlib.compress(b, 1), "zlib-6": zlib.compress}
+    try:
+        import lz4.frame
+
+        codecs["lz4"] = lz4.frame.compress
+    except ImportError:
+        pass
+    return {
+        name: raw / max(1, sum(len(compress(c)) for c in chunks))
+        for name, compress in codecs.items()
+    }
+
+
+class TokenBucket:
+    """Pace a worker to `rate` bytes/s, allowing bursts of `burst` bytes."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+
+    def take(self, n: int) -> None:
+        """Block until n bytes may be moved (no-op if rate is 0 = unlimited)."""
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        self.tokens -= n
+        if self.tokens < 0:
+            time.sleep(-self.tokens / self.rate)
+
+
+def _worker(
+    data,
+    index: int,
+    workers: int,
+    rate: float,
+    cpu_share: float,
+    op_bytes: int,
+    stride: int,
+    write_share: float,
+    moved,
+    busy,
+    stop,
+) -> None:
+    """Stream over this worker's slice of `data` until `stop` is set.
+
+    Each op reduces one strided NumPy view (no copies) and, for write_share
+    of the ops, adds 0 to it in place, which dirties the pages without
+    changing the profile's bytes. Byte counts are the cache lines touched.
+    """
+    words = np.frombuffer(data, dtype=np.uint64)
+    share = len(words) // workers
+    words = words[index * share : (index + 1) * share]
+    op_words = max(stride, op_bytes // 8)
+    op_traffic = (op_words // stride) * min(64, stride * 8)
+
+    bucket = TokenBucket(rate, burst=max(rate * 0.05, op_traffic))
+    parent = os.getppid()
+    start = time.monotonic()
+    last_check = start
+    busy_time = 0.0
+    ops = 0
+    pos = 0
+    try:
+        while not stop.is_set():
+            bucket.take(op_traffic)
+            t0 = time.monotonic()
+            view = words[pos : pos + op_words : stride]
+            np.bitwise_or.reduce(view)
+            ops += 1
+            if write_share and ops * write_share >= 1:
+                bucket.take(op_traffic)
+                np.add(view, 0, out=view)
+                ops = 0
+                moved[index] += op_traffic
+            moved[index] += op_traffic
+            pos = pos + op_words if pos + 2 * op_words <= len(words) else 0
+
+            t1 = time.monotonic()
+            busy_time += t1 - t0
+            busy[index] = busy_time
+            if cpu_share < 1:  # duty cycle: sleep off any busy time over budget
+                time.sleep(max(0.0, busy_time / cpu_share - (t1 - start)))
+            if t1 - last_check > 0.5:
+                last_check = t1
+                if os.getppid() != parent:
+                    return  # the workload was killed, don't linger as an orphan
+    except KeyboardInterrupt:
+        pass
+
+
+def memory_load(
+    data,
+    gbps: float = 0.0,
+    cpu_share: float = 0.0,
+    workers: int = 1,
+    mode: str = "threads",
+    op_kb: int = 1024,
+    stride: int = 1,
+    write_share: float = 0.0,
+    report_every: float = 5.0,
+) -> None:
+    """Keep `data` under a paced memory load until interrupted.
+
+    `gbps` and `cpu_share` (in cores) are totals split evenly across
+    workers; 0 leaves them unlimited. `stride` is in 8-byte words, so 8
+    touches one word per cache line. Processes need `data` to be a shared
+    mapping so they work on the same pages as the parent.
+    """
+    rate = gbps * 1e9 / workers
+    duty = min(1.0, cpu_share / workers) if cpu_share else 1.0
+    if mode == "processes":
+        context = multiprocessing.get_context("fork")
+        moved = context.Array("d", workers, lock=False)
+        busy = context.Array("d", workers, lock=False)
+        stop = context.Event()
+        spawn = context.Process
+    else:
+        # NumPy drops the GIL inside the reductions, so threads scale too.
+        moved, busy, stop = [0.0] * workers, [0.0] * workers, threading.Event()
+        spawn = threading.Thread
+
+    runners = [
+        spawn(
+            target=_worker,
+            args=(data, i, workers, rate, duty, op_kb * 1024, stride,
+                  write_share, moved, busy, stop),  # fmt: skip
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for runner in runners:
+        runner.start()
+
+    last_t, last_moved, last_busy = time.monotonic(), 0.0, 0.0
     try:
-        hybrid_load(bytes_per_core)
         while True:
-            time.sleep(1)
+            time.sleep(report_every)
+            now, total, total_busy = time.monotonic(), sum(moved), sum(busy)
+            elapsed = now - last_t
+            print(
+                f"Memory load: {(total - last_moved) / elapsed / 1e9:.2f} GB/s "
+                f"({workers} {mode}, "
+                f"{(total_busy - last_busy) / elapsed:.2f} cores busy)",
+                flush=True,
+            )
+            last_t, last_moved, last_busy = now, total, total_busy
+    finally:
+        stop.set()
+        for runner in runners:
+            runner.join(timeout=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Memory workload with a controllable entropy profile"
+    )
+    parser.add_argument(
+        "--size-gb",
+        type=float,
+        default=TARGET_RAM_GB,
+        help=f"Memory to allocate in GiB (default: {TARGET_RAM_GB})",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILES,
+        default="zero",
+        help="Entropy profile of the filled memory (default: zero)",
+    )
+    parser.add_argument(
+        "--target-ratio",
+        type=float,
+        default=2.0,
+        help="Compression ratio the mixture profile aims for (default: 2.0)",
+    )
+    parser.add_argument(
+        "--block-kb",
+        type=int,
+        default=16,
+        help="Size of the repeated block for the repeat profile (default: 16)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--gbps",
+        type=float,
+        default=0.0,
+        help="Target memory traffic in GB/s across workers (default: unlimited)",
+    )
+    parser.add_argument(
+        "--cpu-share",
+        type=float,
+        default=0.0,
+        help="CPU cores the load may keep busy in total (default: unlimited)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Load workers (default: 1)"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["threads", "processes"],
+        default="threads",
+        help="Run workers as threads or forked processes (default: threads)",
+    )
+    parser.add_argument(
+        "--stride",
+        type=int,
+        default=1,
+        help="Stride of the reads in 8-byte words; 8 = one per cache line "
+        "(default: 1)",
+    )
+    parser.add_argument(
+        "--write-share",
+        type=float,
+        default=0.0,
+        help="Fraction of ops that also write back in place (default: 0)",
+    )
+    parser.add_argument(
+        "--report-every",
+        type=float,
+        default=5.0,
+        help="Seconds between bandwidth reports (default: 5)",
+    )
+
+    args = parser.parse_args()
+    if args.target_ratio < 1:
+        parser.error("--target-ratio must be at least 1")
+
+    size = int(args.size_gb * 1024**3) // 8 * 8
+    # Forked workers must share the pages rather than copy them on write.
+    data = mmap.mmap(-1, size) if args.mode == "processes" else bytearray(size)
+    start = time.monotonic()
+    fill(data, args.profile, args.target_ratio, args.block_kb * 1024, args.seed)
+    elapsed = time.monotonic() - start
+    print(
+        f"Process {os.getpid()} allocated {size / 1024**2:.2f} MB "
+        f"({args.profile}, filled in {elapsed:.2f}s)"
+    )
+    ratios = compressibility(data)
+    print(
+        "Compressibility: "
+        + ", ".join(f"{name} {ratio:.2f}x" for name, ratio in ratios.items()),
+        flush=True,
+    )
+
+    print("Press Ctrl+C to stop.")
+    try:
+        memory_load(
+            data,
+            args.gbps,
+            args.cpu_share,
+            args.workers,
+            args.mode,
+            stride=args.stride,
+            write_share=args.write_share,
+            report_every=args.report_every,
+        )
     except KeyboardInterrupt:
         print("\nStopping workload...")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())